@@ -10,12 +10,25 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -63,6 +76,10 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MIDDLEWARE = [
+    'procurement.utils.metrics.MetricsMiddleware',
+    'procurement.utils.tracing.TracingMiddleware',
+    # compresses HTML/JSON; Django pads gzip output against BREACH
+    'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,13 +87,18 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'procurement.utils.audit.AuditLogMiddleware',
+    'procurement.routers.ReplicaStickinessMiddleware',
+    'procurement.utils.profiling.SamplingProfilerMiddleware',
+    'procurement.utils.nplusone.QueryShapeMiddleware',
 ]
 
 ROOT_URLCONF = 'evsu_procurement_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # stock DjangoTemplates plus render timing for /metrics
+        'BACKEND': 'procurement.utils.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -95,13 +117,184 @@ WSGI_APPLICATION = 'evsu_procurement_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres switches to PostgreSQL; everything else is read from
+# DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT. With DB_POOL=1 psycopg's
+# connection pool is used (Django does not allow it together with
+# CONN_MAX_AGE), otherwise connections persist for DB_CONN_MAX_AGE seconds.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite").lower()
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DB_POOL = env_bool("DB_POOL", False)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DB_NAME", "evsu_procurement"),
+            'USER': os.environ.get("DB_USER", "postgres"),
+            'PASSWORD': os.environ.get("DB_PASSWORD", ""),
+            'HOST': os.environ.get("DB_HOST", "localhost"),
+            'PORT': os.environ.get("DB_PORT", "5432"),
+            'CONN_MAX_AGE': 0 if DB_POOL else env_int("DB_CONN_MAX_AGE", 60),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': env_int("DB_POOL_MIN_SIZE", 2),
+                    'max_size': env_int("DB_POOL_MAX_SIZE", 10),
+                    'timeout': env_int("DB_POOL_TIMEOUT", 10),
+                },
+            } if DB_POOL else {},
+            'TEST': {
+                'NAME': os.environ.get("DB_TEST_NAME") or None,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("DB_NAME") or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # take the write lock at BEGIN so busy_timeout applies, instead
+                # of failing immediately when a read transaction upgrades
+                'transaction_mode': 'IMMEDIATE',
+            } if env_bool("SQLITE_TUNING", True) else {},
+        }
+    }
+
+# Audit log (procurement.utils.audit). AUDIT_DB_NAME moves ActionLog to its
+# own database with the same engine so audit INSERTs never wait on the main
+# database's write lock; run `migrate --database audit` once after setting it.
+if os.environ.get("AUDIT_DB_NAME"):
+    DATABASES['audit'] = {**DATABASES['default'], 'NAME': os.environ["AUDIT_DB_NAME"], 'TEST': {}}
+    AUDIT_LOG_DATABASE = 'audit'
+else:
+    AUDIT_LOG_DATABASE = 'default'
+AUDIT_LOG_BUFFER_SIZE = 50
+AUDIT_LOG_FLUSH_INTERVAL = 5.0  # seconds
+
+# Read replica for list pages, dashboards and exports (procurement.routers).
+# DB_REPLICA_NAME (plus DB_REPLICA_HOST for PostgreSQL) names the copy: a
+# standby server, or for SQLite a second file kept fresh by
+# `manage.py sync_sqlite_replica`. After a write the browser is pinned to the
+# primary for REPLICA_STICKY_SECONDS so users see their own changes.
+if os.environ.get("DB_REPLICA_NAME"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ["DB_REPLICA_NAME"],
+        'HOST': os.environ.get("DB_REPLICA_HOST", DATABASES['default'].get('HOST', '')),
+        'TEST': {'MIRROR': 'default'},
     }
+    REPLICA_DATABASE = 'replica'
+else:
+    REPLICA_DATABASE = None
+REPLICA_STICKY_SECONDS = env_int("REPLICA_STICKY_SECONDS", 30)
+
+DATABASE_ROUTERS = [
+    'procurement.routers.AuditLogRouter',
+    'procurement.routers.PrimaryReplicaRouter',
+]
+
+# Applied to every new SQLite connection (procurement.utils.db). WAL lets
+# readers run alongside a writer; set SQLITE_TUNING=0 for the stock settings.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative = KiB, i.e. 64 MB
+    'temp_store': 'MEMORY',
+} if env_bool("SQLITE_TUNING", True) else {}
+
+# Bounded retry for award / consolidation / bid-entry writes that still hit
+# "database is locked" (procurement.utils.db.retry_on_locked).
+DB_WRITE_RETRY_ATTEMPTS = env_int("DB_WRITE_RETRY_ATTEMPTS", 3)
+DB_WRITE_RETRY_DELAY = 0.05
+
+# Opt-in sampling profiler (procurement.utils.profiling). Requests whose URL
+# name is in PROFILE_URL_NAMES, made by a user in PROFILE_USERS, or picked at
+# PROFILE_SAMPLE_RATE (0.0-1.0) are sampled; stacks land in PROFILING['DIR'].
+PROFILING = {
+    'ENABLED': env_bool("PROFILING", False),
+    'URL_NAMES': [n for n in os.environ.get("PROFILE_URL_NAMES", "").split(",") if n],
+    'USERS': [u for u in os.environ.get("PROFILE_USERS", "").split(",") if u],
+    'SAMPLE_RATE': float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+    'INTERVAL': 0.005,  # seconds between samples
+    'DIR': os.environ.get("PROFILE_DIR", BASE_DIR / 'profiles'),
+}
+
+# N+1 detector (procurement.utils.nplusone): logs any statement shape a request
+# repeats THRESHOLD+ times, with the template line or frame that issued it.
+N_PLUS_ONE = {
+    'ENABLED': env_bool("N_PLUS_ONE", DEBUG),
+    'THRESHOLD': env_int("N_PLUS_ONE_THRESHOLD", 5),
+    'REPORT_SIZE': 20,  # worst offenders kept per view
+}
+
+# Prometheus metrics at /metrics (procurement.utils.metrics). With several
+# worker processes set METRICS_DIR to a directory shared by them (emptied on
+# each deploy) so the endpoint reports totals for all workers. METRICS_TOKEN,
+# if set, must be sent as "Authorization: Bearer <token>"; without it the
+# endpoint is open only with DEBUG on, and otherwise needs a staff login.
+METRICS = {
+    'ENABLED': env_bool("METRICS", True),
+    'DIR': os.environ.get("METRICS_DIR"),
+    'DUMP_INTERVAL': 1.0,  # seconds between per-process snapshots
+    'TOKEN': os.environ.get("METRICS_TOKEN"),
+}
+
+# Workflow tracing (procurement.utils.tracing). TRACING_EXPORTER=jsonl writes
+# spans to TRACING_FILE (view with `manage.py show_trace`); =otlp POSTs them to
+# TRACING_OTLP_ENDPOINT (`manage.py trace_collector` is a local stand-in).
+TRACING = {
+    'EXPORTER': os.environ.get("TRACING_EXPORTER", ""),
+    'FILE': os.environ.get("TRACING_FILE", BASE_DIR / 'traces.jsonl'),
+    'OTLP_ENDPOINT': os.environ.get("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+    'SERVICE_NAME': 'evsu-procurement',
+}
+
+# Batch printing (procurement.utils.batch_print). HTML is converted to PDF in
+# a pool of PRINT_WORKERS processes (0 = one per CPU core).
+BATCH_PRINT = {
+    'WORKERS': env_int("PRINT_WORKERS", 0),
+    'MAX_DOCUMENTS': env_int("PRINT_MAX_DOCUMENTS", 200),
+}
+
+# Read-only JSON API (procurement.utils.api): rows per page when the request
+# gives no ?limit, and the largest ?limit accepted.
+API = {
+    'PAGE_SIZE': env_int("API_PAGE_SIZE", 50),
+    'MAX_PAGE_SIZE': env_int("API_MAX_PAGE_SIZE", 500),
+}
+
+# Changefeed (procurement.utils.changelog): log rows read per request. On
+# PostgreSQL a change becomes visible at commit, possibly after a newer one,
+# so the feed stays SETTLE_SECONDS behind; keep it above the longest write
+# transaction. Prune the log with `manage.py prune_changelog`.
+CHANGEFEED = {
+    'PAGE_SIZE': env_int("CHANGEFEED_PAGE_SIZE", 500),
+    'MAX_PAGE_SIZE': 5000,
+    'SETTLE_SECONDS': env_int("CHANGEFEED_SETTLE_SECONDS", 2 if DB_ENGINE in ("postgres", "postgresql") else 0),
 }
 
+# Live updates (procurement.utils.live). Each ASGI worker reads new live
+# events from the outbox every POLL_INTERVAL seconds - at once for events it
+# committed itself - and pushes them to its open /events/ streams; HEARTBEAT
+# (seconds) keeps idle streams open through proxies. A reconnecting stream
+# replays what it missed REPLAY_LIMIT events per query. Like CHANGEFEED, events
+# are pushed SETTLE_SECONDS late on PostgreSQL, where they may commit out of
+# id order. Old events go with `manage.py dispatch_outbox --purge DAYS`.
+LIVE_EVENTS = {
+    'POLL_INTERVAL': float(os.environ.get("LIVE_POLL_INTERVAL", "2")),
+    'HEARTBEAT': 15,
+    'REPLAY_LIMIT': 200,
+    'QUEUE_SIZE': 1000,
+    'SETTLE_SECONDS': env_int("LIVE_SETTLE_SECONDS", 2 if DB_ENGINE in ("postgres", "postgresql") else 0),
+}
+
+# PR, RFQ, AOQ and PO numbers restart every fiscal year
+# (procurement.models.DocumentSequence). The government fiscal year is the
+# calendar year; a fiscal year is named after the year it starts in.
+FISCAL_YEAR_START_MONTH = 1
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import redirect
 from django.contrib.auth import views as auth_views
+from procurement.views import metrics_endpoint
 
 # ✅ Smart redirect function for root URL
 def root_redirect(request):
@@ -37,6 +38,9 @@ urlpatterns = [
     path("accounts/login/", auth_views.LoginView.as_view(), name="login"),
     path("accounts/logout/", auth_views.LogoutView.as_view(next_page="login"), name="logout"),
 
+    # Prometheus scrape target
+    path("metrics", metrics_endpoint, name="metrics"),
+
     # Procurement app URLs (namespace must match your app_name in procurement/urls.py)
     path("procurement/", include(("procurement.urls", "procurement"), namespace="procurement")),
 ]
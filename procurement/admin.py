@@ -1,17 +1,24 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Q
 from .models import (
     Supplier,
     PurchaseRequest,
     PRItem,
     RequestForQuotation,
+    RFQItem,
     AgencyProcurementRequest,
     AbstractOfQuotation,
     AOQLine,
     PurchaseOrder,
+    POLine,
+    DocumentSequence,
+    OutboxEvent,
     Signatory,
     Bid,
     BidLine,
-    RFQConsolidationLog
+    RFQConsolidationLog,
+    PRStatusHistory,
 )
 
 
@@ -41,12 +48,15 @@ class PurchaseRequestAdmin(admin.ModelAdmin):
     inlines = [PRItemInline]
     actions = ["assign_pr_numbers"]
 
+    @transaction.atomic
     def assign_pr_numbers(self, request, queryset):
-        for pr in queryset:
-            if not pr.pr_number:
-                pr.pr_number = f"PR-{pr.created_at.strftime('%Y%m%d')}-{pr.id or '0'}"
-                pr.save()
-        self.message_user(request, "PR numbers assigned where missing.")
+        missing = list(queryset.filter(
+            Q(pr_number__isnull=True) | Q(pr_number="") | Q(pr_number__iexact="Unassigned")
+        ).order_by("created_at", "pk"))
+        for pr, number in zip(missing, DocumentSequence.take("pr", len(missing))):
+            pr.pr_number = DocumentSequence.format("pr", number, office=pr.number_office())
+        PurchaseRequest.objects.bulk_update(missing, ["pr_number"])
+        self.message_user(request, f"PR numbers assigned to {len(missing)} PR(s).")
 
     assign_pr_numbers.short_description = "Assign PR numbers for selected PRs"
 
@@ -72,10 +82,26 @@ class RFQBidInline(admin.TabularInline):
     model = Bid
     extra = 0
 
+class RFQItemInline(admin.TabularInline):
+    model = RFQItem
+    extra = 0
+    fields = ("position", "stock_no", "description", "quantity", "unit", "unit_cost")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(RequestForQuotation)
 class RFQAdmin(admin.ModelAdmin):
     list_display = ("rfq_number", "get_linked_prs", "created_by", "date")
     search_fields = ("rfq_number", "purchase_request__pr_number", "consolidated_prs__pr_number")
+    inlines = [RFQItemInline]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # RFQs created here get their items frozen like those made from a PR
+        form.instance.snapshot_items()
 
     def get_linked_prs(self, obj):
         linked = []
@@ -97,10 +123,26 @@ class AOQAdmin(admin.ModelAdmin):
     search_fields = ("aoq_number", "rfq__rfq_number", "awarded_to__name")
     readonly_fields = ("awarded_at","awarded_by")
 
+class POLineInline(admin.TabularInline):
+    model = POLine
+    extra = 0
+
 @admin.register(PurchaseOrder)
 class POAdmin(admin.ModelAdmin):
     list_display = ("po_number", "supplier", "created_at", "submission_date")
     search_fields = ("po_number","supplier__name")
+    inlines = [POLineInline]
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ("document_type", "fiscal_year", "last_value")
+    list_filter = ("document_type",)
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("topic", "key", "created_at", "processed_at", "attempts")
+    list_filter = ("topic", ("processed_at", admin.EmptyFieldListFilter))
+    readonly_fields = ("topic", "key", "payload", "created_at", "processed_at", "attempts", "error")
 
 @admin.register(RFQConsolidationLog)
 class RFQConsolidationLogAdmin(admin.ModelAdmin):
@@ -113,3 +155,16 @@ class RFQConsolidationLogAdmin(admin.ModelAdmin):
     get_prs.short_description = "Consolidated PRs"
 
 
+@admin.register(PRStatusHistory)
+class PRStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ("purchase_request", "from_status", "to_status", "actor", "changed_at", "duration")
+    list_filter = ("to_status", "office_section", "mode_of_procurement")
+    search_fields = ("purchase_request__pr_number",)
+    date_hierarchy = "changed_at"
+
+    # append-only
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
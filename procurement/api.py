@@ -0,0 +1,248 @@
+"""
+Read-only JSON API for reporting scripts (see procurement.utils.api).
+
+Each endpoint is its HTML list view plus ApiListMixin, so it takes the same
+filters (?status, ?supplier, ?date_from, ?date_to; ?assigned, ?office and
+?pr_number for PRs) and shows the same rows to the same users.
+
+/api/changes/ is the changefeed: what was created, changed or deleted since a
+cursor, for clients that keep their own copy (see procurement.utils.changelog).
+"""
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import generic
+
+from procurement.models import (
+    AbstractOfQuotation, AOQLine, Bid, BidLine, POLine, PRItem, PurchaseOrder, PurchaseRequest,
+    RequestForQuotation, RFQItem, Supplier,
+)
+from procurement.routers import replica_reads
+from procurement.utils import changelog
+from procurement.utils.api import ApiError, ApiListMixin, Resource, _pick, dumps
+from procurement.views import AOQListView, ListFilterMixin, POListView, PRListView, RFQListView
+
+
+# -----------------------
+# Resources
+# -----------------------
+class SupplierResource(Resource):
+    model = Supplier
+    fields = ("id", "name", "address", "contact_person", "contact_no", "contact_email", "tin", "accredited")
+
+
+class PRItemResource(Resource):
+    model = PRItem
+    fields = ("id", "purchase_request_id", "stock_no", "description", "quantity", "unit", "unit_cost", "budget_category")
+
+
+class PurchaseRequestResource(Resource):
+    model = PurchaseRequest
+    fields = (
+        "id", "pr_number", "pr_date", "status", "mode_of_procurement", "negotiated_type",
+        "requisitioner", "designation", "office_section", "purpose", "funding",
+        "created_by_id", "created_at", "updated_at", "last_update",
+    )
+
+
+class RFQItemResource(Resource):
+    model = RFQItem
+    fields = (
+        "id", "position", "purchase_request_id", "pr_item_id", "stock_no", "description",
+        "quantity", "unit", "unit_cost",
+    )
+    ordering = ("position",)
+
+
+class RFQResource(Resource):
+    model = RequestForQuotation
+    fields = ("id", "rfq_number", "date", "purchase_request_id", "remarks", "resolution", "created_at", "updated_at")
+
+
+class BidLineResource(Resource):
+    model = BidLine
+    fields = ("id", "pr_item_id", "unit_price", "offer", "compliant")
+
+
+class BidResource(Resource):
+    model = Bid
+    fields = ("id", "rfq_id", "supplier_id", "status", "remarks", "created_at", "updated_at")
+
+
+class AOQLineResource(Resource):
+    model = AOQLine
+    fields = ("id", "pr_item_id", "supplier_id", "unit_price", "responsive")
+
+
+class AOQResource(Resource):
+    model = AbstractOfQuotation
+    fields = (
+        "id", "aoq_number", "rfq_id", "verified", "awarded_to_id", "awarded_at",
+        "computed_summary", "created_at", "updated_at",
+    )
+
+
+class POLineResource(Resource):
+    model = POLine
+    fields = ("id", "position", "pr_item_id", "description", "quantity", "unit", "unit_price")
+    ordering = ("position",)
+
+
+class PurchaseOrderResource(Resource):
+    model = PurchaseOrder
+    fields = (
+        "id", "po_number", "aoq_id", "supplier_id", "place_of_delivery", "date_of_delivery",
+        "submission_date", "receiving_office", "created_at", "updated_at",
+    )
+
+
+# -----------------------
+# Endpoints
+# -----------------------
+class PRListAPI(ApiListMixin, PRListView):
+    resource = PurchaseRequestResource
+    includes = {
+        "items": ("items", PRItemResource),
+        "rfq": ("rfq", RFQResource),
+    }
+
+
+class RFQListAPI(ApiListMixin, RFQListView):
+    resource = RFQResource
+    extra_fields = ("bid_count",)
+    cursor_ordering = ("-pk",)
+    includes = {
+        "items": ("items", RFQItemResource),
+        "prs": ("consolidated_prs", PurchaseRequestResource),
+        "bids": ("bids", BidResource),
+        "aoq": ("aoq", AOQResource),
+    }
+
+
+@method_decorator(replica_reads, name="dispatch")
+class BidListAPI(ApiListMixin, LoginRequiredMixin, ListFilterMixin, generic.ListView):
+    """Bids have no HTML list; same filters as the others, plus ?rfq=<id>."""
+    model = Bid
+    resource = BidResource
+    date_field = "created_at__date"
+    supplier_filter = "supplier_id"
+    status_filters = {value: (label, Q(status=value)) for value, label in Bid.STATUS_CHOICES}
+    includes = {
+        "lines": ("lines", BidLineResource),
+        "supplier": ("supplier", SupplierResource),
+        "rfq": ("rfq", RFQResource),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        rfq = self.request.GET.get("rfq", "")
+        return queryset.filter(rfq_id=int(rfq)) if rfq.isdigit() else queryset
+
+
+class AOQListAPI(ApiListMixin, AOQListView):
+    resource = AOQResource
+    includes = {
+        "lines": ("lines", AOQLineResource),
+        "rfq": ("rfq", RFQResource),
+        "awarded_to": ("awarded_to", SupplierResource),
+        "pos": ("purchase_orders", PurchaseOrderResource),
+    }
+
+
+class POListAPI(ApiListMixin, POListView):
+    resource = PurchaseOrderResource
+    includes = {
+        "lines": ("lines", POLineResource),
+        "supplier": ("supplier", SupplierResource),
+        "aoq": ("aoq", AOQResource),
+    }
+
+
+# -----------------------
+# Changefeed
+# -----------------------
+CHANGE_RESOURCES = {
+    "pr": PurchaseRequestResource,
+    "pr_item": PRItemResource,
+    "rfq": RFQResource,
+    "bid": BidResource,
+    "aoq": AOQResource,
+    "po": PurchaseOrderResource,
+}
+
+
+class ChangeFeedAPI(LoginRequiredMixin, generic.View):
+    """
+    Changes after ?cursor=<id>, oldest first, each object once with its
+    current fields or as deleted:
+
+        {"cursor": 1107, "more": false, "changes": [
+            {"model": "pr", "id": 7, "op": "upsert", "data": {...}},
+            {"model": "pr_item", "id": 31, "op": "delete"}]}
+
+    Without a cursor the answer is the newest cursor and no changes. ?models=
+    limits the feed to some of the changelog.TRACKED names. The feed is not
+    filtered per user, so it is for Procurement and Admin only.
+    """
+
+    def handle_no_permission(self):
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        if not (user.is_superuser or user.groups.filter(name__in=("Procurement", "Admin")).exists()):
+            return JsonResponse({"error": "Not allowed."}, status=403)
+        try:
+            cursor, limit, models = self.get_params()
+        except ApiError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        if cursor is None:
+            body = {"cursor": changelog.head(), "more": False, "changes": []}
+        else:
+            oldest = changelog.oldest()
+            if oldest is not None and cursor < oldest - 1:
+                return JsonResponse({"error": "Cursor is older than the change log; download the lists again."},
+                                    status=410)
+            changes, cursor, more = changelog.read(cursor, limit, models)
+            body = {"cursor": cursor, "more": more, "changes": self.deltas(changes)}
+        return HttpResponse(dumps(body), content_type="application/json")
+
+    def get_params(self):
+        params = self.request.GET
+        cursor = params.get("cursor")
+        if cursor is not None and not cursor.isdigit():
+            raise ApiError("Invalid cursor.")
+        config = changelog.changefeed_settings()
+        try:
+            limit = int(params.get("limit", config["PAGE_SIZE"]))
+        except ValueError:
+            raise ApiError("limit must be a number.")
+        if not 1 <= limit <= config["MAX_PAGE_SIZE"]:
+            raise ApiError(f"limit must be between 1 and {config['MAX_PAGE_SIZE']}.")
+        models = _pick(params["models"], changelog.TRACKED, "model") if "models" in params else None
+        return None if cursor is None else int(cursor), limit, models
+
+    def deltas(self, changes):
+        # one query per model for the objects that still exist
+        upserted = {}
+        for name, object_id, action in changes:
+            if action != "d":
+                upserted.setdefault(name, []).append(object_id)
+        objects = {}
+        for name, ids in upserted.items():
+            resource = CHANGE_RESOURCES[name]
+            objects[name] = resource.model.objects.only(*resource.columns(resource.fields)).in_bulk(ids)
+
+        deltas = []
+        for name, object_id, action in changes:
+            if action == "d":
+                deltas.append({"model": name, "id": object_id, "op": "delete"})
+            elif object_id in objects[name]:  # otherwise deleted since; a later page has the delete
+                resource = CHANGE_RESOURCES[name]
+                deltas.append({
+                    "model": name, "id": object_id, "op": "upsert",
+                    "data": resource.serialize(objects[name][object_id], resource.fields),
+                })
+        return deltas
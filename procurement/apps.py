@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProcurementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'procurement'
+
+    def ready(self):
+        # connect the SQLite tuning, metrics and change log trigger receivers
+        from .utils import changelog, db, metrics  # noqa: F401
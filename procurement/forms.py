@@ -70,6 +70,32 @@ class ProcurementStaffPRForm(forms.ModelForm):
         }
 
 
+# -------------------------
+# SHARED OPTION LISTS
+# -------------------------
+class SharedOptionsSelect(forms.Select):
+    """
+    A <select> that renders only its selected option. The full list is
+    emitted once per page with {% shared_options_template %} and copied in by
+    shared_options.js when the select is first used, so a long list (units,
+    modes of procurement) costs a few bytes per row instead of kilobytes.
+    """
+
+    def __init__(self, group, attrs=None, choices=()):
+        super().__init__({**(attrs or {}), "data-options": group}, choices)
+        self.group = group
+
+    def optgroups(self, name, value, attrs=None):
+        groups = super().optgroups(name, value, attrs)
+        selected = [
+            (group_name, [option for option in options if option["selected"]], index)
+            for group_name, options, index in groups
+        ]
+        selected = [group for group in selected if group[1]]
+        # nothing chosen yet: keep the first (usually blank) option as the placeholder
+        return selected or groups[:1]
+
+
 # -------------------------
 # PR ITEM FORM
 # -------------------------
@@ -88,7 +114,7 @@ class PRItemForm(forms.ModelForm):
                 "class": "form-control form-control-sm",
                 "style": "width:90px;"
             }),
-            "unit": forms.Select(attrs={
+            "unit": SharedOptionsSelect("unit", attrs={
                 "class": "form-select form-select-sm",
                 "style": "width:110px;"
             }),
@@ -107,7 +133,7 @@ class AssignPRNumberForm(forms.ModelForm):
         model = PurchaseRequest
         fields = ['pr_number', 'pr_date']
         widgets = {
-            'pr_number': forms.TextInput(attrs={'class': 'form-control'}),
+            'pr_number': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Leave blank for the next number'}),
             'pr_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
         }
 
@@ -201,18 +227,11 @@ class BidLineForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields["unit_price"].required = False
 
-        # ✅ Handle both single-PR and consolidated RFQs
+        # ✅ Only items quoted on the RFQ (single-PR or consolidated)
         if self.instance and getattr(self.instance, "bid", None):
-            rfq = getattr(self.instance.bid, "rfq", None)
-            if rfq:
-                if rfq.consolidated_prs.exists():
-                    self.fields["pr_item"].queryset = PRItem.objects.filter(
-                        purchase_request__in=rfq.consolidated_prs.all()
-                    )
-                elif rfq.purchase_request:
-                    self.fields["pr_item"].queryset = PRItem.objects.filter(
-                        purchase_request=rfq.purchase_request
-                    )
+            rfq_id = self.instance.bid.rfq_id
+            if rfq_id:
+                self.fields["pr_item"].queryset = PRItem.objects.filter(rfq_items__rfq_id=rfq_id)
 
 
 
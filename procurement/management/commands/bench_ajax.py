@@ -0,0 +1,248 @@
+"""
+Load benchmark for the AJAX endpoints under uvicorn (ASGI) and gunicorn
+(WSGI, sync workers).
+
+Both servers run this project against the same scratch SQLite database
+(migrated and seeded here, removed afterwards). --concurrency clients each
+loop over the status, mode and signatory endpoints for --seconds per server,
+one connection per request, and the command reports requests per second and
+p50/p99 latency. Requests made during the first --warmup seconds are not
+counted.
+
+    python manage.py bench_ajax --concurrency 64 --seconds 10 --workers 2
+    python manage.py bench_ajax --servers uvicorn
+
+Needs uvicorn and gunicorn installed (pip install uvicorn gunicorn); the
+benchmark only reports servers it could start.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.models import Group
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+
+from procurement.models import PurchaseRequest, Signatory
+
+SERVERS = {
+    "uvicorn": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "evsu_procurement_system.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--no-access-log", "--log-level", "warning",
+    ],
+    "gunicorn": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "evsu_procurement_system.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--worker-class", "sync",
+        "--log-level", "warning",
+    ],
+}
+
+# settings that would point the servers at databases other than the scratch one
+DATABASE_ENV = ("DB_ENGINE", "DB_NAME", "AUDIT_DB_NAME", "DB_REPLICA_NAME")
+
+
+class Command(BaseCommand):
+    help = "Compare AJAX endpoint throughput and p99 latency under uvicorn and gunicorn sync workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument("--workers", type=int, default=2, help="Worker processes per server.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients.")
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--warmup", type=float, default=2.0)
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("bench_ajax runs on a scratch SQLite database; run it with DB_ENGINE=sqlite.")
+        missing = [name for name in opts["servers"] if importlib.util.find_spec(name) is None]
+        for name in missing:
+            self.stderr.write(f"{name} is not installed; skipping it (pip install {name})")
+        servers = [name for name in opts["servers"] if name not in missing]
+        if not servers:
+            raise CommandError("None of the requested servers is installed.")
+
+        workdir = tempfile.mkdtemp(prefix="bench_ajax_")
+        try:
+            path = os.path.join(workdir, "bench.sqlite3")
+            fixture = self._seed(path, opts["concurrency"])
+            env = {key: value for key, value in os.environ.items() if key not in DATABASE_ENV}
+            env.update(DB_ENGINE="sqlite", DB_NAME=path, N_PLUS_ONE="0", PROFILING="0", TRACING_EXPORTER="")
+
+            self.stdout.write(
+                f"{opts['concurrency']} clients, {opts['workers']} worker(s) per server, "
+                f"{opts['seconds']}s per server\n"
+            )
+            self.stdout.write(f"{'server':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+            for name in servers:
+                result = self._run(name, env, fixture, opts)
+                self.stdout.write(
+                    f"{name:<10}"
+                    f"{result['requests']:>10}"
+                    f"{result['requests'] / opts['seconds']:>10.1f}"
+                    f"{result['p50'] * 1000:>10.1f}"
+                    f"{result['p99'] * 1000:>10.1f}"
+                    f"{result['errors']:>8}"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # -----------------------
+    # Scratch database
+    # -----------------------
+    def _seed(self, path, clients):
+        """Migrate and seed ``path``; returns what the clients need to make requests."""
+        connection = connections["default"]
+        original = connection.settings_dict["NAME"]
+        connection.close()
+        connection.settings_dict["NAME"] = path
+        try:
+            call_command("migrate", verbosity=0, interactive=False)
+            user = get_user_model().objects.create_user("bench", password=secrets.token_hex(8))
+            user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+            prs = PurchaseRequest.objects.bulk_create([
+                PurchaseRequest(mode_of_procurement="Small Value Procurement", created_by=user)
+                for _ in range(clients)
+            ])
+            signatories = Signatory.objects.bulk_create([
+                Signatory(name=f"Signatory {i}", designation="BAC Member") for i in range(clients)
+            ])
+
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            return {
+                "session": session.session_key,
+                "csrf": secrets.token_hex(16),
+                "prs": [pr.pk for pr in prs],
+                "signatories": [signatory.pk for signatory in signatories],
+            }
+        finally:
+            connection.close()
+            connection.settings_dict["NAME"] = original
+
+    # -----------------------
+    # Servers
+    # -----------------------
+    def _run(self, name, env, fixture, opts):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(SERVERS[name](port, opts["workers"]), cwd=settings.BASE_DIR, env=env)
+        try:
+            self._wait_for(server, port, name)
+            return asyncio.run(self._load(port, fixture, opts))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def _wait_for(self, server, port, name, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{name} exited with status {server.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"{name} did not start listening on port {port} within {timeout}s")
+
+    # -----------------------
+    # Load
+    # -----------------------
+    async def _load(self, port, fixture, opts):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        measure_from = start + opts["warmup"]
+        stop = measure_from + opts["seconds"]
+        latencies, errors = [], [0]
+        headers = {
+            "Cookie": f"{settings.SESSION_COOKIE_NAME}={fixture['session']}; "
+                      f"{settings.CSRF_COOKIE_NAME}={fixture['csrf']}",
+            "X-CSRFToken": fixture["csrf"],
+            "Content-Type": "application/json",
+        }
+
+        async def client(i):
+            pr = fixture["prs"][i]
+            signatory = fixture["signatories"][i]
+            steps = [
+                lambda n: (reverse("procurement:update_pr_status", args=[pr]),
+                           {"status": "for_rfq" if n % 2 else "for_award"}),
+                lambda n: (reverse("procurement:update_mode_ajax", args=[pr]),
+                           {"mode_of_procurement": "Small Value Procurement"}),
+                lambda n: (reverse("procurement:signatory_edit_ajax", args=[signatory]),
+                           {"name": f"Signatory {i}", "designation": f"BAC Member {n}"}),
+                lambda n: (reverse("procurement:signatory_add_ajax"),
+                           {"name": f"Alternate {i}-{n}", "designation": "BAC Member"}),
+            ]
+            for n in count():
+                began = loop.time()
+                if began >= stop:
+                    return
+                path, data = steps[n % len(steps)](n)
+                status, body = await _post(port, path, data, headers)
+                if began >= measure_from and loop.time() <= stop:
+                    latencies.append(loop.time() - began)
+                    if status != 200:
+                        errors[0] += 1
+                # keep the signatory table from growing: delete what was just added
+                if status == 200 and n % len(steps) == 3:
+                    added = json.loads(body)["id"]
+                    await _post(port, reverse("procurement:signatory_delete_ajax", args=[added]), {}, headers)
+
+        await asyncio.gather(*(client(i) for i in range(opts["concurrency"])))
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors[0],
+            "p50": _percentile(latencies, 0.50),
+            "p99": _percentile(latencies, 0.99),
+        }
+
+
+async def _post(port, path, data, headers):
+    """One POST over a fresh connection; returns (status code, body bytes)."""
+    body = json.dumps(data).encode()
+    head = [f"POST {path} HTTP/1.1", f"Host: 127.0.0.1:{port}", "Connection: close",
+            f"Content-Length: {len(body)}"]
+    head += [f"{key}: {value}" for key, value in headers.items()]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    except OSError:
+        return 0, b""
+    finally:
+        writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    _, _, payload = rest.partition(b"\r\n\r\n")
+    parts = status_line.split(b" ", 2)
+    return (int(parts[1]) if len(parts) > 1 else 0), payload
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
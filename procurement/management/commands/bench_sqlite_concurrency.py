@@ -0,0 +1,152 @@
+"""
+Concurrency benchmark for the SQLite tuning in procurement.utils.db.
+
+Runs the same mixed workload twice against a scratch database file:
+once with SQLite's stock settings (rollback journal, deferred transactions)
+and once with settings.SQLITE_PRAGMAS plus BEGIN IMMEDIATE, and reports
+read throughput and the share of write transactions that failed with
+"database is locked".
+
+    python manage.py bench_sqlite_concurrency --readers 8 --writers 4 --seconds 5
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from procurement.utils.db import apply_sqlite_pragmas, is_locked_error
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite read throughput and write-lock failures before/after tuning."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--rows", type=int, default=2000, help="Rows seeded before the run.")
+        parser.add_argument(
+            "--timeout", type=float, default=1.0,
+            help="Busy timeout in seconds for the stock configuration (sqlite3 default is 5).",
+        )
+
+    def handle(self, *args, **opts):
+        tuned_pragmas = getattr(settings, "SQLITE_PRAGMAS", None) or DEFAULT_PRAGMAS
+        scenarios = [
+            ("stock", {"journal_mode": "DELETE", "synchronous": "FULL"}, "DEFERRED", opts["timeout"]),
+            ("tuned", tuned_pragmas, "IMMEDIATE", tuned_pragmas.get("busy_timeout", 5000) / 1000),
+        ]
+
+        self.stdout.write(
+            f"{opts['readers']} readers, {opts['writers']} writers, {opts['seconds']}s per scenario\n"
+        )
+        self.stdout.write(f"{'mode':<8}{'reads/s':>12}{'writes/s':>12}{'write failures':>18}")
+        for name, pragmas, begin, timeout in scenarios:
+            result = self._run(pragmas, begin, timeout, opts)
+            attempts = result["writes"] + result["write_failures"]
+            failure_rate = (result["write_failures"] / attempts * 100) if attempts else 0
+            self.stdout.write(
+                f"{name:<8}"
+                f"{result['reads'] / opts['seconds']:>12.1f}"
+                f"{result['writes'] / opts['seconds']:>12.1f}"
+                f"{result['write_failures']:>10} ({failure_rate:4.1f}%)"
+            )
+
+    def _run(self, pragmas, begin, timeout, opts):
+        fd, path = tempfile.mkstemp(suffix=".sqlite3", prefix="bench_")
+        os.close(fd)
+        try:
+            self._seed(path, pragmas, opts["rows"])
+            counters = {"reads": 0, "writes": 0, "write_failures": 0}
+            lock = threading.Lock()
+            stop = threading.Event()
+
+            def connect():
+                conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+                apply_sqlite_pragmas(conn.cursor(), pragmas)
+                return conn
+
+            def reader():
+                conn = connect()
+                done = 0
+                while not stop.is_set():
+                    try:
+                        conn.execute("BEGIN")
+                        conn.execute(
+                            "SELECT status, COUNT(*), SUM(amount) FROM bench_pr GROUP BY status"
+                        ).fetchall()
+                        conn.execute("COMMIT")
+                        done += 1
+                    except sqlite3.OperationalError:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                conn.close()
+                with lock:
+                    counters["reads"] += done
+
+            def writer(seed):
+                conn = connect()
+                done = failed = 0
+                n = seed
+                while not stop.is_set():
+                    n += 1
+                    try:
+                        conn.execute(f"BEGIN {begin}")
+                        row = conn.execute(
+                            "SELECT id FROM bench_pr WHERE id = ?", (n % opts["rows"] + 1,)
+                        ).fetchone()
+                        conn.execute("UPDATE bench_pr SET status = 'po_issued' WHERE id = ?", (row[0],))
+                        conn.execute("INSERT INTO bench_pr (status, amount) VALUES ('draft', ?)", (n,))
+                        conn.execute("COMMIT")
+                        done += 1
+                    except sqlite3.OperationalError as exc:
+                        if conn.in_transaction:
+                            conn.execute("ROLLBACK")
+                        if not is_locked_error(exc):
+                            raise
+                        failed += 1
+                conn.close()
+                with lock:
+                    counters["writes"] += done
+                    counters["write_failures"] += failed
+
+            threads = [threading.Thread(target=reader) for _ in range(opts["readers"])]
+            threads += [threading.Thread(target=writer, args=(i * 1000,)) for i in range(opts["writers"])]
+            for t in threads:
+                t.start()
+            time.sleep(opts["seconds"])
+            stop.set()
+            for t in threads:
+                t.join()
+            return counters
+        finally:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def _seed(self, path, pragmas, rows):
+        conn = sqlite3.connect(path, isolation_level=None)
+        apply_sqlite_pragmas(conn.cursor(), pragmas)
+        conn.execute(
+            "CREATE TABLE bench_pr (id INTEGER PRIMARY KEY, status TEXT NOT NULL, amount INTEGER NOT NULL)"
+        )
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO bench_pr (status, amount) VALUES (?, ?)",
+            (("draft" if i % 3 else "approved", i) for i in range(rows)),
+        )
+        conn.execute("COMMIT")
+        conn.close()
@@ -0,0 +1,38 @@
+"""
+Apply pending outbox events.
+
+    python manage.py dispatch_outbox          # every pending event, oldest first
+    python manage.py dispatch_outbox --purge 30   # also delete events processed 30+ days ago
+
+Events are normally applied right after the transaction that published them
+commits; this picks up the ones whose handler failed or never ran (e.g. the
+process died in between).
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from procurement.models import OutboxEvent
+from procurement.utils.outbox import dispatch
+
+
+class Command(BaseCommand):
+    help = "Apply pending OutboxEvents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--purge", type=int, metavar="DAYS",
+                            help="Delete events processed at least this many days ago.")
+
+    def handle(self, *args, **opts):
+        pending = list(OutboxEvent.objects.filter(processed_at=None).order_by("pk").values_list("pk", flat=True))
+        processed = 0
+        for start in range(0, len(pending), opts["batch_size"]):
+            processed += dispatch(ids=pending[start:start + opts["batch_size"]])
+        self.stdout.write(f"Processed {processed} of {len(pending)} pending event(s)")
+
+        if opts["purge"]:
+            cutoff = timezone.now() - timedelta(days=opts["purge"])
+            purged, _ = OutboxEvent.objects.filter(processed_at__lte=cutoff).delete()
+            self.stdout.write(f"Purged {purged} processed event(s)")
@@ -0,0 +1,29 @@
+"""
+Delete old change log rows.
+
+    python manage.py prune_changelog            # older than 30 days
+    python manage.py prune_changelog --days 7
+
+A changefeed client whose cursor is older than what is left gets 410 Gone and
+downloads the lists again. The newest row is always kept, so the log never
+empties and a current cursor stays valid.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from procurement.models import ChangeLog
+from procurement.utils import changelog
+
+
+class Command(BaseCommand):
+    help = "Delete ChangeLog rows older than --days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days=opts["days"])
+        pruned, _ = ChangeLog.objects.filter(changed_at__lt=cutoff, pk__lt=changelog.head()).delete()
+        self.stdout.write(f"Pruned {pruned} change(s)")
@@ -0,0 +1,46 @@
+"""
+Precompute monthly stage dwell-time rollups from PRStatusHistory.
+
+    python manage.py rollup_stage_dwell               # closed months not rolled up yet
+    python manage.py rollup_stage_dwell --month 2025-10
+    python manage.py rollup_stage_dwell --rebuild     # every closed month again
+
+Meant to run from cron shortly after the start of each month.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from procurement.models import PRStatusHistory, StageDwellRollup
+from procurement.utils.stage_analytics import month_range, month_start, rollup_month
+
+
+class Command(BaseCommand):
+    help = "Build StageDwellRollup rows for closed months."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Roll up a single month (YYYY-MM).")
+        parser.add_argument("--rebuild", action="store_true", help="Recompute months that already have rollups.")
+
+    def handle(self, *args, **opts):
+        if opts["month"]:
+            try:
+                year, month = map(int, opts["month"].split("-"))
+                months = [date(year, month, 1)]
+            except ValueError:
+                raise CommandError("--month must look like 2025-10")
+        else:
+            first = PRStatusHistory.objects.order_by("changed_at").values_list("changed_at", flat=True).first()
+            if first is None:
+                self.stdout.write("No status history yet.")
+                return
+            current = month_start(timezone.localdate())
+            months = [m for m in month_range(timezone.localtime(first).date(), current) if m < current]
+            if not opts["rebuild"]:
+                done = set(StageDwellRollup.objects.values_list("month", flat=True).distinct())
+                months = [m for m in months if m not in done]
+
+        for month in months:
+            count = rollup_month(month)
+            self.stdout.write(f"{month:%Y-%m}: {count} rollup row(s)")
@@ -0,0 +1,36 @@
+"""
+Run pending batch print jobs.
+
+    python manage.py run_print_jobs              # every pending job, oldest first
+    python manage.py run_print_jobs --stale 15   # also retry jobs "running" for 15+ minutes
+
+Jobs normally run on a background thread of the web process that created
+them; this picks up the ones that never finished (e.g. after a restart).
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from procurement.models import PrintJob
+from procurement.utils.batch_print import run_print_job
+
+
+class Command(BaseCommand):
+    help = "Render pending PrintJobs into PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stale", type=int, metavar="MINUTES",
+                            help="Requeue jobs that have been running for at least this long.")
+
+    def handle(self, *args, **opts):
+        if opts["stale"]:
+            cutoff = timezone.now() - timedelta(minutes=opts["stale"])
+            requeued = PrintJob.objects.filter(status="running", started_at__lte=cutoff).update(status="pending")
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        for job_id in PrintJob.objects.filter(status="pending").order_by("created_at").values_list("pk", flat=True):
+            if run_print_job(job_id):
+                job = PrintJob.objects.get(pk=job_id)
+                self.stdout.write(f"Job {job.pk}: {job.status} ({job.page_count} page(s)) {job.error}".rstrip())
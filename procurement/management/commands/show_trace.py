@@ -0,0 +1,72 @@
+"""
+Print a trace from the JSONL trace file as a waterfall.
+
+    python manage.py show_trace 4bf92f3577b34da6a3ce929d0e0e4736
+    python manage.py show_trace --latest
+
+Trace ids come from the X-Trace-Id response header (TracingMiddleware).
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.utils.tracing import load_trace, tracing_settings
+
+BAR_WIDTH = 40
+
+
+class Command(BaseCommand):
+    help = "Show one trace from the tracing JSONL file as an indented waterfall."
+
+    def add_arguments(self, parser):
+        parser.add_argument("trace_id", nargs="?", help="Trace id (32 hex characters).")
+        parser.add_argument("--latest", action="store_true", help="Show the most recently written trace.")
+        parser.add_argument("--file", help="Trace file (default: TRACING['FILE']).")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["file"] or tracing_settings()["FILE"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist; set TRACING_EXPORTER=jsonl and make some requests.")
+
+        trace_id = opts["trace_id"]
+        if opts["latest"]:
+            with open(path) as fh:
+                last = None
+                for last in fh:
+                    pass
+            if last is None:
+                raise CommandError(f"{path} is empty.")
+            trace_id = json.loads(last)["trace_id"]
+        if not trace_id:
+            raise CommandError("Give a trace id or --latest.")
+
+        spans = load_trace(path, trace_id)
+        if not spans:
+            raise CommandError(f"Trace {trace_id} not found in {path}.")
+
+        start = min(s["start_ns"] for s in spans)
+        total = max(max(s["end_ns"] for s in spans) - start, 1)
+        children = {}
+        for s in spans:
+            children.setdefault(s["parent_id"], []).append(s)
+        span_ids = {s["span_id"] for s in spans}
+        roots = [s for s in spans if s["parent_id"] not in span_ids]
+
+        self.stdout.write(f"Trace {trace_id}  ({total / 1e6:.1f} ms, {len(spans)} spans)")
+
+        def show(s, depth):
+            offset = int((s["start_ns"] - start) / total * BAR_WIDTH)
+            width = max(int((s["end_ns"] - s["start_ns"]) / total * BAR_WIDTH), 1)
+            bar = " " * offset + "█" * width
+            attrs = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+            label = f"{'  ' * depth}{s['name']}"
+            line = f"{label:<40} {bar:<{BAR_WIDTH}} {(s['end_ns'] - s['start_ns']) / 1e6:8.1f} ms  {attrs}"
+            if s["status"] == "error":
+                line += f"  ERROR {s['error']}"
+            self.stdout.write(line.rstrip())
+            for child in children.get(s["span_id"], []):
+                show(child, depth + 1)
+
+        for root in roots:
+            show(root, 0)
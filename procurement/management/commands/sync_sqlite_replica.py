@@ -0,0 +1,49 @@
+"""
+Copy the primary SQLite database onto the read replica file.
+
+Uses SQLite's online backup API, so the copy is a consistent snapshot even
+while the primary is being written to. Run once, or keep it running:
+
+    DB_REPLICA_NAME=replica.sqlite3 python manage.py sync_sqlite_replica --interval 5
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Refresh the SQLite read replica from the primary database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Repeat every N seconds instead of copying once.")
+
+    def handle(self, *args, **opts):
+        replica_alias = getattr(settings, "REPLICA_DATABASE", None)
+        if not replica_alias:
+            raise CommandError("No replica configured (set DB_REPLICA_NAME).")
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replica = settings.DATABASES[replica_alias]
+        if "sqlite3" not in primary["ENGINE"] or "sqlite3" not in replica["ENGINE"]:
+            raise CommandError("sync_sqlite_replica only copies SQLite databases; "
+                               "use streaming replication for PostgreSQL.")
+
+        while True:
+            started = time.monotonic()
+            self._copy(str(primary["NAME"]), str(replica["NAME"]))
+            self.stdout.write(f"Replica refreshed in {time.monotonic() - started:.2f}s")
+            if not opts["interval"]:
+                break
+            time.sleep(opts["interval"])
+
+    def _copy(self, source_path, target_path):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,60 @@
+"""
+Local stand-in for an OTLP collector.
+
+Accepts OTLP/JSON trace exports on /v1/traces and appends the spans to the
+JSONL trace file, so `show_trace` works with TRACING_EXPORTER=otlp too:
+
+    python manage.py trace_collector --port 4318
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from procurement.utils.tracing import from_otlp, tracing_settings
+
+
+class Command(BaseCommand):
+    help = "Run a minimal OTLP/HTTP JSON collector that writes spans to the JSONL trace file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=4318)
+        parser.add_argument("--file", help="Output file (default: TRACING['FILE']).")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["file"] or tracing_settings()["FILE"])
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/v1/traces":
+                    self.send_error(404)
+                    return
+                try:
+                    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    records = from_otlp(json.loads(body))
+                except (ValueError, KeyError) as exc:
+                    self.send_error(400, str(exc))
+                    return
+                with open(path, "a") as fh:
+                    fh.write("".join(json.dumps(r) + "\n" for r in records))
+                if records:
+                    stdout.write(f"{records[0]['trace_id']}: {len(records)} span(s)")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((opts["host"], opts["port"]), Handler)
+        self.stdout.write(f"Collecting OTLP traces on http://{opts['host']}:{opts['port']}/v1/traces into {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0035_remove_purchaserequest_attachment_prattachment'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestforquotation',
+            name='rfq_number',
+            field=models.CharField(blank=True, max_length=150, null=True, unique=True),
+        ),
+    ]
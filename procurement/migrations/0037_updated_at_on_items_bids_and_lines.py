@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0036_alter_requestforquotation_rfq_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aoqline',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='bid',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='bidline',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pritem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0037_updated_at_on_items_bids_and_lines'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageDwellRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('stage', models.CharField(max_length=30)),
+                ('office_section', models.CharField(blank=True, default='', max_length=255)),
+                ('mode_of_procurement', models.CharField(blank=True, default='', max_length=150)),
+                ('samples', models.PositiveIntegerField()),
+                ('p50_seconds', models.FloatField()),
+                ('p90_seconds', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['month', 'stage'],
+                'unique_together': {('month', 'stage', 'office_section', 'mode_of_procurement')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PRStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=30)),
+                ('to_status', models.CharField(max_length=30)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('office_section', models.CharField(blank=True, default='', max_length=255)),
+                ('mode_of_procurement', models.CharField(blank=True, default='', max_length=150)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('purchase_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='procurement.purchaserequest')),
+            ],
+            options={
+                'verbose_name_plural': 'PR status history',
+                'ordering': ['changed_at'],
+                'indexes': [models.Index(fields=['purchase_request', 'changed_at'], name='procurement_purchas_9adb2a_idx'), models.Index(fields=['changed_at'], name='procurement_changed_13e8ed_idx')],
+            },
+        ),
+    ]
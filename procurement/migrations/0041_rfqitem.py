@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_existing_rfqs(apps, schema_editor):
+    # Existing RFQs get their PRs' items as they are now: the closest record
+    # left of what was quoted on.
+    RequestForQuotation = apps.get_model("procurement", "RequestForQuotation")
+    PRItem = apps.get_model("procurement", "PRItem")
+    RFQItem = apps.get_model("procurement", "RFQItem")
+    for rfq in RequestForQuotation.objects.iterator():
+        pr_ids = set(rfq.consolidated_prs.values_list("pk", flat=True))
+        if rfq.purchase_request_id:
+            pr_ids.add(rfq.purchase_request_id)
+        pr_items = PRItem.objects.filter(purchase_request_id__in=pr_ids).order_by("purchase_request_id", "pk")
+        RFQItem.objects.bulk_create([
+            RFQItem(
+                rfq=rfq, pr_item=item, purchase_request_id=item.purchase_request_id, position=position,
+                stock_no=item.stock_no, description=item.description, quantity=item.quantity,
+                unit=item.unit, unit_cost=item.unit_cost,
+            )
+            for position, item in enumerate(pr_items, start=1)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0040_printjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RFQItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('stock_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('description', models.TextField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit', models.CharField(choices=[('amp', 'Ampere'), ('bag', 'Bag'), ('bar', 'Bar'), ('batch', 'Batch'), ('block', 'Block'), ('board', 'Board'), ('book', 'Book'), ('bottle', 'Bottle'), ('box', 'Box'), ('bundle', 'Bundle'), ('bunch', 'Bunch'), ('can', 'Can'), ('carton', 'Carton'), ('case', 'Case'), ('cm', 'Centimeter'), ('cuft', 'Cubic Foot'), ('cum', 'Cubic Meter'), ('cup', 'Cup'), ('day', 'Day'), ('dozen', 'Dozen'), ('drum', 'Drum'), ('each', 'Each'), ('envelope', 'Envelope'), ('ft', 'Foot'), ('gal', 'Gallon'), ('g', 'Gram'), ('hour', 'Hour'), ('in', 'Inch'), ('jar', 'Jar'), ('job', 'Job'), ('jug', 'Jug'), ('kg', 'Kilogram'), ('km', 'Kilometer'), ('length', 'Length'), ('liter', 'Liter'), ('lot', 'Lot'), ('m', 'Meter'), ('mg', 'Milligram'), ('ml', 'Milliliter'), ('mm', 'Millimeter'), ('month', 'Month'), ('pad', 'Pad'), ('pail', 'Pail'), ('pair', 'Pair'), ('pack', 'Pack'), ('packet', 'Packet'), ('panel', 'Panel'), ('pax', 'Pax'), ('pc', 'Piece'), ('plate', 'Plate'), ('pot', 'Pot'), ('pouch', 'Pouch'), ('quart', 'Quart'), ('ream', 'Ream'), ('roll', 'Roll'), ('sack', 'Sack'), ('sachet', 'Sachet'), ('set', 'Set'), ('sheet', 'Sheet'), ('sqft', 'Square Foot'), ('sqm', 'Square Meter'), ('stick', 'Stick'), ('strip', 'Strip'), ('tank', 'Tank'), ('tray', 'Tray'), ('tube', 'Tube'), ('unit', 'Unit'), ('volt', 'Volt'), ('watt', 'Watt'), ('yard', 'Yard'), ('year', 'Year'), ('others', 'Others (Specify)')], max_length=20)),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('pr_item', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rfq_items', to='procurement.pritem')),
+                ('purchase_request', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='procurement.purchaserequest')),
+                ('rfq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='procurement.requestforquotation')),
+            ],
+            options={
+                'ordering': ['rfq', 'position'],
+                'unique_together': {('rfq', 'position'), ('rfq', 'pr_item')},
+            },
+        ),
+        migrations.RunPython(snapshot_existing_rfqs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def lines_for_existing_pos(apps, schema_editor):
+    # POs issued before POLine existed: their supplier's responsive AOQ lines,
+    # at the quantities frozen on the RFQ.
+    PurchaseOrder = apps.get_model("procurement", "PurchaseOrder")
+    AOQLine = apps.get_model("procurement", "AOQLine")
+    RFQItem = apps.get_model("procurement", "RFQItem")
+    POLine = apps.get_model("procurement", "POLine")
+    for po in PurchaseOrder.objects.select_related("aoq").iterator():
+        items = {item.pr_item_id: item for item in RFQItem.objects.filter(rfq_id=po.aoq.rfq_id)}
+        lines = AOQLine.objects.filter(aoq_id=po.aoq_id, supplier_id=po.supplier_id, responsive=True)
+        lines = [line for line in lines.order_by("pr_item_id", "unit_price") if line.pr_item_id in items]
+        seen = set()
+        new = []
+        for line in lines:
+            if line.pr_item_id in seen:
+                continue
+            seen.add(line.pr_item_id)
+            item = items[line.pr_item_id]
+            new.append(POLine(
+                po=po, pr_item_id=line.pr_item_id, position=len(new) + 1, description=item.description,
+                quantity=item.quantity, unit=item.unit, unit_price=line.unit_price,
+            ))
+        POLine.objects.bulk_create(new)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0041_rfqitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='POLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('description', models.TextField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit', models.CharField(choices=[('amp', 'Ampere'), ('bag', 'Bag'), ('bar', 'Bar'), ('batch', 'Batch'), ('block', 'Block'), ('board', 'Board'), ('book', 'Book'), ('bottle', 'Bottle'), ('box', 'Box'), ('bundle', 'Bundle'), ('bunch', 'Bunch'), ('can', 'Can'), ('carton', 'Carton'), ('case', 'Case'), ('cm', 'Centimeter'), ('cuft', 'Cubic Foot'), ('cum', 'Cubic Meter'), ('cup', 'Cup'), ('day', 'Day'), ('dozen', 'Dozen'), ('drum', 'Drum'), ('each', 'Each'), ('envelope', 'Envelope'), ('ft', 'Foot'), ('gal', 'Gallon'), ('g', 'Gram'), ('hour', 'Hour'), ('in', 'Inch'), ('jar', 'Jar'), ('job', 'Job'), ('jug', 'Jug'), ('kg', 'Kilogram'), ('km', 'Kilometer'), ('length', 'Length'), ('liter', 'Liter'), ('lot', 'Lot'), ('m', 'Meter'), ('mg', 'Milligram'), ('ml', 'Milliliter'), ('mm', 'Millimeter'), ('month', 'Month'), ('pad', 'Pad'), ('pail', 'Pail'), ('pair', 'Pair'), ('pack', 'Pack'), ('packet', 'Packet'), ('panel', 'Panel'), ('pax', 'Pax'), ('pc', 'Piece'), ('plate', 'Plate'), ('pot', 'Pot'), ('pouch', 'Pouch'), ('quart', 'Quart'), ('ream', 'Ream'), ('roll', 'Roll'), ('sack', 'Sack'), ('sachet', 'Sachet'), ('set', 'Set'), ('sheet', 'Sheet'), ('sqft', 'Square Foot'), ('sqm', 'Square Meter'), ('stick', 'Stick'), ('strip', 'Strip'), ('tank', 'Tank'), ('tray', 'Tray'), ('tube', 'Tube'), ('unit', 'Unit'), ('volt', 'Volt'), ('watt', 'Watt'), ('yard', 'Yard'), ('year', 'Year'), ('others', 'Others (Specify)')], max_length=20)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('po', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='procurement.purchaseorder')),
+                ('pr_item', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='po_lines', to='procurement.pritem')),
+            ],
+            options={
+                'ordering': ['po', 'position'],
+                'unique_together': {('po', 'position')},
+            },
+        ),
+        migrations.RunPython(lines_for_existing_pos, migrations.RunPython.noop),
+    ]
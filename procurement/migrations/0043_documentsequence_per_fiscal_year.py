@@ -0,0 +1,114 @@
+import re
+
+import django.core.validators
+from django.db import migrations, models
+from django.utils import timezone
+
+FORMATS = {
+    "rfq": ("RFQ-{year}-{number:05d}", r"^RFQ-(\d{4})-(\d{5})$"),
+    "aoq": ("AOQ-{year}-{number:05d}", r"^AOQ-(\d{4})-(\d{5})$"),
+    "po": ("PO-{year}-{number:05d}", r"^PO-(\d{4})-(\d{5})$"),
+}
+NUMBERED = {"rfq": ("RequestForQuotation", "rfq_number"), "aoq": ("AbstractOfQuotation", "aoq_number"), "po": ("PurchaseOrder", "po_number")}
+
+
+def fiscal_year(date):
+    from django.conf import settings
+
+    start_month = getattr(settings, "FISCAL_YEAR_START_MONTH", 1)
+    return date.year if date.month >= start_month else date.year - 1
+
+
+def split_names(apps, schema_editor):
+    # counters of 0042 were named "PO-2026"
+    DocumentSequence = apps.get_model("procurement", "DocumentSequence")
+    for sequence in DocumentSequence.objects.all():
+        document_type, _, year = sequence.name.rpartition("-")
+        sequence.document_type, sequence.fiscal_year = document_type.lower(), int(year)
+        sequence.save()
+
+
+def join_names(apps, schema_editor):
+    DocumentSequence = apps.get_model("procurement", "DocumentSequence")
+    for sequence in DocumentSequence.objects.all():
+        sequence.name = f"{sequence.document_type.upper()}-{sequence.fiscal_year}"
+        sequence.save()
+
+
+def number_existing_documents(apps, schema_editor):
+    # counters start after the highest number already in use, then RFQs,
+    # AOQs and POs without a number get one, oldest first
+    DocumentSequence = apps.get_model("procurement", "DocumentSequence")
+    PurchaseRequest = apps.get_model("procurement", "PurchaseRequest")
+    last = {}
+
+    def seen(document_type, year, number):
+        key = (document_type, year)
+        last[key] = max(last.get(key, 0), number)
+
+    for pr_number in PurchaseRequest.objects.exclude(pr_number=None).values_list("pr_number", flat=True):
+        match = re.match(r"^(\d{2})-(\d{4})-(\d{2})\s", pr_number)
+        if match:
+            seen("pr", 2000 + int(match[3]), int(match[2]))
+
+    for document_type, (model_name, field) in NUMBERED.items():
+        model = apps.get_model("procurement", model_name)
+        template, pattern = FORMATS[document_type]
+        for number in model.objects.exclude(**{field: None}).values_list(field, flat=True):
+            match = re.match(pattern, number)
+            if match:
+                seen(document_type, int(match[1]), int(match[2]))
+        missing = list(model.objects.filter(**{field: None}).order_by("created_at", "pk"))
+        for obj in missing:
+            year = fiscal_year(timezone.localtime(obj.created_at).date())
+            seen(document_type, year, last.get((document_type, year), 0) + 1)
+            setattr(obj, field, template.format(year=year, number=last[(document_type, year)]))
+        model.objects.bulk_update(missing, [field], batch_size=500)
+
+    for (document_type, year), number in last.items():
+        sequence, _ = DocumentSequence.objects.get_or_create(document_type=document_type, fiscal_year=year)
+        if sequence.last_value < number:
+            sequence.last_value = number
+            sequence.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0042_poline_documentsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentsequence',
+            name='document_type',
+            field=models.CharField(choices=[('pr', 'Purchase Request'), ('rfq', 'Request for Quotation'), ('aoq', 'Abstract of Quotation'), ('po', 'Purchase Order')], default='po', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='documentsequence',
+            name='fiscal_year',
+            field=models.PositiveSmallIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='documentsequence',
+            name='name',
+            field=models.CharField(max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(split_names, join_names),
+        migrations.RemoveField(
+            model_name='documentsequence',
+            name='name',
+        ),
+        migrations.AlterUniqueTogether(
+            name='documentsequence',
+            unique_together={('document_type', 'fiscal_year')},
+        ),
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='pr_number',
+            field=models.CharField(blank=True, help_text='Format: 10-0042-25 Requesting Office)', max_length=100, null=True, unique=True, validators=[django.core.validators.RegexValidator(message='PR number must follow the format: (10-0042-25 Requesting Office).', regex='^(\\d{2})-(\\d{4})-(\\d{2})\\s.+$')]),
+        ),
+        migrations.RunPython(number_existing_documents, migrations.RunPython.noop),
+    ]
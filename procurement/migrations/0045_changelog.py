@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def install_triggers(apps, schema_editor):
+    from procurement.utils import changelog
+
+    changelog.install_triggers(schema_editor.connection.alias)
+
+
+def drop_triggers(apps, schema_editor):
+    from procurement.utils import changelog
+
+    changelog.drop_triggers(schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0044_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('i', 'Insert'), ('u', 'Update'), ('d', 'Delete')], max_length=1)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        # dropped before the table when migrating back
+        migrations.RunPython(install_triggers, drop_triggers),
+    ]
@@ -1,10 +1,19 @@
+import re
+from decimal import Decimal
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
 from django.urls import reverse
 from django.db import transaction
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from procurement.utils import award_simulator, live, outbox
+from procurement.utils.db import retry_on_locked
+from procurement.utils.metrics import inc_on_commit
+from procurement.utils.tracing import span
 
 User = get_user_model()
 
@@ -16,6 +25,28 @@ class TimestampedModel(models.Model):
     class Meta:
         abstract = True
 
+
+class NumberedDocument:
+    """
+    Mixin for models numbered from a DocumentSequence. A new row without a
+    number takes the next one of the current fiscal year in the same INSERT.
+    """
+    number_sequence = None  # DocumentSequence document type
+    number_field = None
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or getattr(self, self.number_field):
+            return super().save(*args, **kwargs)
+        try:
+            with transaction.atomic(using=kwargs.get("using")):
+                setattr(self, self.number_field, DocumentSequence.next_number(self.number_sequence))
+                return super().save(*args, **kwargs)
+        except Exception:
+            # the number was rolled back with the counter; don't reuse it
+            setattr(self, self.number_field, None)
+            raise
+
+
 class Supplier(TimestampedModel):
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=500, blank=True)
@@ -28,6 +59,10 @@ class Supplier(TimestampedModel):
     def __str__(self):
         return self.name
 
+# month-sequence-year office, e.g. "10-0042-25 Requesting Office"
+PR_NUMBER_PATTERN = r'^(\d{2})-(\d{4})-(\d{2})\s.+$'
+
+
 class PurchaseRequest(models.Model):
     STATUS_CHOICES = [
         # Stage 1: Requisition
@@ -129,7 +164,7 @@ class PurchaseRequest(models.Model):
         unique=True,  # ✅ ensures uniqueness
         validators=[
             RegexValidator(
-                regex=r'^\d{2}-\d{4}-\d{2}\s.+$',
+                regex=PR_NUMBER_PATTERN,
                 message="PR number must follow the format: (10-0042-25 Requesting Office)."
             )
         ],
@@ -158,14 +193,52 @@ class PurchaseRequest(models.Model):
     def __str__(self):
         return f"PR-{self.pr_number or self.id}"
 
-    def assign_pr_number(self):
-        if not self.pr_number:
-            self.pr_number = f"PR-{timezone.now().strftime('%Y%m%d')}-{self.id}"
-            self.save()
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        using = kwargs.get("using")
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            live.pr_created(self, using=using)
+
+    def assign_pr_number(self, commit=True):
+        """
+        Give the PR the next number of the fiscal year unless it already has
+        one. A number typed in by hand moves the sequence past it instead, so
+        the sequence won't hand it out again.
+        """
+        with transaction.atomic():
+            match = re.match(PR_NUMBER_PATTERN, self.pr_number or "")
+            if match:
+                DocumentSequence.advance("pr", int(match[2]), year=2000 + int(match[3]))
+            elif (self.pr_number or "").lower() in ("", "unassigned"):
+                self.pr_number = DocumentSequence.next_number("pr", office=self.number_office())
+            if commit:
+                self.save()
+
+    def number_office(self):
+        """Office part of a generated PR number."""
+        return self.office_section or "EVSU"
 
     def __str__(self):
         return self.pr_number or f"PR (draft) {self.id}"
 
+    @transaction.atomic
+    def set_status(self, new_status, actor=None):
+        """
+        Move the PR to ``new_status`` and append the transition to its
+        status history. Returns False when the status is unchanged.
+        """
+        if new_status == self.status:
+            return False
+        now = timezone.now()
+        PRStatusHistory.record(self, self.status, new_status, actor=actor, at=now)
+        self.status = new_status
+        self.last_update = now
+        self.save(update_fields=["status", "last_update", "updated_at"])
+        live.pr_status_changed(self)
+        return True
+
     @property
     def total_amount(self):
         return sum(
@@ -231,6 +304,7 @@ class PRItem(models.Model):
     unit = models.CharField(max_length=20, choices=UNIT_CHOICES)
     unit_cost = models.DecimalField(max_digits=12, decimal_places=2)  # ✅ renamed field
     budget_category = models.CharField(max_length=20, choices=BUDGET_CATEGORIES, default="MOOE")
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def total_cost(self):
@@ -240,8 +314,11 @@ class PRItem(models.Model):
     def __str__(self):
         return f"{self.description} ({self.unit})"
 
-class RequestForQuotation(TimestampedModel):
-    rfq_number = models.CharField(max_length=50, unique=True, null=True, blank=True)
+class RequestForQuotation(NumberedDocument, TimestampedModel):
+    number_sequence = "rfq"
+    number_field = "rfq_number"
+
+    rfq_number = models.CharField(max_length=150, unique=True, null=True, blank=True)
     purchase_request = models.OneToOneField(PurchaseRequest, related_name="rfq", on_delete=models.CASCADE, null=True, blank=True)
     consolidated_prs = models.ManyToManyField(PurchaseRequest, related_name="rfqs", blank=True)
     date = models.DateField(default=timezone.now)
@@ -255,6 +332,67 @@ class RequestForQuotation(TimestampedModel):
     def __str__(self):
         return self.rfq_number or f"RFQ {self.pk or ''}"
 
+    def snapshot_items(self):
+        """
+        Freeze the items of this RFQ's PR(s) into RFQItem rows, PR by PR in
+        item order. Called when the RFQ is created or consolidated; an RFQ
+        that already has its items is left as it is.
+        """
+        if self.items.exists():
+            return []
+        pr_items = PRItem.objects.filter(purchase_request_id__in=self.pr_ids()).order_by("purchase_request_id", "pk")
+        return RFQItem.objects.bulk_create([
+            RFQItem.from_pr_item(self, pr_item, position)
+            for position, pr_item in enumerate(pr_items, start=1)
+        ])
+
+    def pr_ids(self):
+        """Ids of the PR(s) this RFQ was issued for."""
+        pr_ids = set(self.consolidated_prs.values_list("pk", flat=True))
+        if self.purchase_request_id:
+            pr_ids.add(self.purchase_request_id)
+        return pr_ids
+
+    def item_quantities(self):
+        """{pr_item_id: quantity} as quoted on this RFQ."""
+        return dict(self.items.values_list("pr_item_id", "quantity"))
+
+
+class RFQItem(models.Model):
+    """
+    An item as it was when the RFQ went out. Suppliers quote on these, so
+    bids, the AOQ and printouts read them rather than the PR's current items,
+    which may have been edited since.
+    """
+    rfq = models.ForeignKey(RequestForQuotation, related_name="items", on_delete=models.CASCADE)
+    pr_item = models.ForeignKey(PRItem, null=True, on_delete=models.SET_NULL, related_name="rfq_items")
+    purchase_request = models.ForeignKey(PurchaseRequest, null=True, on_delete=models.SET_NULL, related_name="+")
+    position = models.PositiveIntegerField()
+    stock_no = models.CharField(max_length=50, blank=True, null=True)
+    description = models.TextField()
+    quantity = models.PositiveIntegerField()
+    unit = models.CharField(max_length=20, choices=PRItem.UNIT_CHOICES)
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ["rfq", "position"]
+        unique_together = [("rfq", "position"), ("rfq", "pr_item")]
+
+    def __str__(self):
+        return f"{self.description} ({self.unit})"
+
+    @classmethod
+    def from_pr_item(cls, rfq, pr_item, position):
+        return cls(
+            rfq=rfq, pr_item=pr_item, purchase_request_id=pr_item.purchase_request_id, position=position,
+            stock_no=pr_item.stock_no, description=pr_item.description, quantity=pr_item.quantity,
+            unit=pr_item.unit, unit_cost=pr_item.unit_cost,
+        )
+
+    @property
+    def total_cost(self):
+        return (self.quantity or 0) * (self.unit_cost or Decimal("0"))
+
 # --- Bid models for RFQ processing ---
 class Bid(models.Model):
     STATUS_CHOICES = [
@@ -272,6 +410,7 @@ class Bid(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="bids_created")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("rfq", "supplier")
@@ -281,14 +420,19 @@ class Bid(models.Model):
         return f"Bid: {self.supplier} on {self.rfq}"
 
     def total_bid_amount(self):
-        # Sum over related BidLine if present
-        return sum((line.total_cost() or 0) for line in self.lines.all())
+        # Sum over related BidLine if present, at the quantities the RFQ asked for
+        quantities = self.rfq.item_quantities()
+        return sum(
+            (quantities.get(pr_item_id, 0) * (unit_price or 0)
+             for pr_item_id, unit_price in self.lines.values_list("pr_item_id", "unit_price")),
+            0,
+        )
     
     def completeness_status(self):
-        """Return True if bid has lines for every PRItem in the RFQ's PR."""
-        pr_items = list(self.rfq.purchase_request.items.values_list('pk', flat=True))
-        bid_item_ids = list(self.lines.values_list('pr_item__pk', flat=True))
-        return set(pr_items) <= set(bid_item_ids)
+        """Return True if bid has lines for every item on the RFQ."""
+        rfq_item_ids = set(self.rfq.items.values_list('pr_item_id', flat=True))
+        bid_item_ids = set(self.lines.values_list('pr_item_id', flat=True))
+        return rfq_item_ids <= bid_item_ids
 
     def responsive_status(self):
         """Return True if all lines marked responsive/compliant and have valid prices."""
@@ -307,9 +451,13 @@ class BidLine(models.Model):
     unit_price = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     offer = models.CharField(max_length=255, blank=True, null=True)
     compliant = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def total_cost(self):
-        return (self.pr_item.quantity or 0) * (self.unit_price or 0)
+    def total_cost(self, quantities=None):
+        """Price times the quantity on the RFQ; pass rfq.item_quantities() when totalling many lines."""
+        if quantities is None:
+            quantities = self.bid.rfq.item_quantities()
+        return quantities.get(self.pr_item_id, 0) * (self.unit_price or 0)
 
     def __str__(self):
         return f"{self.pr_item} — {self.unit_price}"
@@ -331,7 +479,10 @@ class AgencyProcurementRequest(TimestampedModel):
     def __str__(self):
         return self.apr_number or f"APR for {self.purchase_request}"
 
-class AbstractOfQuotation(TimestampedModel):
+class AbstractOfQuotation(NumberedDocument, TimestampedModel):
+    number_sequence = "aoq"
+    number_field = "aoq_number"
+
     aoq_number = models.CharField(max_length=50, blank=True, null=True, unique=True)
     rfq = models.OneToOneField(RequestForQuotation, related_name="aoq", on_delete=models.CASCADE)
     verified = models.BooleanField(default=False)
@@ -344,18 +495,92 @@ class AbstractOfQuotation(TimestampedModel):
 
     def __str__(self):
         return self.aoq_number or f"AOQ for {self.rfq}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        using = kwargs.get("using")
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            # the RFQ's PRs now wait for the BAC resolution on the award
+            outbox.publish("pr.status", self.rfq.pr_ids(), {
+                "status": "for_award", "actor_id": self.created_by_id,
+            }, using=using)
+
+    @classmethod
+    @retry_on_locked
+    @transaction.atomic
+    def generate_from_bids(cls, rfq):
+        """
+        Build the AOQ lines of ``rfq`` from its bids: one responsive line per
+        priced, compliant BidLine of a submitted bid. Safe to re-run; existing
+        lines are diffed against the bids so only changed prices are updated,
+        new ones inserted and withdrawn ones deleted. ``responsive`` is only
+        set on new lines: the BAC's marking of existing ones is kept.
+        Returns (aoq, {"created": n, "updated": n, "deleted": n}).
+        """
+        with span("aoq.generate", rfq_id=rfq.pk) as generate_span:
+            aoq, _ = cls.objects.select_for_update().get_or_create(rfq=rfq)
+            if aoq.is_awarded:
+                raise ValidationError("AOQ has already been awarded; its lines can't be regenerated.")
+            generate_span.set("aoq_id", aoq.pk)
+
+            with span("aoq.generate.read"):
+                positions = dict(rfq.items.values_list("pr_item_id", "position"))
+                wanted = {
+                    (pr_item_id, supplier_id): unit_price
+                    for pr_item_id, supplier_id, unit_price in BidLine.objects.filter(
+                        bid__rfq=rfq, bid__status="submitted", compliant=True, unit_price__gt=0,
+                    ).values_list("pr_item_id", "bid__supplier_id", "unit_price")
+                    if pr_item_id in positions
+                }
+                existing = list(AOQLine.objects.filter(aoq=aoq).only("pr_item_id", "supplier_id", "unit_price"))
+
+            now = timezone.now()
+            seen, changed, stale = set(), [], []
+            for line in existing:
+                key = (line.pr_item_id, line.supplier_id)
+                if key not in wanted or key in seen:
+                    stale.append(line.pk)
+                    continue
+                seen.add(key)
+                if line.unit_price != wanted[key]:
+                    line.unit_price, line.updated_at = wanted[key], now
+                    changed.append(line)
+            new = [
+                AOQLine(aoq=aoq, pr_item_id=pr_item_id, supplier_id=supplier_id, unit_price=unit_price, responsive=True)
+                for (pr_item_id, supplier_id), unit_price in sorted(
+                    wanted.items(), key=lambda entry: (positions[entry[0][0]], entry[0][1])
+                )
+                if (pr_item_id, supplier_id) not in seen
+            ]
+
+            with span("aoq.generate.write"):
+                if stale:
+                    AOQLine.objects.filter(pk__in=stale).delete()
+                if changed:
+                    AOQLine.objects.bulk_update(changed, ["unit_price", "updated_at"])
+                if new:
+                    AOQLine.objects.bulk_create(new)
+                if stale or changed or new:
+                    # AOQ pages and the list show the AOQ as changed
+                    aoq.save(update_fields=["updated_at"])
+
+            counts = {"created": len(new), "updated": len(changed), "deleted": len(stale)}
+            for name, value in counts.items():
+                generate_span.set(name, value)
+        return aoq, counts
     
     def compute_lcrb(self):
         """
-        Compute Lowest Compliant Responsive Bid (LCRB) per PRItem.
-        Returns dict: { pr_item.pk: BidLine (winning line) }
+        Compute Lowest Compliant Responsive Bid (LCRB) per RFQ item.
+        Returns dict: { pr_item.pk: AOQLine (winning line) }
         """
         winners = {}
-        for pr_item in self.rfq.purchase_request.items.all():
-            # filter responsive lines for this item
-            responsive_lines = self.rfq.aoq.lines.filter(pr_item=pr_item, responsive=True).order_by("unit_price")
-            if responsive_lines.exists():
-                winners[pr_item.pk] = responsive_lines.first()
+        rfq_item_ids = set(self.rfq.items.values_list("pr_item_id", flat=True))
+        # cheapest first, so the first responsive line seen per item wins
+        for line in self.lines.filter(pr_item_id__in=rfq_item_ids, responsive=True).order_by("unit_price", "pk"):
+            winners.setdefault(line.pr_item_id, line)
         return winners
 
     def summarize(self):
@@ -363,49 +588,115 @@ class AbstractOfQuotation(TimestampedModel):
         Summarize total per supplier and grand totals. Returns dict summary.
         """
         summary = {}
+        quantities = self.rfq.item_quantities()
         for line in self.lines.select_related('supplier','pr_item'):
             sup = line.supplier
             summary.setdefault(sup.pk, {"supplier": sup, "total": 0, "lines": []})
-            line_total = (line.unit_price or 0) * (line.pr_item.quantity or 0)
+            line_total = (line.unit_price or 0) * quantities.get(line.pr_item_id, 0)
             summary[sup.pk]["total"] += line_total
             summary[sup.pk]["lines"].append(line)
         return summary
 
-    @transaction.atomic
+    @property
+    def is_awarded(self):
+        return bool(self.awarded_at or self.awarded_to_id)
+
     def award(self, supplier_id, awarded_by=None):
         """
-        Mark AOQ as awarded to supplier_id and create PurchaseOrder(s).
-        Atomic: either award + PO creation succeed or roll back.
+        Award every item the supplier responsively quoted on to that supplier
+        and create its PurchaseOrder.
         """
-        # Basic validation
-        aoq = self
-        supplier = Supplier.objects.get(pk=supplier_id)  # may raise
-        # optional: ensure supplier present in AOQ lines
-        if not aoq.lines.filter(supplier=supplier, responsive=True).exists():
+        pr_item_ids = self.lines.filter(supplier_id=supplier_id, responsive=True).values_list("pr_item_id", flat=True)
+        awards = {pr_item_id: int(supplier_id) for pr_item_id in pr_item_ids}
+        if not awards:
             raise ValidationError("Supplier has no responsive lines in AOQ.")
+        return self.award_items(awards, awarded_by=awarded_by)[0]
 
-        # create PO - you may choose to create one PO per supplier or one consolidated PO
-        po = PurchaseOrder.objects.create(
-            aoq=aoq,
-            supplier=supplier,
-            created_by=awarded_by,
-            submission_date=timezone.now().date(),
-            receiving_office="To be set"
-        )
-        po.po_number = f"PO-{timezone.now().strftime('%Y%m%d')}-{po.id}"
-        po.save()
-
-        # mark AOQ as awarded
-        aoq.awarded_to = supplier  # add field? if not present, set notes/status.
-        aoq.save(update_fields=['awarded_to'])
+    def item_awards(self):
+        """Per-item award: {pr_item_id: supplier_id} of each item's LCRB."""
+        matrix = award_simulator.BidMatrix.for_aoq(self)
+        return award_simulator.item_awards(matrix, matrix.responsive_prices())
 
-        # update related PR status (optional)
-        pr = aoq.rfq.purchase_request
-        pr.status = "po_issued"
-        pr.last_update = timezone.now()
-        pr.save(update_fields=['status','last_update'])
+    def lot_awards(self):
+        """
+        Per-lot award, a lot being one PR's items: each lot goes whole to the
+        supplier with the lowest responsive total for all of its items. Lots no
+        supplier fully quoted on are left out.
+        """
+        matrix = award_simulator.BidMatrix.for_aoq(self)
+        return award_simulator.lot_awards(matrix, matrix.responsive_prices())
 
-        return po
+    @retry_on_locked
+    @transaction.atomic
+    def award_items(self, awards, awarded_by=None):
+        """
+        Award ``{pr_item_id: supplier_id}`` and create one PurchaseOrder per
+        winning supplier, with its lines, in a single transaction. Every
+        awarded item needs a responsive AOQ line from its supplier. Returns the
+        POs, in RFQ item order of each supplier's first item.
+        """
+        with span("aoq.award", aoq_id=self.pk, rfq_id=self.rfq_id, item_count=len(awards)) as award_span:
+            with span("aoq.award.validate"):
+                aoq = AbstractOfQuotation.objects.select_for_update().get(pk=self.pk)
+                if aoq.is_awarded:
+                    raise ValidationError("AOQ has already been awarded.")
+                if not awards:
+                    raise ValidationError("Select at least one item to award.")
+                prices = {}
+                for pr_item_id, supplier_id, unit_price in aoq.lines.filter(
+                    pr_item_id__in=list(awards), responsive=True,
+                ).values_list("pr_item_id", "supplier_id", "unit_price"):
+                    key = (pr_item_id, supplier_id)
+                    prices[key] = min(prices.get(key, unit_price), unit_price)
+                missing = [pr_item_id for pr_item_id, supplier_id in awards.items() if (pr_item_id, supplier_id) not in prices]
+                if missing:
+                    raise ValidationError(f"{len(missing)} awarded item(s) have no responsive quotation from their supplier.")
+
+                # one PO per supplier, lines in RFQ item order
+                by_supplier = {}
+                for item in aoq.rfq.items.filter(pr_item_id__in=list(awards)):
+                    by_supplier.setdefault(awards[item.pr_item_id], []).append(item)
+            award_span.set("po_count", len(by_supplier))
+
+            with span("po.create", po_count=len(by_supplier)) as po_span:
+                today = timezone.localdate()
+                numbers = DocumentSequence.next_numbers("po", len(by_supplier), date=today)
+                pos = PurchaseOrder.objects.bulk_create([
+                    PurchaseOrder(
+                        aoq=aoq, supplier_id=supplier_id, po_number=po_number,
+                        created_by=awarded_by, submission_date=today, receiving_office="To be set",
+                    )
+                    for supplier_id, po_number in zip(by_supplier, numbers)
+                ])
+                POLine.objects.bulk_create([
+                    POLine(
+                        po=po, pr_item_id=item.pr_item_id, position=position, description=item.description,
+                        quantity=item.quantity, unit=item.unit,
+                        unit_price=prices[(item.pr_item_id, po.supplier_id)],
+                    )
+                    for po, items in zip(pos, by_supplier.values())
+                    for position, item in enumerate(items, start=1)
+                ])
+                po_span.set("po_ids", [po.pk for po in pos])
+
+            with span("aoq.award.save"):
+                aoq.awarded_to_id = next(iter(by_supplier)) if len(by_supplier) == 1 else None
+                aoq.awarded_at = timezone.now()
+                aoq.awarded_by = awarded_by
+                aoq.save(update_fields=["awarded_to", "awarded_at", "awarded_by", "updated_at"])
+            inc_on_commit("procurement_awards_total")
+            inc_on_commit("procurement_pos_issued_total", len(pos))
+
+            live.pos_issued(aoq, pos)
+            # once per PR that got a PO line, however many POs the award
+            # produced; applied after commit
+            awarded_pr_ids = {item.purchase_request_id for items in by_supplier.values() for item in items}
+            outbox.publish("pr.status", awarded_pr_ids - {None}, {
+                "status": "po_issued", "actor_id": getattr(awarded_by, "pk", None),
+            })
+
+        self.refresh_from_db(fields=["awarded_to", "awarded_at", "awarded_by", "updated_at"])
+        return pos
     
     def supplier_summary(self):
         """
@@ -413,9 +704,10 @@ class AbstractOfQuotation(TimestampedModel):
         ```
         """
         summary = {}
+        quantities = self.rfq.item_quantities()
         for line in self.lines.select_related("supplier", "pr_item"):
             sup = line.supplier
-            line_total = (line.unit_price or 0) * (line.pr_item.quantity or 0)
+            line_total = (line.unit_price or 0) * quantities.get(line.pr_item_id, 0)
             if sup.pk not in summary:
                 summary[sup.pk] = {"supplier": sup, "total": 0, "lines": [], "responsive_count": 0}
             summary[sup.pk]["total"] += line_total
@@ -431,10 +723,11 @@ class AbstractOfQuotation(TimestampedModel):
         Determine current winning supplier by lowest total among responsive suppliers.
         Returns (supplier, winning_total, pr_total, savings, pct_savings)
         """
-        pr_total = self.rfq.purchase_request.total_amount()
+        rfq_items = list(self.rfq.items.all())
+        pr_total = sum((item.total_cost for item in rfq_items), Decimal("0"))
         suppliers = self.supplier_summary()
-        # find first supplier with responsive_count == number_of_pr_items (complete & responsive)
-        num_items = self.rfq.purchase_request.items.count()
+        # find first supplier with responsive_count == number of RFQ items (complete & responsive)
+        num_items = len(rfq_items)
         winner = None
         for s in suppliers:
             if s["responsive_count"] >= num_items:
@@ -454,11 +747,18 @@ class AOQLine(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE)
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
     responsive = models.BooleanField(default=True)  # whether bid is responsive
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def line_total(self):
-        return self.unit_price * self.pr_item.quantity
+    def line_total(self, quantities=None):
+        """Price times the quantity on the RFQ; pass rfq.item_quantities() when totalling many lines."""
+        if quantities is None:
+            quantities = self.aoq.rfq.item_quantities()
+        return self.unit_price * quantities.get(self.pr_item_id, 0)
+
+class PurchaseOrder(NumberedDocument, TimestampedModel):
+    number_sequence = "po"
+    number_field = "po_number"
 
-class PurchaseOrder(TimestampedModel):
     po_number = models.CharField(max_length=50, blank=True, null=True, unique=True)
     aoq = models.ForeignKey(AbstractOfQuotation, related_name="purchase_orders", on_delete=models.CASCADE)
     supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT)
@@ -469,7 +769,111 @@ class PurchaseOrder(TimestampedModel):
 
     def __str__(self):
         return self.po_number or f"PO for {self.supplier}"
-    
+
+    def total_amount(self):
+        return sum((line.line_total for line in self.lines.all()), Decimal("0"))
+
+
+class POLine(models.Model):
+    """An awarded item on a PO, at the quantity quoted and the awarded price."""
+    po = models.ForeignKey(PurchaseOrder, related_name="lines", on_delete=models.CASCADE)
+    pr_item = models.ForeignKey(PRItem, null=True, on_delete=models.SET_NULL, related_name="po_lines")
+    position = models.PositiveIntegerField()
+    description = models.TextField()
+    quantity = models.PositiveIntegerField()
+    unit = models.CharField(max_length=20, choices=PRItem.UNIT_CHOICES)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ["po", "position"]
+        unique_together = [("po", "position")]
+
+    def __str__(self):
+        return f"{self.description} ({self.unit})"
+
+    @property
+    def line_total(self):
+        return self.quantity * self.unit_price
+
+
+def fiscal_year(date=None):
+    """Fiscal year of ``date`` (default today), named after the year it starts in."""
+    date = date or timezone.localdate()
+    start_month = getattr(settings, "FISCAL_YEAR_START_MONTH", 1)
+    return date.year if date.month >= start_month else date.year - 1
+
+
+class DocumentSequence(models.Model):
+    """
+    Counter behind the numbers of one document type in one fiscal year.
+    Numbers are taken with an UPDATE that locks the counter row until the
+    surrounding transaction ends, so concurrent callers queue and numbers
+    are unique and gap-free as long as that transaction commits.
+    """
+    DOCUMENT_TYPES = [
+        ("pr", "Purchase Request"),
+        ("rfq", "Request for Quotation"),
+        ("aoq", "Abstract of Quotation"),
+        ("po", "Purchase Order"),
+    ]
+    # str.format() templates; year is the fiscal year, yy its last two digits
+    FORMATS = {
+        "pr": "{date:%m}-{number:04d}-{yy:02d} {office}",
+        "rfq": "RFQ-{year}-{number:05d}",
+        "aoq": "AOQ-{year}-{number:05d}",
+        "po": "PO-{year}-{number:05d}",
+    }
+
+    document_type = models.CharField(max_length=10, choices=DOCUMENT_TYPES)
+    fiscal_year = models.PositiveSmallIntegerField()
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = [("document_type", "fiscal_year")]
+
+    def __str__(self):
+        return f"{self.get_document_type_display()} FY{self.fiscal_year}: {self.last_value}"
+
+    @classmethod
+    def take(cls, document_type, count=1, year=None):
+        """Reserve a block of ``count`` consecutive numbers; call inside the transaction that uses them."""
+        year = year or fiscal_year()
+        counter = cls.objects.filter(document_type=document_type, fiscal_year=year)
+        with transaction.atomic():
+            if not counter.update(last_value=F("last_value") + count):
+                cls.objects.get_or_create(document_type=document_type, fiscal_year=year)
+                counter.update(last_value=F("last_value") + count)
+            last = counter.values_list("last_value", flat=True).get()
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def advance(cls, document_type, number, year):
+        """Move the counter up to ``number`` (e.g. one assigned by hand) if it is behind."""
+        cls.objects.get_or_create(document_type=document_type, fiscal_year=year)
+        cls.objects.filter(
+            document_type=document_type, fiscal_year=year, last_value__lt=number,
+        ).update(last_value=number)
+
+    @classmethod
+    def format(cls, document_type, number, date=None, **fields):
+        date = date or timezone.localdate()
+        year = fiscal_year(date)
+        return cls.FORMATS[document_type].format(number=number, year=year, yy=year % 100, date=date, **fields)
+
+    @classmethod
+    def next_numbers(cls, document_type, count, date=None, **fields):
+        """``count`` formatted document numbers, reserved as one block."""
+        date = date or timezone.localdate()
+        return [
+            cls.format(document_type, number, date, **fields)
+            for number in cls.take(document_type, count, fiscal_year(date))
+        ]
+
+    @classmethod
+    def next_number(cls, document_type, date=None, **fields):
+        return cls.next_numbers(document_type, 1, date, **fields)[0]
+
+
 class Signatory(models.Model):
     name = models.CharField(max_length=255)
     designation = models.CharField(max_length=255)
@@ -483,12 +887,132 @@ class Signatory(models.Model):
         return f"{self.name} — {self.designation}"
 
 class ActionLog(models.Model):
-    actor = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    """
+    Audit trail written through procurement.utils.audit.log_action(). May live
+    in a separate database (AUDIT_LOG_DATABASE), hence no FK constraint.
+    """
+    actor = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, db_constraint=False)
     action = models.CharField(max_length=200)
     target_type = models.CharField(max_length=50, blank=True, null=True)
     target_id = models.IntegerField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # set when the action happens, not when the buffered entry is flushed
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.action} {self.target_type or ''}#{self.target_id or ''}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Workflow side effect recorded in the transaction that caused it and
+    applied after commit by procurement.utils.outbox.
+    """
+    topic = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)  # pending events with the same topic and key coalesce
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(processed_at__isnull=True), name="outbox_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.key}"
+
+
+class ChangeLog(models.Model):
+    """
+    One row per INSERT, UPDATE or DELETE of a PR, PR item, RFQ, bid, AOQ or
+    PO, written by database triggers (procurement.utils.changelog). The id is
+    the changefeed cursor.
+    """
+    ACTION_CHOICES = [("i", "Insert"), ("u", "Update"), ("d", "Delete")]
+
+    model = models.CharField(max_length=20)  # a changelog.TRACKED name
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=1, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["pk"]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action}"
+
+
+class PRStatusHistory(models.Model):
+    """
+    Append-only record of every PurchaseRequest status transition. ``duration``
+    is the time the PR spent in ``from_status``; office and mode are copied at
+    transition time so cycle-time reports never need to join the PR.
+    """
+    purchase_request = models.ForeignKey(PurchaseRequest, on_delete=models.CASCADE, related_name="status_history")
+    from_status = models.CharField(max_length=30, blank=True)
+    to_status = models.CharField(max_length=30)
+    actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    changed_at = models.DateTimeField(default=timezone.now)
+    duration = models.DurationField(null=True, blank=True)
+    office_section = models.CharField(max_length=255, blank=True, default="")
+    mode_of_procurement = models.CharField(max_length=150, blank=True, default="")
+
+    class Meta:
+        ordering = ["changed_at"]
+        verbose_name_plural = "PR status history"
+        indexes = [
+            models.Index(fields=["purchase_request", "changed_at"]),
+            models.Index(fields=["changed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.purchase_request}: {self.from_status or '-'} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValidationError("Status history entries cannot be modified.")
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def record(cls, pr, from_status, to_status, actor=None, at=None):
+        at = at or timezone.now()
+        entered_at = (
+            cls.objects.filter(purchase_request=pr)
+            .order_by("-changed_at")
+            .values_list("changed_at", flat=True)
+            .first()
+        ) or pr.created_at
+        inc_on_commit("procurement_pr_status_transitions_total",
+                      from_status=from_status or "", to_status=to_status)
+        return cls.objects.create(
+            purchase_request=pr,
+            from_status=from_status or "",
+            to_status=to_status,
+            actor=actor if getattr(actor, "is_authenticated", False) else None,
+            changed_at=at,
+            duration=(at - entered_at) if entered_at else None,
+            office_section=pr.office_section or "",
+            mode_of_procurement=pr.mode_of_procurement or "",
+        )
+
+class StageDwellRollup(models.Model):
+    """Monthly p50/p90 time-in-stage per office and mode (see utils.stage_analytics)."""
+    month = models.DateField()
+    stage = models.CharField(max_length=30)
+    office_section = models.CharField(max_length=255, blank=True, default="")
+    mode_of_procurement = models.CharField(max_length=150, blank=True, default="")
+    samples = models.PositiveIntegerField()
+    p50_seconds = models.FloatField()
+    p90_seconds = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month", "stage"]
+        unique_together = ("month", "stage", "office_section", "mode_of_procurement")
 
 class RFQConsolidationLog(models.Model):
     """Tracks all PR consolidation actions for auditing and traceability."""
@@ -506,3 +1030,37 @@ class RFQConsolidationLog(models.Model):
         prs = ", ".join(self.consolidated_prs.values_list("pr_number", flat=True))
         return f"RFQ {self.rfq.rfq_number} consolidated ({prs})"
 
+class PrintJob(models.Model):
+    """
+    A batch of PRs, RFQs or POs printed into one PDF (see utils.batch_print).
+    ``document_ids`` keeps the order the documents appear in the PDF.
+    """
+    KIND_CHOICES = [
+        ("pr", "Purchase Requests"),
+        ("rfq", "Requests for Quotation"),
+        ("po", "Purchase Orders"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    document_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending", db_index=True)
+    base_url = models.CharField(max_length=255, blank=True, default="")
+    file = models.FileField(upload_to="print_jobs/", blank=True)
+    page_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name="print_jobs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} x{len(self.document_ids)} ({self.status})"
@@ -0,0 +1,146 @@
+"""
+Database routers (settings.DATABASE_ROUTERS).
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# True while a read-only view marked with @replica_reads is running
+_reads_from_replica = ContextVar("reads_from_replica", default=False)
+
+PRIMARY_PIN_COOKIE = "primary_pin"
+
+
+def _is_action_log(model):
+    return model._meta.app_label == "procurement" and model._meta.model_name == "actionlog"
+
+
+class AuditLogRouter:
+    """
+    Keep ActionLog on settings.AUDIT_LOG_DATABASE and everything else off it.
+    A no-op while AUDIT_LOG_DATABASE is the default database.
+    """
+
+    @property
+    def alias(self):
+        return getattr(settings, "AUDIT_LOG_DATABASE", DEFAULT_DB_ALIAS)
+
+    def _route(self, model, **hints):
+        if self.alias == DEFAULT_DB_ALIAS:
+            return None
+        if _is_action_log(model):
+            return self.alias
+        # related lookups from an ActionLog (e.g. entry.actor) would otherwise
+        # follow the instance onto the audit database
+        instance = hints.get("instance")
+        if instance is not None and _is_action_log(type(instance)):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    db_for_read = _route
+    db_for_write = _route
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if self.alias != DEFAULT_DB_ALIAS and (_is_action_log(type(obj1)) or _is_action_log(type(obj2))):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if self.alias == DEFAULT_DB_ALIAS:
+            return None
+        if db == self.alias:
+            return app_label == "procurement" and model_name == "actionlog"
+        if app_label == "procurement" and model_name == "actionlog":
+            return False
+        return None
+
+
+class PrimaryReplicaRouter:
+    """
+    Send procurement reads made by @replica_reads views to
+    settings.REPLICA_DATABASE; everything else (writes, auth, sessions, the
+    audit log, reads from ordinary views) stays on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = getattr(settings, "REPLICA_DATABASE", None)
+        if not alias or not _reads_from_replica.get():
+            return None
+        if model._meta.app_label != "procurement" or _is_action_log(model):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # objects read from the replica must still be saved on the primary
+        if getattr(settings, "REPLICA_DATABASE", None) and model._meta.app_label == "procurement":
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        replica = getattr(settings, "REPLICA_DATABASE", None)
+        if replica and {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, replica}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica is a copy of the primary, never migrated directly
+        if db == getattr(settings, "REPLICA_DATABASE", None):
+            return False
+        return None
+
+
+def replica_reads(view_func):
+    """
+    Let a read-only view query the replica. Skipped for unsafe methods and
+    for browsers that wrote recently (see ReplicaStickinessMiddleware), so a
+    user always sees their own changes right after a POST.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or PRIMARY_PIN_COOKIE in request.COOKIES:
+            return view_func(request, *args, **kwargs)
+        token = _reads_from_replica.set(True)
+        try:
+            response = view_func(request, *args, **kwargs)
+            # TemplateResponses evaluate their querysets while rendering
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            return response
+        finally:
+            _reads_from_replica.reset(token)
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """
+    After any write request, pin the browser to the primary for
+    REPLICA_STICKY_SECONDS (longer than the replica's usual lag) with a
+    short-lived cookie.
+    """
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and getattr(settings, "REPLICA_DATABASE", None):
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, "1",
+                max_age=getattr(settings, "REPLICA_STICKY_SECONDS", 30),
+                httponly=True, samesite="Lax",
+            )
+        return response
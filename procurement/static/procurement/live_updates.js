@@ -0,0 +1,85 @@
+/*
+ * Keep the PR list and dashboards current from the Server-Sent Events
+ * stream at <script data-url="..."> (procurement.views.live_events):
+ * status changes and RFQ links are patched into the PR's row
+ * (<tr id="pr-row-N">), counters marked data-live-count="rfq" etc. are
+ * bumped, and new PRs are announced so the list can be reloaded.
+ */
+(function () {
+  const url = document.currentScript && document.currentScript.dataset.url;
+  if (!url || !window.EventSource) return;
+
+  function flash(element) {
+    if (!element) return;
+    element.classList.add("highlight-flash");
+    setTimeout(() => element.classList.remove("highlight-flash"), 1200);
+  }
+
+  function bumpCounts(counts) {
+    Object.entries(counts || {}).forEach(([name, n]) => {
+      document.querySelectorAll(`[data-live-count="${name}"]`).forEach(el => {
+        el.textContent = (parseInt(el.textContent, 10) || 0) + n;
+        flash(el);
+      });
+    });
+  }
+
+  function patchStatus(data) {
+    const row = document.getElementById(`pr-row-${data.pr}`);
+    if (!row) return;
+    const select = row.querySelector(".status-select");
+    if (select) {
+      select.dataset.current = data.status;
+      if (select.dataset.filled) {
+        select.value = data.status;
+      } else {
+        select.options[0].value = data.status;
+        select.options[0].textContent = data.status_display;
+      }
+    }
+    const badge = row.querySelector(".status-column .badge");
+    if (badge) badge.textContent = data.status_display;
+    const updated = row.querySelector(".update-cell");
+    if (updated) updated.textContent = data.last_update;
+    flash(row.querySelector(".status-column"));
+  }
+
+  function markLinked(data) {
+    data.prs.forEach(pk => {
+      const row = document.getElementById(`pr-row-${pk}`);
+      if (!row) return;
+      row.title = "Already linked to an RFQ";
+      const checkbox = row.querySelector(".pr-checkbox");
+      if (checkbox) checkbox.dataset.linked = "1";
+      flash(row);
+    });
+  }
+
+  let created = 0;
+  function announceNew() {
+    const table = document.getElementById("pr-table");
+    if (!table) return;
+    let banner = document.getElementById("live-new-prs");
+    if (!banner) {
+      banner = document.createElement("div");
+      banner.id = "live-new-prs";
+      banner.className = "alert alert-info py-2 mt-3";
+      table.before(banner);
+    }
+    created += 1;
+    banner.innerHTML = `${created} new purchase request${created > 1 ? "s" : ""}. ` +
+      '<a href="#" onclick="location.reload(); return false;">Reload</a> to see them.';
+  }
+
+  const handlers = {
+    pr_created: data => { bumpCounts(data.counts); announceNew(); },
+    pr_status: patchStatus,
+    rfq_issued: data => { bumpCounts(data.counts); markLinked(data); },
+    po_issued: data => bumpCounts(data.counts),
+  };
+
+  const source = new EventSource(url);
+  Object.entries(handlers).forEach(([type, handle]) =>
+    source.addEventListener(type, event => handle(JSON.parse(event.data)))
+  );
+})();
@@ -0,0 +1,27 @@
+/*
+ * Fill <select data-options="group"> elements from <template id="options-group">
+ * the first time they are focused or clicked. The server renders only the
+ * selected option, so long lists are sent once per page instead of per row.
+ */
+(function () {
+  function fill(select) {
+    if (select.dataset.filled) return;
+    const template = document.getElementById("options-" + select.dataset.options);
+    if (!template) return;
+    const value = select.value;
+    select.replaceChildren(template.content.cloneNode(true));
+    select.value = value;
+    select.dataset.filled = "1";
+  }
+
+  function onUse(event) {
+    const select = event.target.closest && event.target.closest("select[data-options]");
+    if (select) fill(select);
+  }
+
+  ["focusin", "mousedown", "touchstart"].forEach(type =>
+    document.addEventListener(type, onUse, { capture: true, passive: true })
+  );
+
+  window.fillSharedOptions = fill;
+})();
@@ -5,4 +5,9 @@ register = template.Library()
 @register.filter(name='has_group')
 def has_group(user, group_name):
     """Return True if the user is in the given group."""
-    return user.groups.filter(name=group_name).exists()
+    # templates call this once per row; load the user's groups only once
+    names = getattr(user, "_group_names", None)
+    if names is None:
+        names = set(user.groups.values_list("name", flat=True)) if user.is_authenticated else set()
+        user._group_names = names
+    return group_name in names
@@ -0,0 +1,11 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def shared_options_template(group, choices):
+    """One <template id="options-<group>"> holding every option, for SharedOptionsSelect."""
+    options = format_html_join("", '<option value="{}">{}</option>', ((value, label) for value, label in choices))
+    return format_html('<template id="options-{}">{}</template>', group, options)
@@ -0,0 +1,25 @@
+from django import template
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@register.simple_tag
+def quote_cells(pr_item_id, cells):
+    """
+    The simulator grid's <td>s for one item: price and responsive toggle per
+    supplier, or an empty cell. Built here rather than with a template loop,
+    which was most of the render time for large grids.
+    """
+    html = []
+    for cell in cells:
+        if cell is None:
+            html.append("<td></td>")
+            continue
+        supplier_id, price, responsive = cell
+        html.append(format_html(
+            '<td data-cell="{}:{}">{} <input type="checkbox" class="sim-toggle"{}></td>',
+            pr_item_id, supplier_id, price, " checked" if responsive else "",
+        ))
+    return mark_safe("".join(html))
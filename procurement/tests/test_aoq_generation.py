@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from procurement.models import AbstractOfQuotation, Bid, BidLine, PRItem, PurchaseRequest, Supplier
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+
+class GenerateAOQTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        pr = PurchaseRequest.objects.create(pr_number="PR-1", created_by=self.user)
+        self.items = [
+            PRItem.objects.create(purchase_request=pr, description=f"Item {n}", quantity=2, unit="pc", unit_cost=50)
+            for n in range(3)
+        ]
+        self.rfq = _create_consolidated_rfq([pr], self.user, "")
+        self.bids = {}
+        for name, prices in (("Acme", ["10", "20", "30"]), ("Beta", ["12", "0", "25"])):
+            bid = Bid.objects.create(rfq=self.rfq, supplier=Supplier.objects.create(name=name))
+            BidLine.objects.bulk_create([
+                BidLine(bid=bid, pr_item=item, unit_price=Decimal(price)) for item, price in zip(self.items, prices)
+            ])
+            self.bids[name] = bid
+
+    def aoq_lines(self, aoq):
+        return set(aoq.lines.values_list("pr_item_id", "supplier__name", "unit_price"))
+
+    def test_generates_priced_compliant_lines(self):
+        BidLine.objects.filter(bid=self.bids["Beta"], pr_item=self.items[2]).update(compliant=False)
+        aoq, counts = AbstractOfQuotation.generate_from_bids(self.rfq)
+        self.assertEqual(counts, {"created": 4, "updated": 0, "deleted": 0})
+        self.assertEqual(self.aoq_lines(aoq), {
+            (self.items[0].pk, "Acme", Decimal("10.00")), (self.items[1].pk, "Acme", Decimal("20.00")),
+            (self.items[2].pk, "Acme", Decimal("30.00")), (self.items[0].pk, "Beta", Decimal("12.00")),
+        })
+
+    def test_rerun_only_touches_changed_rows(self):
+        aoq, _ = AbstractOfQuotation.generate_from_bids(self.rfq)
+        # nothing changed: read, compare, no writes
+        with self.assertNumQueries(6):
+            _, counts = AbstractOfQuotation.generate_from_bids(self.rfq)
+        self.assertEqual(counts, {"created": 0, "updated": 0, "deleted": 0})
+
+        BidLine.objects.filter(bid=self.bids["Acme"], pr_item=self.items[0]).update(unit_price=Decimal("9.50"))
+        self.bids["Beta"].status = "withdrawn"
+        self.bids["Beta"].save()
+        untouched = aoq.lines.get(pr_item=self.items[1], supplier__name="Acme")
+        _, counts = AbstractOfQuotation.generate_from_bids(self.rfq)
+        self.assertEqual(counts, {"created": 0, "updated": 1, "deleted": 2})
+        self.assertEqual(aoq.lines.get(pk=untouched.pk).updated_at, untouched.updated_at)
+        self.assertIn((self.items[0].pk, "Acme", Decimal("9.50")), self.aoq_lines(aoq))
+
+    def test_rerun_keeps_the_bac_responsive_marking(self):
+        aoq, _ = AbstractOfQuotation.generate_from_bids(self.rfq)
+        aoq.lines.filter(supplier__name="Beta").update(responsive=False)
+        BidLine.objects.filter(bid=self.bids["Beta"], pr_item=self.items[0]).update(unit_price=Decimal("11.00"))
+        _, counts = AbstractOfQuotation.generate_from_bids(self.rfq)
+        self.assertEqual(counts, {"created": 0, "updated": 1, "deleted": 0})
+        line = aoq.lines.get(supplier__name="Beta", pr_item=self.items[0])
+        self.assertEqual((line.unit_price, line.responsive), (Decimal("11.00"), False))
+
+    def test_only_submitted_bids_are_read(self):
+        Bid.objects.filter(pk=self.bids["Beta"].pk).update(status="awarded")
+        aoq, _ = AbstractOfQuotation.generate_from_bids(self.rfq)
+        self.assertEqual({name for _, name, _ in self.aoq_lines(aoq)}, {"Acme"})
+
+    def test_awarded_aoq_is_not_regenerated(self):
+        aoq, _ = AbstractOfQuotation.generate_from_bids(self.rfq)
+        aoq.awarded_to = self.bids["Acme"].supplier
+        aoq.save()
+        with self.assertRaises(ValidationError):
+            AbstractOfQuotation.generate_from_bids(self.rfq)
+
+    def test_view_generates_and_shows_lcrb(self):
+        response = self.client.post(reverse("procurement:generate_aoq", args=[self.rfq.pk]), follow=True)
+        aoq = self.rfq.aoq
+        self.assertRedirects(response, reverse("procurement:aoq_detail", args=[aoq.pk]))
+        self.assertIn("5 created", " ".join(str(m) for m in response.context["messages"]))
+        lcrb = aoq.lines.get(pr_item=self.items[2], supplier__name="Beta")
+        self.assertEqual(set(response.context["lcrb_line_ids"]) & {lcrb.pk}, {lcrb.pk})
@@ -0,0 +1,160 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from procurement.models import (
+    AbstractOfQuotation, Bid, BidLine, POLine, PRItem, PurchaseOrder, PurchaseRequest, RequestForQuotation,
+    Supplier,
+)
+from procurement.utils import api
+
+User = get_user_model()
+
+
+class EncodingTests(SimpleTestCase):
+    def test_stdlib_fallback_writes_the_same_json(self):
+        value = {"price": Decimal("10.50"), "at": datetime(2025, 3, 1, 8, 30, 0, 125, tzinfo=dt_timezone.utc),
+                 "on": datetime(2025, 3, 1).date(), "none": None, "text": "Ñ"}
+        fast = api.dumps(value)
+        with mock.patch.object(api, "orjson", None):
+            self.assertEqual(api.dumps(value), fast)
+        self.assertEqual(json.loads(fast)["price"], "10.50")
+
+    def test_cursor_round_trip(self):
+        cursor = api.encode_cursor(["2025-03-01T08:30:00+00:00", 7])
+        self.assertEqual(api.decode_cursor(cursor, 2), ["2025-03-01T08:30:00+00:00", 7])
+        with self.assertRaises(api.ApiError):
+            api.decode_cursor(cursor, 1)
+        with self.assertRaises(api.ApiError):
+            api.decode_cursor("not a cursor!", 2)
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user("buyer", password="x")
+        self.buyer.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.buyer)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(f"procurement:{name}"), params)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, json.loads(body)
+
+    def make_prs(self, n, items=2):
+        prs = [PurchaseRequest.objects.create(pr_number=f"01-{i:04d}-25 ICT", created_by=self.buyer) for i in range(n)]
+        PRItem.objects.bulk_create([
+            PRItem(purchase_request=pr, description=f"Item {j}", quantity=1, unit="pc", unit_cost=Decimal("12.50"))
+            for pr in prs for j in range(items)
+        ])
+        return prs
+
+    def test_sparse_fields_and_includes(self):
+        pr, = self.make_prs(1)
+        status, body = self.get("api_pr_list", fields="id,pr_number", include="items",
+                                **{"fields[items]": "description,unit_cost"})
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"next": None, "data": [{
+            "id": pr.pk, "pr_number": pr.pr_number,
+            "items": [{"description": "Item 0", "unit_cost": "12.50"}, {"description": "Item 1", "unit_cost": "12.50"}],
+        }]})
+
+    def test_only_requested_columns_are_selected(self):
+        self.make_prs(1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.get("api_pr_list", fields="pr_number")
+        select = next(q["sql"] for q in ctx.captured_queries if 'FROM "procurement_purchaserequest"' in q["sql"])
+        self.assertIn('"pr_number"', select)
+        self.assertNotIn('"purpose"', select)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def queries(n):
+            PurchaseRequest.objects.all().delete()
+            self.make_prs(n)
+            with CaptureQueriesContext(connection) as ctx:
+                status, body = self.get("api_pr_list", include="items,rfq", limit=100)
+            self.assertEqual(len(body["data"]), n)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(2), queries(40))
+
+    def test_cursor_pages_through_ties_without_gaps(self):
+        prs = self.make_prs(7, items=0)
+        PurchaseRequest.objects.filter(pk__in=[pr.pk for pr in prs[2:5]]).update(created_at=timezone.now())
+        seen, params = [], {"limit": 3, "fields": "id"}
+        while True:
+            status, body = self.get("api_pr_list", **params)
+            self.assertEqual(status, 200)
+            seen += [row["id"] for row in body["data"]]
+            if not body["next"]:
+                break
+            self.assertIn("fields=id", body["next"])
+            params["cursor"] = body["next"].split("cursor=")[1].split("&")[0]
+        expected = PurchaseRequest.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_list_view_filters_and_visibility(self):
+        requisitioner = User.objects.create_user("requisitioner", password="x")
+        requisitioner.groups.add(Group.objects.get_or_create(name="Requisitioner")[0])
+        mine = PurchaseRequest.objects.create(pr_number="01-0001-25 CAS", created_by=requisitioner)
+        PurchaseRequest.objects.create(pr_number="Unassigned", created_by=requisitioner)
+        self.make_prs(2, items=0)
+
+        _, body = self.get("api_pr_list", pr_number="CAS")
+        self.assertEqual([row["id"] for row in body["data"]], [mine.pk])
+        self.client.force_login(requisitioner)
+        _, body = self.get("api_pr_list")
+        self.assertEqual([row["id"] for row in body["data"]], [mine.pk])
+
+    def test_documents(self):
+        pr, = self.make_prs(1)
+        supplier = Supplier.objects.create(name="Acme")
+        rfq = RequestForQuotation.objects.create(purchase_request=pr, created_by=self.buyer)
+        rfq.consolidated_prs.add(pr)
+        bid = Bid.objects.create(rfq=rfq, supplier=supplier)
+        BidLine.objects.create(bid=bid, pr_item=pr.items.first(), unit_price=Decimal("11.00"))
+        aoq = AbstractOfQuotation.objects.create(rfq=rfq, awarded_to=supplier)
+        delivered = PurchaseOrder.objects.create(aoq=aoq, supplier=supplier, date_of_delivery=timezone.localdate())
+        POLine.objects.create(po=delivered, position=1, description="Item 0", quantity=1, unit="pc",
+                              unit_price=Decimal("11.00"))
+        PurchaseOrder.objects.create(aoq=aoq, supplier=supplier)
+
+        _, body = self.get("api_rfq_list", include="prs,aoq,bids", fields="id,bid_count")
+        self.assertEqual(body["data"][0]["bid_count"], 1)
+        self.assertEqual(body["data"][0]["prs"][0]["id"], pr.pk)
+        self.assertEqual(body["data"][0]["aoq"]["id"], aoq.pk)
+
+        _, body = self.get("api_bid_list", rfq=rfq.pk, include="lines,supplier")
+        self.assertEqual(body["data"][0]["supplier"]["name"], "Acme")
+        self.assertEqual(body["data"][0]["lines"][0]["unit_price"], "11.00")
+
+        _, body = self.get("api_aoq_list", status="awarded", include="pos")
+        self.assertEqual(len(body["data"][0]["pos"]), 2)
+
+        _, body = self.get("api_po_list", status="delivered", include="lines,supplier")
+        self.assertEqual([row["id"] for row in body["data"]], [delivered.pk])
+        self.assertEqual(body["data"][0]["lines"][0]["description"], "Item 0")
+
+    def test_errors(self):
+        self.assertEqual(self.get("api_pr_list", fields="id,secret")[0], 400)
+        self.assertEqual(self.get("api_pr_list", include="attachments")[0], 400)
+        self.assertEqual(self.get("api_pr_list", limit=0)[0], 400)
+        self.assertEqual(self.get("api_pr_list", cursor=api.encode_cursor(["yesterday", 1]))[0], 400)
+
+    def test_tampered_cursors(self):
+        for name, values in (("api_rfq_list", ["x"]), ("api_rfq_list", [[1]]),
+                             ("api_pr_list", [[1], 1]), ("api_pr_list", [5, 1]), ("api_pr_list", [None, "x"])):
+            with self.subTest(name=name, values=values):
+                status, body = self.get(name, cursor=api.encode_cursor(values))
+                self.assertEqual((status, body), (400, {"error": "Invalid cursor."}))
+        self.client.logout()
+        status, body = self.get("api_pr_list")
+        self.assertEqual((status, body), (401, {"error": "Authentication required."}))
@@ -0,0 +1,89 @@
+import json
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from procurement import views
+from procurement.models import PRStatusHistory, PurchaseRequest, Signatory
+from procurement.utils import metrics
+
+User = get_user_model()
+
+
+class AsyncAjaxTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user("buyer", password="x")
+        self.buyer.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.requisitioner = User.objects.create_user("requisitioner", password="x")
+        self.pr = PurchaseRequest.objects.create(mode_of_procurement="Small Value Procurement", created_by=self.buyer)
+        self.signatory = Signatory.objects.create(name="Juan", designation="BAC Chair")
+
+    def post_json(self, name, data, *args):
+        return self.async_client.post(reverse(f"procurement:{name}", args=args), json.dumps(data),
+                                      content_type="application/json")
+
+    def test_views_and_middleware_are_async(self):
+        for view in (views.update_mode_ajax, views.update_status_ajax, views.signatory_add_ajax,
+                     views.signatory_edit_ajax, views.signatory_delete_ajax):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+        # with DEBUG on, Django logs every middleware it has to wrap in a
+        # sync adapter (and each one that drops out with MiddlewareNotUsed)
+        with override_settings(DEBUG=True), self.assertLogs("django.request", "DEBUG") as logs:
+            ASGIHandler()
+        self.assertEqual([line for line in logs.output if "adapted" in line], [])
+
+    async def test_update_status(self):
+        await self.async_client.aforce_login(self.buyer)
+        response = await self.post_json("update_pr_status", {"status": "for_rfq"}, self.pr.pk)
+        self.assertEqual(response.status_code, 200, response.content)
+        pr = await PurchaseRequest.objects.aget(pk=self.pr.pk)
+        self.assertEqual(pr.status, "for_rfq")
+        self.assertEqual(await PRStatusHistory.objects.filter(purchase_request=pr, actor=self.buyer).acount(), 1)
+
+        response = await self.post_json("update_pr_status", {"status": "for_pb"}, self.pr.pk)
+        self.assertEqual(response.status_code, 400)  # not a step of this mode's flow
+
+        await self.async_client.aforce_login(self.requisitioner)
+        response = await self.post_json("update_pr_status", {"status": "for_award"}, self.pr.pk)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_update_mode_needs_procurement_group(self):
+        await self.async_client.aforce_login(self.requisitioner)
+        response = await self.post_json("update_mode_ajax", {"mode_of_procurement": "Competitive Bidding"}, self.pr.pk)
+        self.assertEqual(response.status_code, 302)
+
+        await self.async_client.aforce_login(self.buyer)
+        response = await self.post_json("update_mode_ajax", {"mode_of_procurement": "Competitive Bidding"}, self.pr.pk)
+        self.assertEqual(response.json(), {"success": True})
+        pr = await PurchaseRequest.objects.aget(pk=self.pr.pk)
+        self.assertEqual(pr.mode_of_procurement, "Competitive Bidding")
+
+    async def test_signatories(self):
+        await self.async_client.aforce_login(self.requisitioner)
+        response = await self.post_json("signatory_add_ajax", {"name": "Maria", "designation": "Head"})
+        self.assertEqual(response.status_code, 403)
+
+        await self.async_client.aforce_login(self.buyer)
+        response = await self.post_json("signatory_add_ajax", {"name": "Maria", "designation": "Head"})
+        self.assertEqual(response.json()["name"], "Maria")
+        response = await self.async_client.post(reverse("procurement:signatory_edit_ajax", args=[self.signatory.pk]),
+                                                {"name": "Juan", "designation": "BAC Vice Chair"})
+        self.assertEqual(response.json(), {"success": True})
+        self.assertEqual((await Signatory.objects.aget(pk=self.signatory.pk)).designation, "BAC Vice Chair")
+
+        response = await self.async_client.post(reverse("procurement:signatory_delete_ajax", args=[self.signatory.pk]))
+        self.assertEqual(response.json(), {"success": True})
+        response = await self.async_client.post(reverse("procurement:signatory_delete_ajax", args=[self.signatory.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_queries_of_async_views_are_counted(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        await self.async_client.aforce_login(self.buyer)
+        await self.post_json("update_pr_status", {"status": "for_rfq"}, self.pr.pk)
+        queries = metrics._counters[metrics._key("db_queries_total", {"view": "procurement:update_pr_status"})]
+        self.assertGreaterEqual(queries, 4)  # session, user, groups, PR, status write...
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from procurement.models import ActionLog, PurchaseRequest
+from procurement.utils import audit
+
+User = get_user_model()
+
+
+class BufferedAuditLogTests(TransactionTestCase):
+    # outside any transaction, so entries go straight to the buffer
+    def setUp(self):
+        self.user = User.objects.create_user("proc", "proc@example.com", "pass")
+        self.pr = PurchaseRequest.objects.create(created_by=self.user)
+
+    def tearDown(self):
+        audit.flush()
+
+    def test_entries_are_buffered_until_flush(self):
+        audit.log_action(self.user, "pr.submitted", self.pr)
+        self.assertEqual(ActionLog.objects.count(), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(audit.flush(), 1)
+        self.assertEqual(sum(q["sql"].startswith("INSERT") for q in queries.captured_queries), 1)
+        entry = ActionLog.objects.get()
+        self.assertEqual((entry.action, entry.target_type, entry.target_id), ("pr.submitted", "purchaserequest", self.pr.pk))
+
+    @override_settings(AUDIT_LOG_BUFFER_SIZE=3)
+    def test_size_threshold_flushes(self):
+        for _ in range(3):
+            audit.log_action(self.user, "pr.updated", self.pr)
+        self.assertEqual(ActionLog.objects.count(), 3)
+
+
+
+class TransactionalAuditLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("proc", "proc@example.com", "pass")
+        self.pr = PurchaseRequest.objects.create(created_by=self.user)
+
+    def tearDown(self):
+        audit.flush()
+
+    def test_transaction_entries_flush_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for _ in range(5):
+                    audit.log_action(self.user, "pr.status_changed", self.pr)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(ActionLog.objects.count(), 5)
+
+    def test_rolled_back_entries_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit.log_action(self.user, "aoq.awarded", self.pr)
+                    raise ValueError
+            except ValueError:
+                pass
+        audit.flush()
+        self.assertEqual(ActionLog.objects.count(), 0)
+
+    def test_savepoint_rollback_drops_only_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.log_action(self.user, "pr.submitted", self.pr)
+                try:
+                    with transaction.atomic():
+                        audit.log_action(self.user, "pr.cancelled", self.pr)
+                        raise ValueError
+                except ValueError:
+                    pass
+                audit.log_action(self.user, "pr.verified", self.pr)
+        self.assertEqual(list(ActionLog.objects.order_by("pk").values_list("action", flat=True)),
+                         ["pr.submitted", "pr.verified"])
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from procurement.models import (
+    AbstractOfQuotation, AOQLine, DocumentSequence, PRItem, PRStatusHistory, PurchaseOrder, PurchaseRequest, Supplier,
+)
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+# supplier -> unit prices for PR-A items 0-1 and PR-B items 0-1 (None = no quote)
+PRICES = {
+    "Acme": ["10", "30", "5", "5"],
+    "Beta": ["12", "20", "6", None],
+}
+
+
+class SplitAwardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        self.prs = [PurchaseRequest.objects.create(pr_number=name, created_by=self.user) for name in ("PR-A", "PR-B")]
+        self.items = [
+            PRItem.objects.create(purchase_request=pr, description=f"{pr.pr_number} {n}", quantity=2, unit="pc", unit_cost=50)
+            for pr in self.prs for n in range(2)
+        ]
+        self.rfq = _create_consolidated_rfq(self.prs, self.user, "")
+        self.aoq = AbstractOfQuotation.objects.create(rfq=self.rfq)
+        self.suppliers = {}
+        for name, prices in PRICES.items():
+            supplier = self.suppliers[name] = Supplier.objects.create(name=name)
+            AOQLine.objects.bulk_create([
+                AOQLine(aoq=self.aoq, pr_item=item, supplier=supplier, unit_price=Decimal(price))
+                for item, price in zip(self.items, prices) if price
+            ])
+
+    def ids(self, *names):
+        return [self.suppliers[name].pk for name in names]
+
+    def by_item(self, awards):
+        return [awards.get(item.pk) for item in self.items]
+
+    def test_item_and_lot_strategies(self):
+        self.assertEqual(self.by_item(self.aoq.item_awards()), self.ids("Acme", "Beta", "Acme", "Acme"))
+        # PR-A: Acme 80 vs Beta 64; PR-B: only Acme quoted both items
+        self.assertEqual(self.by_item(self.aoq.lot_awards()), self.ids("Beta", "Beta", "Acme", "Acme"))
+
+    def test_split_award_creates_one_po_per_supplier(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pos = self.aoq.award_items(self.aoq.item_awards(), awarded_by=self.user)
+        year = pos[0].submission_date.year
+        self.assertEqual([po.po_number for po in pos], [f"PO-{year}-00001", f"PO-{year}-00002"])
+        self.assertEqual([po.supplier.name for po in pos], ["Acme", "Beta"])
+        self.assertEqual(
+            [(line.description, line.unit_price) for line in pos[0].lines.all()],
+            [("PR-A 0", Decimal("10.00")), ("PR-B 0", Decimal("5.00")), ("PR-B 1", Decimal("5.00"))],
+        )
+        self.assertEqual(pos[1].total_amount(), Decimal("40.00"))
+        self.assertEqual(DocumentSequence.objects.get(document_type="po", fiscal_year=year).last_value, 2)
+
+        self.aoq.refresh_from_db()
+        self.assertTrue(self.aoq.is_awarded)
+        self.assertIsNone(self.aoq.awarded_to)  # split between two suppliers
+        # each PR moves to po_issued once, not once per PO
+        self.assertEqual(PRStatusHistory.objects.filter(to_status="po_issued").count(), 2)
+
+        with self.assertRaises(ValidationError):
+            self.aoq.award_items(self.aoq.item_awards())
+
+    def test_award_needs_a_responsive_quote(self):
+        AOQLine.objects.filter(supplier__name="Beta").update(responsive=False)
+        awards = dict(zip([item.pk for item in self.items], self.ids("Acme", "Beta", "Acme", "Acme")))
+        with self.assertRaises(ValidationError):
+            self.aoq.award_items(awards)
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_single_supplier_award(self):
+        po = self.aoq.award(self.suppliers["Acme"].pk, awarded_by=self.user)
+        self.assertEqual(po.lines.count(), 4)
+        self.aoq.refresh_from_db()
+        self.assertEqual(self.aoq.awarded_to, self.suppliers["Acme"])
+
+    def test_generate_po_view_per_lot(self):
+        response = self.client.post(reverse("procurement:aoq_generate_po", args=[self.aoq.pk]), {"strategy": "lot"})
+        self.assertRedirects(response, reverse("procurement:aoq_detail", args=[self.aoq.pk]), fetch_redirect_response=False)
+        self.assertEqual(
+            sorted(PurchaseOrder.objects.values_list("supplier__name", flat=True)), ["Acme", "Beta"],
+        )
+        self.assertEqual(self.client.get(reverse("procurement:aoq_generate_po", args=[self.aoq.pk])).status_code, 405)
+
+    def test_partial_award_is_refused_and_only_awarded_prs_move(self):
+        # nobody responsively quoted all of PR-B any more: its lot is left out
+        AOQLine.objects.filter(supplier__name="Acme", pr_item=self.items[3]).update(responsive=False)
+        awards = self.aoq.lot_awards()
+        self.assertEqual(self.by_item(awards), self.ids("Beta", "Beta") + [None, None])
+
+        url = reverse("procurement:aoq_generate_po", args=[self.aoq.pk])
+        response = self.client.post(url, {"strategy": "lot"})
+        self.assertRedirects(response, reverse("procurement:aoq_detail", args=[self.aoq.pk]), fetch_redirect_response=False)
+        self.assertFalse(PurchaseOrder.objects.exists())
+        self.aoq.refresh_from_db()
+        self.assertFalse(self.aoq.is_awarded)
+
+        # awarded directly, only the PR that got a PO is marked as such
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aoq.award_items(awards, awarded_by=self.user)
+        self.assertEqual(
+            list(PRStatusHistory.objects.filter(to_status="po_issued").values_list("purchase_request__pr_number", flat=True)),
+            ["PR-A"],
+        )
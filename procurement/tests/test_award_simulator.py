@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from procurement.models import AbstractOfQuotation, AOQLine, PRItem, PurchaseRequest, Supplier
+from procurement.utils.award_simulator import BidMatrix, simulate
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+
+def matrix(quotes, lots=("A", "A", "B")):
+    """Three items of quantity 2 and ABC 100 each; quotes: {item: {supplier: price or (price, responsive)}}."""
+    items = {n: (lot, 2, Decimal("100")) for n, lot in enumerate(lots)}
+    return BidMatrix(items, {
+        item: {s: q if isinstance(q, tuple) else (Decimal(q), True) for s, q in by_supplier.items()}
+        for item, by_supplier in quotes.items()
+    })
+
+
+class SimulateTests(SimpleTestCase):
+    QUOTES = {
+        0: {1: "10", 2: "12"},
+        1: {1: "30", 2: "20"},
+        2: {1: "5", 2: "6", 3: "4"},
+    }
+
+    def results(self, quotes):
+        return {result["key"]: result for result in simulate(matrix(quotes))}
+
+    def test_strategies_side_by_side(self):
+        results = self.results(self.QUOTES)
+        self.assertEqual(results["single"]["awards"], {0: 2, 1: 2, 2: 2})
+        self.assertEqual(results["single"]["total"], Decimal("76"))
+        self.assertEqual(results["item"]["awards"], {0: 1, 1: 2, 2: 3})
+        self.assertEqual((results["item"]["total"], results["item"]["po_count"]), (Decimal("68"), 3))
+        self.assertEqual(results["lot"]["awards"], {0: 2, 1: 2, 2: 3})
+        self.assertEqual(results["lot"]["savings"], Decimal("300") - Decimal("72"))
+        self.assertEqual(results["single"]["top_share_pct"], Decimal("100"))
+
+    def test_non_responsive_quotes_are_skipped(self):
+        quotes = {**self.QUOTES, 2: {1: "5", 2: (Decimal("6"), False), 3: "4"}}
+        results = self.results(quotes)
+        # Beta no longer has a responsive quote on every item
+        self.assertEqual(results["single"]["awards"], {0: 1, 1: 1, 2: 1})
+        self.assertEqual(results["single"]["total"], Decimal("90"))
+
+    def test_items_without_quotes_stay_unawarded(self):
+        results = self.results({0: {1: "10"}})
+        self.assertEqual(results["item"]["unawarded_items"], 2)
+        self.assertEqual(results["single"]["po_count"], 0)
+        self.assertEqual(results["single"]["savings_pct"], 0)
+
+
+class SimulatorViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        pr = PurchaseRequest.objects.create(pr_number="PR-1", created_by=self.user)
+        PRItem.objects.bulk_create([
+            PRItem(purchase_request=pr, description=f"Item {n}", quantity=1, unit="pc", unit_cost=100) for n in range(20)
+        ])
+        rfq = _create_consolidated_rfq([pr], self.user, "")
+        self.aoq = AbstractOfQuotation.objects.create(rfq=rfq)
+        self.items = list(rfq.items.values_list("pr_item_id", flat=True))
+        self.acme, self.beta = Supplier.objects.create(name="Acme"), Supplier.objects.create(name="Beta")
+        AOQLine.objects.bulk_create([
+            AOQLine(aoq=self.aoq, pr_item_id=item, supplier=supplier, unit_price=price)
+            for item in self.items for supplier, price in ((self.acme, 50), (self.beta, 60))
+        ])
+
+    def test_toggling_responsiveness_recomputes(self):
+        url = reverse("procurement:aoq_simulate", args=[self.aoq.pk])
+        item = next(r for r in self.client.get(url).json()["results"] if r["key"] == "item")
+        self.assertEqual((item["total"], item["suppliers"][0]["name"]), ("1000.00", "Acme"))
+
+        response = self.client.get(url, {"off": [f"{self.items[0]}:{self.acme.pk}", "junk"]})
+        results = {r["key"]: r for r in response.json()["results"]}
+        self.assertEqual(results["item"]["total"], "1010.00")
+        self.assertEqual(results["item"]["po_count"], 2)
+        self.assertEqual(results["single"]["suppliers"][0]["name"], "Beta")
+        self.assertTrue(AOQLine.objects.get(pr_item_id=self.items[0], supplier=self.acme).responsive)  # not saved
+
+    def test_simulator_page(self):
+        AOQLine.objects.filter(supplier=self.beta, pr_item_id=self.items[1]).update(responsive=False)
+        response = self.client.get(reverse("procurement:aoq_simulator", args=[self.aoq.pk]))
+        self.assertContains(response, f'<td data-cell="{self.items[0]}:{self.acme.pk}">50.00 <input type="checkbox" class="sim-toggle" checked></td>', html=False)
+        self.assertContains(response, f'<td data-cell="{self.items[1]}:{self.beta.pk}">60.00 <input type="checkbox" class="sim-toggle"></td>', html=False)
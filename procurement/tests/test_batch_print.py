@@ -0,0 +1,135 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from procurement.models import PrintJob, PurchaseRequest, RequestForQuotation
+from procurement.utils.batch_print import render_documents, run_print_job
+from procurement.utils.pdf import merge_pdfs
+
+User = get_user_model()
+
+
+def missing_pdf_library(*names):
+    """Why ``names`` cannot be imported here (see requirements.txt), or None."""
+    for name in names:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                __import__(name)
+        except (ImportError, OSError) as exc:  # WeasyPrint raises OSError without Pango
+            return f"{name}: {exc}"
+    return None
+
+
+class BatchPrintTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        self.prs = [PurchaseRequest.objects.create(pr_number=f"PR-{i}", created_by=self.user) for i in range(3)]
+
+    def test_create_job_from_list_selection(self):
+        ids = [str(self.prs[2].pk), str(self.prs[0].pk)]
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse("procurement:print_job_create", args=["pr"]), {"ids": ids})
+        self.assertRedirects(response, reverse("procurement:print_jobs"))
+        job = PrintJob.objects.get()
+        self.assertEqual((job.kind, job.status, job.created_by), ("pr", "pending", self.user))
+        self.assertEqual(job.document_ids, [self.prs[2].pk, self.prs[0].pk])
+        # the background runner starts once the job row is committed
+        self.assertIn("create_print_job", " ".join(getattr(cb, "__qualname__", "") for cb in callbacks))
+
+    def test_linked_prs_are_printable_but_not_consolidated(self):
+        RequestForQuotation.objects.create(purchase_request=self.prs[0], created_by=self.user)
+        response = self.client.get(reverse("procurement:pr_list"))
+        self.assertContains(response, f'value="{self.prs[0].pk}" data-linked="1"')
+
+        # a stale page may still post it; the server is the guard
+        self.client.post(reverse("procurement:consolidate_to_rfq"), {"selected_prs": f"{self.prs[0].pk},{self.prs[1].pk}"})
+        self.assertEqual(RequestForQuotation.objects.count(), 1)
+        self.client.post(reverse("procurement:print_job_create", args=["pr"]), {"ids": [self.prs[0].pk]})
+        self.assertEqual(PrintJob.objects.get().document_ids, [self.prs[0].pk])
+
+    def test_requires_selection_and_procurement_group(self):
+        response = self.client.post(reverse("procurement:print_job_create", args=["pr"]), {})
+        self.assertRedirects(response, reverse("procurement:pr_list"), fetch_redirect_response=False)
+
+        self.client.force_login(User.objects.create_user("requisitioner", password="x"))
+        response = self.client.post(reverse("procurement:print_job_create", args=["pr"]), {"ids": [self.prs[0].pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(PrintJob.objects.exists())
+
+    def test_render_documents_keeps_order_and_skips_missing(self):
+        rendered = render_documents("pr", [self.prs[1].pk, 999, self.prs[0].pk])
+        self.assertEqual([title for title, _ in rendered], ["PR PR-1", "PR PR-0"])
+
+        rfq = RequestForQuotation.objects.create(rfq_number="RFQ-1", created_by=self.user)
+        rfq.consolidated_prs.set(self.prs[:2])
+        (title, html), = render_documents("rfq", [rfq.pk])
+        self.assertEqual(title, "RFQ RFQ-1")
+        self.assertIn("REQUEST FOR QUOTATION", html)
+        self.assertNotIn("navbar", html)  # printed without the site chrome
+
+    def test_job_with_no_remaining_documents_fails(self):
+        job = PrintJob.objects.create(kind="pr", document_ids=[999], created_by=self.user)
+        with self.assertLogs("procurement.utils.batch_print", "ERROR"):
+            self.assertTrue(run_print_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("None of the selected documents", job.error)
+        self.assertFalse(run_print_job(job.pk))  # only pending jobs are claimed
+
+    def test_download_only_for_owner(self):
+        job = PrintJob.objects.create(kind="pr", document_ids=[self.prs[0].pk], created_by=self.user, status="done")
+        job.file.save("batch.pdf", ContentFile(b"%PDF-1.7 test"))
+        url = reverse("procurement:print_job_download", args=[job.pk])
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7 test")
+
+        other = User.objects.create_user("other", password="x")
+        other.groups.add(Group.objects.get(name="Procurement"))
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    @unittest.skipIf(missing_pdf_library("pypdf"), missing_pdf_library("pypdf"))
+    def test_merge_keeps_order_with_a_bookmark_per_document(self):
+        from pypdf import PdfReader, PdfWriter
+
+        documents = []
+        for title, pages in (("PR PR-0", 2), ("PR PR-1", 1)):
+            writer, buffer = PdfWriter(), io.BytesIO()
+            for _ in range(pages):
+                writer.add_blank_page(width=612, height=792)
+            writer.write(buffer)
+            documents.append((title, buffer.getvalue()))
+        data, page_count = merge_pdfs(documents)
+        reader = PdfReader(io.BytesIO(data))
+        self.assertEqual([item.title for item in reader.outline], ["PR PR-0", "PR PR-1"])
+        self.assertEqual((len(reader.pages), page_count), (3, 3))
+
+    @unittest.skipIf(missing_pdf_library("weasyprint", "pypdf"), missing_pdf_library("weasyprint", "pypdf"))
+    @override_settings(BATCH_PRINT={"WORKERS": 2, "MAX_DOCUMENTS": 200})
+    def test_merged_pdf_has_a_bookmark_per_document(self):
+        from pypdf import PdfReader
+
+        job = PrintJob.objects.create(kind="pr", document_ids=[pr.pk for pr in self.prs], created_by=self.user)
+        run_print_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done", job.error)
+        with job.file.open("rb") as fh:
+            reader = PdfReader(io.BytesIO(fh.read()))
+        self.assertEqual([item.title for item in reader.outline], ["PR PR-0", "PR PR-1", "PR PR-2"])
+        self.assertEqual(len(reader.pages), job.page_count)
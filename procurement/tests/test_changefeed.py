@@ -0,0 +1,122 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from procurement.api import CHANGE_RESOURCES
+from procurement.models import ChangeLog, PRItem, PurchaseRequest
+from procurement.utils import changelog
+
+User = get_user_model()
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user("buyer", password="x")
+        self.buyer.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.buyer)
+
+    def get(self, **params):
+        response = self.client.get(reverse("procurement:api_changes"), params)
+        return response.status_code, json.loads(response.content)
+
+    def changes(self, cursor, **params):
+        status, body = self.get(cursor=cursor, **params)
+        self.assertEqual(status, 200)
+        return [(c["model"], c["id"], c["op"]) for c in body["changes"]], body
+
+    def test_every_tracked_model_has_a_resource(self):
+        self.assertEqual(set(CHANGE_RESOURCES), set(changelog.TRACKED))
+
+    def test_triggers_record_bulk_and_queryset_writes(self):
+        cursor = self.get()[1]["cursor"]
+        pr = PurchaseRequest.objects.create(pr_number="01-0001-25 ICT", created_by=self.buyer)
+        items = PRItem.objects.bulk_create([
+            PRItem(purchase_request=pr, description=f"Item {i}", quantity=1, unit="pc", unit_cost=Decimal("5"))
+            for i in range(2)
+        ])
+        PRItem.objects.filter(pk=items[0].pk).update(quantity=3)
+        log = ChangeLog.objects.filter(pk__gt=cursor)
+        self.assertEqual(list(log.filter(model="pr_item").values_list("object_id", "action")),
+                         [(items[0].pk, "i"), (items[1].pk, "i"), (items[0].pk, "u")])
+
+        pr_id = pr.pk
+        pr.delete()  # cascades to the items
+        self.assertEqual(
+            set(log.filter(action="d").values_list("model", "object_id")),
+            {("pr", pr_id), ("pr_item", items[0].pk), ("pr_item", items[1].pk)},
+        )
+
+    def test_deltas_are_coalesced(self):
+        cursor = self.get()[1]["cursor"]
+        kept = PurchaseRequest.objects.create(pr_number="01-0001-25 ICT", created_by=self.buyer)
+        gone = PurchaseRequest.objects.create(pr_number="01-0002-25 ICT", created_by=self.buyer)
+        PurchaseRequest.objects.filter(pk=kept.pk).update(purpose="Updated")
+        gone_id = gone.pk
+        gone.delete()
+
+        changes, body = self.changes(cursor)
+        self.assertEqual(changes, [("pr", kept.pk, "upsert"), ("pr", gone_id, "delete")])
+        self.assertEqual(body["changes"][0]["data"]["purpose"], "Updated")
+        self.assertEqual(body["cursor"], changelog.head())
+        self.assertFalse(body["more"])
+        self.assertEqual(self.changes(body["cursor"])[0], [])
+
+    def test_cursor_pages_and_model_filter(self):
+        cursor = self.get()[1]["cursor"]
+        prs = [PurchaseRequest.objects.create(created_by=self.buyer) for _ in range(5)]
+        PRItem.objects.create(purchase_request=prs[0], description="Item", quantity=1, unit="pc", unit_cost=Decimal("5"))
+        seen = []
+        while True:
+            changes, body = self.changes(cursor, limit=2, models="pr")
+            seen += [object_id for _, object_id, _ in changes]
+            cursor = body["cursor"]
+            if not body["more"]:
+                break
+        self.assertEqual(seen, [pr.pk for pr in prs])
+
+    @override_settings(CHANGEFEED={"SETTLE_SECONDS": 60})
+    def test_recent_changes_wait_to_settle(self):
+        cursor = self.get()[1]["cursor"]
+        PurchaseRequest.objects.create(created_by=self.buyer)
+        changes, body = self.changes(cursor)
+        self.assertEqual((changes, body["cursor"], body["more"]), ([], cursor, False))
+        ChangeLog.objects.filter(pk__gt=cursor).update(changed_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(len(self.changes(cursor)[0]), 1)
+
+    @override_settings(CHANGEFEED={"SETTLE_SECONDS": 60})
+    def test_first_cursor_stays_behind_unsettled_changes(self):
+        settled = PurchaseRequest.objects.create(created_by=self.buyer)
+        ChangeLog.objects.update(changed_at=timezone.now() - timedelta(minutes=5))
+        cursor = self.get()[1]["cursor"]
+        self.assertEqual(cursor, ChangeLog.objects.get(model="pr", object_id=settled.pk).pk)
+
+        fresh = PurchaseRequest.objects.create(created_by=self.buyer)
+        self.assertEqual(self.get()[1]["cursor"], cursor)  # fresh may have uncommitted predecessors
+        ChangeLog.objects.filter(pk__gt=cursor).update(changed_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.changes(cursor)[0], [("pr", fresh.pk, "upsert")])
+
+    def test_pruned_cursor_is_gone(self):
+        for _ in range(3):
+            PurchaseRequest.objects.create(created_by=self.buyer)
+        ChangeLog.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        call_command("prune_changelog", days=30, stdout=StringIO())
+        self.assertEqual(ChangeLog.objects.count(), 1)  # the newest stays
+        self.assertEqual(self.get(cursor=0)[0], 410)
+        self.assertEqual(self.get(cursor=changelog.head())[0], 200)
+
+    def test_errors_and_permissions(self):
+        self.assertEqual(self.get(cursor="x")[0], 400)
+        self.assertEqual(self.get(cursor=0, models="pr,supplier")[0], 400)
+        requisitioner = User.objects.create_user("requisitioner", password="x")
+        self.client.force_login(requisitioner)
+        self.assertEqual(self.get()[0], 403)
+        self.client.logout()
+        self.assertEqual(self.get(), (401, {"error": "Authentication required."}))
@@ -0,0 +1,48 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from procurement.forms import PRItemForm
+from procurement.models import PurchaseRequest
+
+User = get_user_model()
+
+
+class CompactRowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.create(name="Procurement"))
+        self.client.force_login(self.user)
+
+    def add_prs(self, n, start=0):
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(pr_number=f"PR-{i:04}", created_by=self.user, office_section="Registrar",
+                            mode_of_procurement="Negotiated Procurement", negotiated_type="Emergency Cases")
+            for i in range(start, start + n)
+        ])
+
+    def test_pr_list_grows_by_bytes_per_row_not_kilobytes(self):
+        self.add_prs(10)
+        small = self.client.get(reverse("procurement:pr_list")).content
+        self.add_prs(100, start=10)
+        large = self.client.get(reverse("procurement:pr_list")).content
+        per_row = (len(large) - len(small)) / 100
+        self.assertLess(per_row, 2000)
+        # option lists are sent once per page, not once per row
+        for label in (b"Limited Source Bidding", b"Highly Technical Consultants"):
+            self.assertEqual(small.count(label), large.count(label))
+
+    def test_html_is_gzipped(self):
+        self.add_prs(20)
+        response = self.client.get(reverse("procurement:pr_list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"PR-0019", gzip.decompress(response.content))
+
+    def test_unit_select_renders_only_selected_option(self):
+        html = str(PRItemForm(initial={"unit": "ream"})["unit"])
+        self.assertIn('data-options="unit"', html)
+        self.assertIn('value="ream"', html)
+        self.assertEqual(html.count("<option"), 1)
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from procurement.models import PurchaseRequest, PRItem
+
+User = get_user_model()
+
+
+class ConditionalPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("req", "req@example.com", "pass")
+        self.client.force_login(self.user)
+        self.pr = PurchaseRequest.objects.create(pr_number="10-0042-25 Registrar", created_by=self.user)
+        self.item = PRItem.objects.create(
+            purchase_request=self.pr, description="Bond paper", quantity=10, unit="ream", unit_cost=250
+        )
+        self.url = reverse("procurement:pr_preview", args=[self.pr.pk])
+
+    def test_unchanged_page_returns_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header("ETag"))
+
+        # session + user + one validator query, no rendering
+        with self.assertNumQueries(3):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_item_change_invalidates_etag(self):
+        first = self.client.get(self.url)
+        self.item.quantity = 12
+        self.item.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_item_removal_invalidates_etag(self):
+        first = self.client.get(self.url)
+        self.item.delete()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
@@ -0,0 +1,126 @@
+from datetime import date
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from procurement.models import (
+    AbstractOfQuotation, DocumentSequence, PurchaseOrder, PurchaseRequest, RequestForQuotation, Supplier, fiscal_year,
+)
+
+User = get_user_model()
+
+
+class DocumentSequenceTests(TestCase):
+    def test_blocks_per_type_and_fiscal_year(self):
+        self.assertEqual(list(DocumentSequence.take("po", 3, 2026)), [1, 2, 3])
+        self.assertEqual(list(DocumentSequence.take("po", 2, 2026)), [4, 5])
+        self.assertEqual(list(DocumentSequence.take("po", 1, 2027)), [1])
+        self.assertEqual(list(DocumentSequence.take("rfq", 1, 2026)), [1])
+        self.assertEqual(
+            DocumentSequence.next_numbers("aoq", 2, date=date(2026, 3, 1)), ["AOQ-2026-00001", "AOQ-2026-00002"],
+        )
+        self.assertEqual(DocumentSequence.next_number("pr", date=date(2026, 3, 1), office="Registrar"), "03-0001-26 Registrar")
+
+    def test_advance_only_moves_forward(self):
+        DocumentSequence.take("pr", 5, 2026)
+        DocumentSequence.advance("pr", 3, 2026)
+        DocumentSequence.advance("pr", 9, 2026)
+        self.assertEqual(list(DocumentSequence.take("pr", 1, 2026)), [10])
+
+    @override_settings(FISCAL_YEAR_START_MONTH=7)
+    def test_fiscal_year(self):
+        self.assertEqual(fiscal_year(date(2026, 6, 30)), 2025)
+        self.assertEqual(fiscal_year(date(2026, 7, 1)), 2026)
+
+
+class NumberingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x", is_staff=True, is_superuser=True)
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        self.year = fiscal_year()
+
+    def test_numbers_are_assigned_in_the_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rfq = RequestForQuotation.objects.create(created_by=self.user)
+        writes = [q["sql"] for q in ctx.captured_queries if "procurement_requestforquotation" in q["sql"]]
+        self.assertEqual(len(writes), 1)
+        self.assertIn("INSERT", writes[0])
+        self.assertEqual(rfq.rfq_number, f"RFQ-{self.year}-00001")
+
+        aoq = AbstractOfQuotation.objects.create(rfq=rfq)
+        po = PurchaseOrder.objects.create(aoq=aoq, supplier=Supplier.objects.create(name="Acme"))
+        self.assertEqual((aoq.aoq_number, po.po_number), (f"AOQ-{self.year}-00001", f"PO-{self.year}-00001"))
+
+        # a number given explicitly is kept and doesn't use up one
+        self.assertEqual(RequestForQuotation.objects.create(rfq_number="RFQ-OLD").rfq_number, "RFQ-OLD")
+        self.assertEqual(RequestForQuotation.objects.create().rfq_number, f"RFQ-{self.year}-00002")
+
+    def test_failed_insert_gives_the_number_back(self):
+        rfq = RequestForQuotation.objects.create()
+        AbstractOfQuotation.objects.create(rfq=rfq)
+        duplicate = AbstractOfQuotation(rfq=rfq)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            duplicate.save()
+        self.assertIsNone(duplicate.aoq_number)
+        self.assertEqual(AbstractOfQuotation.objects.create(rfq=RequestForQuotation.objects.create()).aoq_number,
+                         f"AOQ-{self.year}-00002")
+
+    def test_consolidated_rfqs_no_longer_collide(self):
+        for n in range(2):
+            pr = PurchaseRequest.objects.create(pr_number=f"10-000{n}-26 Registrar", created_by=self.user)
+            self.client.post(reverse("procurement:consolidate_to_rfq"), {"selected_prs": str(pr.pk)})
+        self.assertEqual(
+            sorted(RequestForQuotation.objects.values_list("rfq_number", flat=True)),
+            [f"RFQ-{self.year}-00001", f"RFQ-{self.year}-00002"],
+        )
+
+    def test_linked_prs_are_not_consolidated_again(self):
+        consolidated, fresh, own = (
+            PurchaseRequest.objects.create(pr_number=f"10-000{n}-26 Registrar", created_by=self.user) for n in range(3)
+        )
+        url = reverse("procurement:consolidate_to_rfq")
+        self.client.post(url, {"selected_prs": str(consolidated.pk)})
+        first = RequestForQuotation.objects.get()
+        RequestForQuotation.objects.create(purchase_request=own)
+
+        response = self.client.post(url, {"selected_prs": f"{consolidated.pk},{fresh.pk},{own.pk}"}, follow=True)
+        self.assertEqual([str(m) for m in response.context["messages"]][-1],
+                         "Already on an RFQ: 10-0000-26 Registrar, 10-0002-26 Registrar.")
+        self.assertEqual(RequestForQuotation.objects.count(), 2)
+        consolidated.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((consolidated.consolidated_in, fresh.consolidated_in), (first, None))
+
+    def test_assign_pr_number(self):
+        pr = PurchaseRequest.objects.create(office_section="Registrar", created_by=self.user)
+        url = reverse("procurement:assign_pr_number", args=[pr.pk])
+        self.client.post(url, {"pr_number": "", "pr_date": "2026-10-01"})
+        pr.refresh_from_db()
+        self.assertRegex(pr.pr_number, rf"^\d\d-0001-{self.year % 100:02d} Registrar$")
+
+        typed = PurchaseRequest.objects.create(created_by=self.user)
+        self.client.post(reverse("procurement:assign_pr_number", args=[typed.pk]),
+                         {"pr_number": f"01-0040-{self.year % 100:02d} Library", "pr_date": "2026-10-01"})
+        # the sequence continues after the number typed in by hand
+        self.assertEqual(DocumentSequence.objects.get(document_type="pr", fiscal_year=self.year).last_value, 40)
+
+    def test_admin_action_reserves_one_block(self):
+        prs = [PurchaseRequest.objects.create(office_section="Library", created_by=self.user) for _ in range(3)]
+        PurchaseRequest.objects.create(pr_number="01-0001-26 Kept", created_by=self.user)
+        DocumentSequence.objects.create(document_type="pr", fiscal_year=self.year, last_value=4)
+        request = RequestFactory().post("/")
+        request.user = self.user
+        model_admin = admin.site._registry[PurchaseRequest]
+        model_admin.message_user = lambda *args, **kwargs: None
+        with self.assertNumQueries(8):  # however many PRs there are
+            model_admin.assign_pr_numbers(request, PurchaseRequest.objects.all())
+        numbers = [PurchaseRequest.objects.get(pk=pr.pk).pr_number for pr in prs]
+        self.assertEqual([number[3:7] for number in numbers], ["0005", "0006", "0007"])
+        self.assertTrue(all(number.endswith(" Library") for number in numbers))
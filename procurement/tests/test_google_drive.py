@@ -0,0 +1,24 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from procurement.utils.google_drive import DriveService
+
+
+class DriveServiceTests(SimpleTestCase):
+    def test_each_thread_gets_its_own_client_on_shared_credentials(self):
+        service = DriveService("credentials.json")
+        clients = []
+        with mock.patch("google.oauth2.service_account.Credentials.from_service_account_file") as load, \
+                mock.patch("googleapiclient.discovery.build", side_effect=lambda *a, **kw: object()) as build:
+            clients.append(service.client)
+            clients.append(service.client)
+            thread = threading.Thread(target=lambda: clients.append(service.client))
+            thread.start()
+            thread.join()
+
+        self.assertIs(clients[0], clients[1])
+        self.assertIsNot(clients[0], clients[2])
+        self.assertEqual(build.call_count, 2)
+        load.assert_called_once()
@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# cumulative import time of procurement.urls (views, forms, utils), in ms;
+# ~50 ms here, ~145 ms when the Google client was imported eagerly. Generous,
+# so slow CI machines pass; tighten it locally with the environment variable.
+IMPORT_BUDGET_MS = int(os.environ.get("PROCUREMENT_IMPORT_BUDGET_MS", 250))
+
+HEAVY_MODULES = ("googleapiclient", "google.oauth2", "google.auth", "httplib2")
+
+
+def run(code, *options):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="evsu_procurement_system.settings")
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def modules_after(code):
+    """Names in sys.modules after running ``code`` in a fresh interpreter."""
+    result = run(f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def import_times(code):
+    """Run ``code`` under ``python -X importtime``; {module: cumulative us}."""
+    times = {}
+    for line in run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+class ImportTimeTests(SimpleTestCase):
+    code = "import django; django.setup(); import procurement.urls, procurement.views, procurement.admin"
+
+    def test_google_client_is_not_imported_at_startup(self):
+        modules = modules_after(self.code)
+        self.assertIn("procurement.views", modules)
+        self.assertEqual([m for m in modules if m.startswith(HEAVY_MODULES)], [])
+
+    def test_procurement_import_budget(self):
+        # best of three: the first run may compile bytecode, and a busy
+        # machine slows any single run down
+        elapsed_ms = min(import_times(self.code)["procurement.urls"] for _ in range(3)) / 1000
+        self.assertLess(elapsed_ms, IMPORT_BUDGET_MS,
+                        f"importing procurement.urls took {elapsed_ms:.0f} ms")
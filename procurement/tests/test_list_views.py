@@ -0,0 +1,72 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from procurement.models import (
+    AbstractOfQuotation, Bid, PurchaseOrder, PurchaseRequest, RequestForQuotation, Supplier,
+)
+
+User = get_user_model()
+
+
+class DocumentListViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_login(self.user)
+        self.suppliers = [Supplier.objects.create(name=f"Supplier {i}") for i in range(2)]
+        self.count = 0
+
+    def add_documents(self, n):
+        for _ in range(n):
+            self.count += 1
+            prs = [PurchaseRequest.objects.create(pr_number=f"PR-{self.count}-{j}", created_by=self.user)
+                   for j in range(2)]
+            rfq = RequestForQuotation.objects.create(rfq_number=f"RFQ-{self.count}", created_by=self.user)
+            rfq.consolidated_prs.set(prs)
+            for supplier in self.suppliers:
+                Bid.objects.create(rfq=rfq, supplier=supplier)
+            aoq = AbstractOfQuotation.objects.create(rfq=rfq, awarded_to=self.suppliers[0])
+            PurchaseOrder.objects.create(aoq=aoq, supplier=self.suppliers[0], po_number=f"PO-{self.count}")
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for name in ("rfq_list", "aoq_list", "po_list"):
+            url = reverse(f"procurement:{name}")
+            self.add_documents(2)
+            few = self.queries_for(url)
+            self.add_documents(8)
+            many = self.queries_for(url)
+            self.assertEqual(few, many, name)
+
+    def test_rfq_list_shows_prefetched_prs_and_bid_counts(self):
+        self.add_documents(1)
+        response = self.client.get(reverse("procurement:rfq_list"))
+        self.assertContains(response, "PR-1-0")
+        self.assertContains(response, "PR-1-1")
+        self.assertEqual(response.context["rfqs"][0].bid_count, 2)
+
+    def test_filters_and_pagination(self):
+        self.add_documents(30)
+        other = self.suppliers[1]
+        PurchaseOrder.objects.filter(po_number="PO-3").update(supplier=other, date_of_delivery=date(2025, 1, 5))
+
+        response = self.client.get(reverse("procurement:po_list"), {"supplier": other.pk, "status": "delivered"})
+        self.assertEqual([po.po_number for po in response.context["pos"]], ["PO-3"])
+
+        response = self.client.get(reverse("procurement:rfq_list"), {"page": 2})
+        self.assertEqual(len(response.context["rfqs"]), 5)
+        self.assertContains(response, "Page 2 of 2")
+
+        response = self.client.get(reverse("procurement:rfq_list"), {"date_from": "2999-01-01"})
+        self.assertEqual(len(response.context["rfqs"]), 0)
+        response = self.client.get(reverse("procurement:rfq_list"), {"date_from": "2025-02-30"})
+        self.assertEqual(response.context["paginator"].count, 30)
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from procurement.models import OutboxEvent, PurchaseRequest
+from procurement.utils import live
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+
+class LiveEventTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user("buyer", password="x")
+        self.buyer.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.owner = User.objects.create_user("owner", password="x")
+        self.other = User.objects.create_user("other", password="x")
+        self.pr = PurchaseRequest.objects.create(office_section="ICT", created_by=self.owner)
+        # the broadcaster task polls on its own connection; tests poll by hand
+        patcher = mock.patch.object(live.broadcaster, "_start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def events(self, topic):
+        return list(OutboxEvent.objects.filter(topic=topic).order_by("pk"))
+
+    def test_workflow_publishes_live_events(self):
+        created, = self.events("live.pr_created")
+        self.assertEqual(created.payload["owners"], [self.owner.pk])
+        self.assertEqual(created.payload["counts"], {"unassigned_pr": 1})
+
+        self.pr.set_status("submitted", actor=self.owner)
+        changed, = self.events("live.pr_status")
+        self.assertEqual((changed.key, changed.payload["status_display"]), (str(self.pr.pk), "Submitted for Verification"))
+
+        rfq = _create_consolidated_rfq([self.pr], self.buyer, "")
+        issued, = self.events("live.rfq_issued")
+        self.assertEqual(issued.payload["prs"], [self.pr.pk])
+        self.assertEqual(issued.payload["rfq_number"], rfq.rfq_number)
+
+    def test_visibility(self):
+        event, = self.events("live.pr_created")
+        self.assertTrue(live.can_see(event, self.other.pk, see_all=True))
+        self.assertTrue(live.can_see(event, self.owner.pk, see_all=False))
+        self.assertFalse(live.can_see(event, self.other.pk, see_all=False))
+
+    async def test_one_poll_feeds_every_subscriber(self):
+        first, second = live.broadcaster.subscribe(), live.broadcaster.subscribe()
+        self.addCleanup(live.broadcaster.unsubscribe, first)
+        self.addCleanup(live.broadcaster.unsubscribe, second)
+        await live.broadcaster.poll()  # starts from the newest event
+
+        await PurchaseRequest.objects.acreate(created_by=self.owner)
+        await live.broadcaster.poll()
+        for subscription in (first, second):
+            self.assertEqual(subscription.queue.get_nowait().topic, "live.pr_created")
+            self.assertTrue(subscription.queue.empty())
+
+    @override_settings(LIVE_EVENTS={"QUEUE_SIZE": 1})
+    async def test_slow_subscriber_is_dropped(self):
+        subscription = live.broadcaster.subscribe()
+        self.addCleanup(live.broadcaster.unsubscribe, subscription)
+        await live.broadcaster.poll()
+        for _ in range(2):
+            await PurchaseRequest.objects.acreate(created_by=self.owner)
+        await live.broadcaster.poll()
+        self.assertTrue(subscription.overflowed)
+        self.assertNotIn(subscription, live.broadcaster.subscriptions)
+
+    @override_settings(LIVE_EVENTS={"SETTLE_SECONDS": 60})
+    async def test_unsettled_events_wait_for_a_later_poll(self):
+        subscription = live.broadcaster.subscribe()
+        self.addCleanup(live.broadcaster.unsubscribe, subscription)
+        await live.broadcaster.poll()
+        start = live.broadcaster.last_id
+
+        await PurchaseRequest.objects.acreate(created_by=self.owner)
+        await live.broadcaster.poll()
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(live.broadcaster.last_id, start)  # a lower id may still commit
+
+        await OutboxEvent.objects.filter(pk__gt=start).aupdate(created_at=timezone.now() - timedelta(minutes=5))
+        await live.broadcaster.poll()
+        self.assertEqual(subscription.queue.get_nowait().topic, "live.pr_created")
+
+    async def read_stream(self, user, last_id, messages):
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse("procurement:live_events"), headers={"Last-Event-ID": last_id})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        chunks = [await anext(stream) for _ in range(messages)]
+        # the client goes away while the stream waits for the next event
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        return chunks
+
+    async def test_stream_replays_what_the_user_may_see(self):
+        await PurchaseRequest.objects.acreate(created_by=self.other)
+        events = [event async for event in OutboxEvent.objects.filter(topic="live.pr_created").order_by("pk")]
+
+        chunks = await self.read_stream(self.owner, "0", 1)
+        self.assertTrue(chunks[0].startswith(b"id: %d\nevent: pr_created\ndata: {" % events[0].pk))
+        self.assertIn(b'"pr":%d' % self.pr.pk, chunks[0])
+
+        chunks = await self.read_stream(self.buyer, str(events[0].pk), 1)
+        self.assertTrue(chunks[0].startswith(b"id: %d\n" % events[1].pk))
+        self.assertEqual(live.broadcaster.subscriptions, set())  # closed streams unsubscribe
+
+    @override_settings(LIVE_EVENTS={"REPLAY_LIMIT": 2})
+    async def test_replay_pages_past_the_limit(self):
+        for _ in range(4):
+            await PurchaseRequest.objects.acreate(created_by=self.owner)
+        events = [event async for event in OutboxEvent.objects.filter(topic="live.pr_created").order_by("pk")]
+        self.assertEqual(len(events), 5)
+
+        chunks = await self.read_stream(self.owner, "0", 5)
+        self.assertEqual([chunk.split(b"\n", 1)[0] for chunk in chunks], [b"id: %d" % event.pk for event in events])
+
+    def test_sync_server_gets_no_stream(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(reverse("procurement:live_events")).status_code, 204)
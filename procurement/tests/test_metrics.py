@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from procurement.models import PurchaseRequest
+from procurement.utils import metrics
+
+User = get_user_model()
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_histogram_exposition_is_cumulative(self):
+        metrics.observe("http_request_duration_seconds", 0.003, view="v", method="GET", status="2xx")
+        metrics.observe("http_request_duration_seconds", 0.2, view="v", method="GET", status="2xx")
+        text = metrics.render_text()
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",status="2xx",view="v",le="0.005"} 1', text)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",status="2xx",view="v",le="+Inf"} 2', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",status="2xx",view="v"} 2', text)
+
+    def test_other_processes_are_summed_from_metrics_dir(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, "99999.json"), "w") as fh:
+            json.dump({"counters": [["procurement_awards_total", [], 3]], "histograms": []}, fh)
+        metrics.inc("procurement_awards_total")
+        with override_settings(METRICS={"DIR": directory}):
+            metrics.dump(force=True)
+            self.assertIn("procurement_awards_total 4", metrics.render_text())
+        self.assertTrue(os.path.exists(os.path.join(directory, f"{os.getpid()}.json")))
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.user = User.objects.create_user("clerk", password="x")
+
+    def tearDown(self):
+        metrics.reset()
+
+    def test_requests_and_domain_events_are_exposed(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("procurement:dashboard"))
+        with self.captureOnCommitCallbacks(execute=True):
+            pr = PurchaseRequest.objects.create(created_by=self.user, status="draft")
+            pr.set_status("submitted", actor=self.user)
+
+        self.client.force_login(User.objects.create_user("ops", password="x", is_staff=True))
+        text = self.client.get("/metrics").content.decode()
+        self.assertIn('http_request_duration_seconds_count{method="GET",status="2xx",view="procurement:dashboard"} 1', text)
+        self.assertRegex(text, r'db_queries_total\{view="procurement:dashboard"\} [1-9]')
+        self.assertRegex(text, r'template_render_seconds_total\{view="procurement:dashboard"\} \d')
+        self.assertIn("procurement_prs_created_total 1", text)
+        self.assertIn('procurement_pr_status_transitions_total{from_status="draft",to_status="submitted"} 1', text)
+
+    def test_staff_only_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+        self.client.logout()
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS={"TOKEN": "s3cret"})
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3crét")
+        self.assertEqual(response.status_code, 401)
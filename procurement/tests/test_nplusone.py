@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from procurement.utils import nplusone
+
+User = get_user_model()
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            nplusone.fingerprint('SELECT * FROM "bid" WHERE "rfq_id" = 7 AND "name" = \'x\''),
+            nplusone.fingerprint('SELECT * FROM "bid" WHERE "rfq_id" = 12 AND "name" = \'y\''),
+        )
+        self.assertEqual(
+            nplusone.fingerprint('SELECT 1 FROM "pr" WHERE "id" IN (%s, %s, %s)'),
+            nplusone.fingerprint('SELECT 1 FROM "pr" WHERE "id" IN (%s)'),
+        )
+
+
+@override_settings(N_PLUS_ONE={"ENABLED": True, "THRESHOLD": 3})
+class QueryShapeMiddlewareTests(TestCase):
+    def setUp(self):
+        nplusone.reset_report()
+        for name in ("a", "b", "c", "d"):
+            User.objects.create_user(name)
+
+    def tearDown(self):
+        nplusone.reset_report()
+
+    def test_repeated_template_queries_are_reported_with_line(self):
+        template = Template("{% for u in users %}\n{{ u.groups.count }}{% endfor %}")
+
+        def view(request):
+            return HttpResponse(template.render(Context({"users": User.objects.all()})))
+
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        with self.assertLogs("procurement.utils.nplusone", "WARNING"):
+            nplusone.QueryShapeMiddleware(view)(request)
+
+        [row] = nplusone.worst_offenders()
+        self.assertEqual(row["max_repeats"], 4)
+        self.assertIn("auth_group", row["sql"])
+        self.assertTrue(row["origin"].endswith(":2"), row["origin"])
+
+    def test_distinct_queries_are_not_reported(self):
+        def view(request):
+            User.objects.count()
+            User.objects.first()
+            return HttpResponse()
+
+        nplusone.QueryShapeMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual(nplusone.worst_offenders(), [])
@@ -0,0 +1,102 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from procurement.models import AbstractOfQuotation, OutboxEvent, PRStatusHistory, PurchaseRequest
+from procurement.utils import outbox
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.prs = [PurchaseRequest.objects.create(status="for_rfq", created_by=self.user) for _ in range(2)]
+        OutboxEvent.objects.all().delete()  # the PRs' live.pr_created events
+
+    def status(self, pr):
+        return PurchaseRequest.objects.get(pk=pr.pk).status
+
+    def test_events_of_one_transaction_coalesce_into_one_update(self):
+        with self.captureOnCommitCallbacks() as callbacks, transaction.atomic():
+            for status in ("for_award", "for_po", "po_issued"):
+                outbox.publish("pr.status", [self.prs[0].pk], {"status": status, "actor_id": self.user.pk})
+        self.assertEqual(self.status(self.prs[0]), "for_rfq")  # nothing applied before commit
+
+        with CaptureQueriesContext(connection) as ctx, \
+                mock.patch.object(outbox, "dispatch", wraps=outbox.dispatch) as dispatch:
+            for callback in callbacks:
+                callback()
+        # the transaction's events go in one dispatch (later ones carry what its handlers published)
+        first = dispatch.call_args_list[0].kwargs["ids"]
+        self.assertLessEqual(set(OutboxEvent.objects.filter(topic="pr.status").values_list("pk", flat=True)), set(first))
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "procurement_purchaserequest"')]
+        self.assertEqual(len(updates), 1)
+        history = PRStatusHistory.objects.get(purchase_request=self.prs[0])
+        self.assertEqual((history.from_status, history.to_status, history.actor), ("for_rfq", "po_issued", self.user))
+        self.assertFalse(OutboxEvent.objects.filter(topic="pr.status", processed_at=None).exists())
+
+    def test_rolled_back_transaction_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    outbox.publish("pr.status", [self.prs[0].pk], {"status": "for_award"})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(OutboxEvent.objects.filter(topic="pr.status").exists())
+        self.assertEqual(self.status(self.prs[0]), "for_rfq")
+
+    def test_aoq_moves_every_consolidated_pr_to_for_award(self):
+        rfq = _create_consolidated_rfq(self.prs, self.user, "")
+        with self.captureOnCommitCallbacks(execute=True):
+            AbstractOfQuotation.objects.create(rfq=rfq, created_by=self.user)
+        self.assertEqual([self.status(pr) for pr in self.prs], ["for_award", "for_award"])
+
+    def test_failed_events_stay_pending_for_the_command(self):
+        outbox.HANDLERS["test.fail"] = lambda events: 1 / 0
+        self.addCleanup(outbox.HANDLERS.pop, "test.fail")
+        with self.assertLogs("procurement.utils.outbox", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            outbox.publish("test.fail", ["x"])
+            outbox.publish("pr.status", [self.prs[1].pk], {"status": "for_award"})
+        failed = OutboxEvent.objects.get(topic="test.fail")
+        self.assertEqual((failed.processed_at, failed.attempts), (None, 1))
+        self.assertIn("ZeroDivisionError", failed.error)
+        self.assertEqual(self.status(self.prs[1]), "for_award")  # other topics still applied
+
+        outbox.HANDLERS["test.fail"] = lambda events: None
+        out = StringIO()
+        call_command("dispatch_outbox", stdout=out)
+        self.assertIn("Processed 1 of 1", out.getvalue())
+        failed.refresh_from_db()
+        self.assertIsNotNone(failed.processed_at)
+
+    def test_stale_retry_does_not_undo_a_newer_event(self):
+        # the AOQ's "for_award" failed and is pending; the award's "po_issued" is applied on commit
+        stale = OutboxEvent.objects.create(topic="pr.status", key=str(self.prs[0].pk), payload={"status": "for_award"},
+                                           attempts=1, error="OperationalError: database is locked")
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.publish("pr.status", [self.prs[0].pk], {"status": "po_issued"})
+        stale.refresh_from_db()
+        self.assertIsNotNone(stale.processed_at)
+
+        call_command("dispatch_outbox", stdout=StringIO())
+        self.assertEqual(self.status(self.prs[0]), "po_issued")
+
+    def test_failed_dispatch_does_not_fail_the_committed_request(self):
+        with mock.patch.object(outbox, "dispatch", side_effect=OperationalError("database is locked")), \
+                self.assertLogs(level="ERROR"), self.captureOnCommitCallbacks(execute=True):
+            outbox.publish("pr.status", [self.prs[0].pk], {"status": "for_award"})
+        # left for dispatch_outbox
+        call_command("dispatch_outbox", stdout=StringIO())
+        self.assertEqual(self.status(self.prs[0]), "for_award")
+
+    def test_unknown_topic(self):
+        with self.assertRaises(ValueError):
+            outbox.publish("pr.unknown", [self.prs[0].pk])
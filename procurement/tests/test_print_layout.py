@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from procurement.models import Bid, BidLine, PRItem, PurchaseRequest, RequestForQuotation, Supplier
+from procurement.utils.print_layout import measure_lines, paginate
+
+User = get_user_model()
+
+
+class Item:
+    def __init__(self, description, amount="0", group=None):
+        self.description = description
+        self.amount = Decimal(amount)
+        self.group = group
+
+
+class PaginateTests(SimpleTestCase):
+    def test_measure_lines(self):
+        self.assertEqual(measure_lines("", 10), 1)
+        self.assertEqual(measure_lines("x" * 10, 10), 1)
+        self.assertEqual(measure_lines("x" * 11, 10), 2)
+        self.assertEqual(measure_lines("a\nb\n" + "c" * 25, 10), 5)
+
+    def test_subtotals_and_running_totals(self):
+        items = [Item("pen", "1.10") for _ in range(45)]
+        layout = paginate(items, 20, 45, amount=lambda item: item.amount)
+        self.assertEqual([len(page.rows) for page in layout], [20, 20, 5])
+        self.assertEqual([page.subtotal for page in layout], [Decimal("22.00"), Decimal("22.00"), Decimal("5.50")])
+        self.assertEqual([page.running_total for page in layout], [Decimal("22.00"), Decimal("44.00"), Decimal("49.50")])
+        self.assertEqual(layout.total, Decimal("49.50"))
+        self.assertEqual([row.number for row in layout.pages[1].rows][:2], [21, 22])
+        self.assertTrue(layout.pages[-1].is_last)
+        self.assertFalse(layout.pages[0].is_last)
+
+    def test_long_descriptions_take_more_room(self):
+        items = [Item("x" * 90) for _ in range(12)]  # two lines each
+        layout = paginate(items, 20, 45)
+        self.assertEqual([len(page.rows) for page in layout], [10, 2])
+
+    def test_group_headers_repeat_at_page_top(self):
+        items = [Item("a", group="PR-1") for _ in range(3)] + [Item("b", group="PR-2") for _ in range(4)]
+        layout = paginate(items, 6, 45, group_by=lambda item: item.group, number_within_group=True)
+        rows = [row for page in layout for row in page.rows]
+        self.assertEqual([row.number for row in rows], [1, 2, 3, 1, 2, 3, 4])
+        self.assertEqual([row.group for row in layout.pages[0].rows], ["PR-1", None, None, "PR-2"])
+        self.assertEqual(layout.pages[1].rows[0].group, "PR-2")
+
+    def test_no_items(self):
+        layout = paginate([], 20, 45)
+        self.assertEqual(len(layout), 0)
+        self.assertEqual(layout.total, Decimal("0"))
+
+
+class PrintoutViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.client.force_login(self.user)
+        self.prs = [PurchaseRequest.objects.create(pr_number=f"PR-{i}", created_by=self.user) for i in range(2)]
+        self.rfq = RequestForQuotation.objects.create(rfq_number="RFQ-1", created_by=self.user)
+        self.rfq.consolidated_prs.set(self.prs)
+        self.supplier = Supplier.objects.create(name="Acme")
+        self.bid = Bid.objects.create(rfq=self.rfq, supplier=self.supplier)
+
+    def add_items(self, n):
+        PRItem.objects.bulk_create([
+            PRItem(purchase_request=self.prs[i % 2], description=f"Item {i}", quantity=2,
+                   unit="pc", unit_cost=Decimal("10.25"))
+            for i in range(n)
+        ])
+        # reissue the RFQ with the PRs' current items
+        self.rfq.items.all().delete()
+        self.rfq.snapshot_items()
+
+    def queries_for(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_items(self):
+        for name, pk in (("rfq_preview", self.rfq.pk), ("aoq_preview", self.rfq.pk), ("pr_preview", self.prs[0].pk)):
+            PRItem.objects.all().delete()
+            self.add_items(10)
+            few = self.queries_for(reverse(f"procurement:{name}", args=[pk]))
+            self.add_items(200)
+            many = self.queries_for(reverse(f"procurement:{name}", args=[pk]))
+            self.assertEqual(few, many, name)
+
+    def test_pr_preview_totals(self):
+        self.add_items(50)  # 25 on this PR: pages of 20 and 5
+        response = self.client.get(reverse("procurement:pr_preview", args=[self.prs[0].pk]))
+        layout = response.context["layout"]
+        self.assertEqual([page.subtotal for page in layout], [Decimal("410.00"), Decimal("102.50")])
+        self.assertContains(response, "Carried Forward")
+        self.assertContains(response, "512.50")
+
+    def test_aoq_preview_shows_bid_lines(self):
+        self.add_items(2)
+        item = PRItem.objects.first()
+        BidLine.objects.create(bid=self.bid, pr_item=item, unit_price=Decimal("99.50"), offer="Brand X")
+        response = self.client.get(reverse("procurement:aoq_preview", args=[self.rfq.pk]))
+        self.assertContains(response, "Brand X")
+        self.assertContains(response, "99.50")
+        self.assertContains(response, "PR No. PR-0")
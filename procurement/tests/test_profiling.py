@@ -0,0 +1,75 @@
+import tempfile
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from procurement.utils import profiling
+
+User = get_user_model()
+
+
+def busy_view(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return "ok"
+
+
+class SamplingProfilerMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.factory = RequestFactory()
+
+    def _run(self, middleware, url=None):
+        url = url or reverse("procurement:rfq_list")
+        request = self.factory.get(url)
+        request.resolver_match = resolve(url)
+        middleware.process_view(request, busy_view, (), {})
+        return middleware(request)
+
+    def _middleware(self, **config):
+        with override_settings(PROFILING={"ENABLED": True, "DIR": self.dir, "INTERVAL": 0.001, **config}):
+            return profiling.SamplingProfilerMiddleware(lambda request: busy_view(request))
+
+    def test_selected_view_is_sampled_per_endpoint(self):
+        middleware = self._middleware(URL_NAMES=["procurement:rfq_list"])
+        self._run(middleware)
+        stacks = profiling.read_collapsed(self.dir, "procurement:rfq_list")
+        self.assertTrue(stacks)
+        self.assertTrue(any("busy_view" in stack for stack in stacks))
+        [row] = profiling.endpoint_summary(self.dir)
+        self.assertEqual((row["view_name"], row["requests"]), ("procurement:rfq_list", 1))
+
+    def test_unselected_requests_are_not_recorded(self):
+        self._run(self._middleware(URL_NAMES=["procurement:pr_list"]))
+        self.assertEqual(profiling.endpoint_summary(self.dir), [])
+
+    def test_disabled_middleware_drops_out(self):
+        with override_settings(PROFILING={"ENABLED": False}):
+            with self.assertRaises(profiling.MiddlewareNotUsed):
+                profiling.SamplingProfilerMiddleware(lambda request: None)
+
+
+class ProfilingReportViewTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        profiling.write_profile(self.dir, "procurement:aoq_detail", Counter({"a;b": 3, "a;c": 1}), 0.2)
+
+    def test_admin_only(self):
+        user = User.objects.create_user("clerk", password="x")
+        self.client.force_login(user)
+        with override_settings(PROFILING={"DIR": self.dir}):
+            response = self.client.get(reverse("procurement:profiling_report"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_lists_endpoints_and_downloads_collapsed_stacks(self):
+        admin = User.objects.create_superuser("root", password="x")
+        self.client.force_login(admin)
+        with override_settings(PROFILING={"DIR": self.dir}):
+            page = self.client.get(reverse("procurement:profiling_report"))
+            download = self.client.get(reverse("procurement:profiling_download", args=["procurement:aoq_detail"]))
+        self.assertContains(page, "procurement:aoq_detail")
+        self.assertEqual(download.content.decode(), "a;b 3\na;c 1\n")
@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from procurement.models import (
+    AbstractOfQuotation, AOQLine, Bid, BidLine, PRItem, PurchaseRequest, RFQItem, Supplier,
+)
+from procurement.views import _create_consolidated_rfq
+
+User = get_user_model()
+
+
+class RFQItemSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="x")
+        self.user.groups.add(Group.objects.get_or_create(name="Procurement")[0])
+        self.client.force_login(self.user)
+        self.prs = [PurchaseRequest.objects.create(pr_number=f"PR-{i}", created_by=self.user) for i in range(2)]
+        for pr in reversed(self.prs):
+            for n in range(2):
+                PRItem.objects.create(purchase_request=pr, description=f"{pr.pr_number} item {n}",
+                                      quantity=n + 1, unit="pc", unit_cost=Decimal("10.00"))
+
+    def test_create_rfq_freezes_pr_items(self):
+        pr = self.prs[0]
+        self.client.post(reverse("procurement:create_rfq", args=[pr.pk]), {"date": "2026-01-05"})
+        rfq = pr.rfq
+        self.assertEqual(
+            list(rfq.items.values_list("position", "description", "quantity")),
+            [(1, "PR-0 item 0", 1), (2, "PR-0 item 1", 2)],
+        )
+
+        # editing the PR afterwards doesn't change what was quoted on
+        pr.items.update(quantity=50, description="changed")
+        PRItem.objects.create(purchase_request=pr, description="late", quantity=1, unit="pc", unit_cost=1)
+        self.assertEqual(list(rfq.items.values_list("description", flat=True)), ["PR-0 item 0", "PR-0 item 1"])
+        self.assertEqual(rfq.snapshot_items(), [])  # never re-taken
+
+    def test_consolidated_rfq_orders_items_by_pr(self):
+        rfq = _create_consolidated_rfq(PurchaseRequest.objects.all(), self.user, "")
+        items = list(rfq.items.all())
+        self.assertEqual([item.position for item in items], [1, 2, 3, 4])
+        self.assertEqual([item.purchase_request_id for item in items], [self.prs[0].pk] * 2 + [self.prs[1].pk] * 2)
+
+    def test_bids_and_aoq_use_frozen_items(self):
+        rfq = _create_consolidated_rfq(PurchaseRequest.objects.all(), self.user, "")
+        bid = Bid.objects.create(rfq=rfq, supplier=Supplier.objects.create(name="Acme"))
+
+        # opening the bid form creates a line per RFQ item
+        response = self.client.get(reverse("procurement:enter_bid_lines", args=[bid.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(bid.lines.values_list("pr_item_id", flat=True)),
+            sorted(rfq.items.values_list("pr_item_id", flat=True)),
+        )
+        self.assertContains(response, "PR No. PR-1")
+        bid.lines.update(unit_price=Decimal("2.00"))
+        self.assertTrue(bid.completeness_status())
+
+        PRItem.objects.update(quantity=100)  # after issue: ignored
+        self.assertEqual(bid.total_bid_amount(), Decimal("12.00"))  # (1 + 2) * 2 per PR
+        self.assertEqual(sorted(line.total_cost() for line in bid.lines.all()),
+                         [Decimal("2.00"), Decimal("2.00"), Decimal("4.00"), Decimal("4.00")])
+
+        aoq = AbstractOfQuotation.objects.create(rfq=rfq)
+        AOQLine.objects.bulk_create([
+            AOQLine(aoq=aoq, pr_item_id=line.pr_item_id, supplier=bid.supplier, unit_price=line.unit_price)
+            for line in BidLine.objects.filter(bid=bid)
+        ])
+        supplier, total, pr_total, savings, _ = aoq.winning_supplier_and_savings()
+        self.assertEqual((supplier, total, pr_total, savings),
+                         (bid.supplier, Decimal("12.00"), Decimal("60.00"), Decimal("48.00")))
+        self.assertEqual(set(aoq.compute_lcrb()), set(rfq.items.values_list("pr_item_id", flat=True)))
+        self.assertEqual(sum(line.line_total() for line in aoq.lines.all()), Decimal("12.00"))
+        response = self.client.get(reverse("procurement:aoq_detail", args=[aoq.pk]))
+        self.assertEqual(sum(response.context["aoq_breakdown_by_category"].values()), Decimal("12.00"))
+
+    def test_deleted_pr_item_keeps_snapshot(self):
+        rfq = _create_consolidated_rfq(PurchaseRequest.objects.all(), self.user, "")
+        PRItem.objects.filter(description="PR-0 item 0").delete()
+        item = RFQItem.objects.get(rfq=rfq, position=1)
+        self.assertIsNone(item.pr_item_id)
+        self.assertEqual(item.description, "PR-0 item 0")
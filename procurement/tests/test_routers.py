@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from procurement.models import ActionLog, PurchaseRequest
+from procurement.routers import PRIMARY_PIN_COOKIE, PrimaryReplicaRouter, replica_reads
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASE="replica")
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _routed_read(self, request, model=PurchaseRequest):
+        @replica_reads
+        def view(request):
+            return self.router.db_for_read(model)
+        return view(request)
+
+    def test_marked_views_read_from_replica(self):
+        self.assertEqual(self._routed_read(self.factory.get("/")), "replica")
+
+    def test_unmarked_reads_and_writes_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(PurchaseRequest))
+        self.assertEqual(self.router.db_for_write(PurchaseRequest), "default")
+
+    def test_auth_and_audit_never_read_from_replica(self):
+        request = self.factory.get("/")
+        self.assertIsNone(self._routed_read(request, User))
+        self.assertIsNone(self._routed_read(request, ActionLog))
+
+    def test_recent_writer_is_pinned_to_primary(self):
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_PIN_COOKIE] = "1"
+        self.assertIsNone(self._routed_read(request))
+        self.assertIsNone(self._routed_read(self.factory.post("/")))
@@ -0,0 +1,89 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from procurement.models import PurchaseRequest, PRStatusHistory, StageDwellRollup
+from procurement.utils.stage_analytics import dwell_report, percentile, rollup_month
+
+User = get_user_model()
+
+
+class StatusHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("proc", "proc@example.com", "pass")
+        self.user.groups.add(Group.objects.create(name="Procurement"))
+        self.pr = PurchaseRequest.objects.create(
+            office_section="Registrar", mode_of_procurement="Small Value Procurement", created_by=self.user
+        )
+
+    def test_set_status_appends_history_with_duration(self):
+        self.pr.set_status("submitted", actor=self.user)
+        self.pr.set_status("verified", actor=self.user)
+        self.pr.set_status("verified", actor=self.user)  # no-op
+
+        history = list(self.pr.status_history.all())
+        self.assertEqual([(h.from_status, h.to_status) for h in history],
+                         [("draft", "submitted"), ("submitted", "verified")])
+        self.assertEqual(history[1].actor, self.user)
+        self.assertEqual(history[1].office_section, "Registrar")
+        self.assertGreaterEqual(history[1].duration, timedelta(0))
+
+    def test_ajax_status_update_is_recorded(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("procurement:update_pr_status", args=[self.pr.pk]),
+            data='{"status": "for_rfq"}', content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(PRStatusHistory.objects.filter(purchase_request=self.pr, to_status="for_rfq").exists())
+
+    def test_history_is_append_only(self):
+        entry = PRStatusHistory.record(self.pr, "draft", "submitted")
+        with self.assertRaises(Exception):
+            entry.save()
+
+    def test_rollup_matches_live_computation(self):
+        now = timezone.now()
+        for days in (1, 2, 3, 10):
+            PRStatusHistory.objects.create(
+                purchase_request=self.pr, from_status="submitted", to_status="verified",
+                changed_at=now, duration=timedelta(days=days), office_section="Registrar",
+            )
+        month = timezone.localdate()
+        live = dwell_report(month, month)
+        self.assertEqual(rollup_month(month), 1)
+        self.assertEqual(StageDwellRollup.objects.get().p90_seconds, timedelta(days=10).total_seconds())
+        self.assertEqual(dwell_report(month, month)[0]["p50_seconds"], live[0]["p50_seconds"])
+
+    def test_unrolled_months_are_read_in_one_query(self):
+        this_month = timezone.localdate().replace(day=1)
+        last_month = (this_month - timedelta(days=1)).replace(day=1)
+        first_month = (last_month - timedelta(days=1)).replace(day=1)
+        for month, office in ((first_month, "Registrar"), (this_month, "Registrar"), (this_month, "Cashier")):
+            PRStatusHistory.objects.create(
+                purchase_request=self.pr, from_status="submitted", to_status="verified",
+                changed_at=timezone.make_aware(datetime.combine(month, time(12))),
+                duration=timedelta(days=1), office_section=office,
+            )
+        rollup_month(last_month)
+
+        with self.assertNumQueries(3):  # rolled months, their rows, one scan of the rest
+            rows = dwell_report(first_month, this_month, office="Registrar")
+        self.assertEqual([(r["month"], r["office_section"]) for r in rows],
+                         [(first_month, "Registrar"), (this_month, "Registrar")])
+
+    def test_percentile_nearest_rank(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 90), 4)
+        self.assertIsNone(percentile([], 50))
+
+    def test_analytics_page_renders(self):
+        self.pr.set_status("submitted", actor=self.user)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("procurement:stage_analytics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Draft")
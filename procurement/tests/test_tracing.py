@@ -0,0 +1,75 @@
+import os
+import queue
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from procurement.utils import metrics, tracing
+
+
+class TracingTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.settings_override = override_settings(TRACING={"EXPORTER": "jsonl", "FILE": self.path})
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        os.remove(self.path)
+
+    def test_nested_spans_share_a_trace_and_export_on_root_end(self):
+        with tracing.span("aoq.award", aoq_id=1) as root:
+            with tracing.span("po.create") as child:
+                child.set("po_id", 7)
+            self.assertEqual(os.path.getsize(self.path), 0)
+
+        spans = tracing.load_trace(self.path, root.trace_id)
+        self.assertEqual([s["name"] for s in spans], ["aoq.award", "po.create"])
+        self.assertEqual(spans[1]["parent_id"], spans[0]["span_id"])
+        self.assertEqual(spans[1]["attributes"], {"po_id": 7})
+
+    def test_errors_are_recorded_and_reraised(self):
+        with self.assertRaises(ValueError):
+            with tracing.span("rfq.consolidate") as root:
+                raise ValueError("boom")
+        [record] = tracing.load_trace(self.path, root.trace_id)
+        self.assertEqual((record["status"], record["error"]), ("error", "ValueError: boom"))
+
+    def test_otlp_round_trip(self):
+        with tracing.span("pr.create", item_count=3) as root:
+            pass
+        payload = tracing.to_otlp([root], "test")
+        [record] = tracing.from_otlp(payload)
+        self.assertEqual(record["trace_id"], root.trace_id)
+        self.assertEqual(record["attributes"], {"item_count": "3"})
+
+    def test_full_otlp_queue_drops_instead_of_blocking(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        full = queue.Queue(maxsize=1)
+        full.put_nowait(("endpoint", {}))
+        with override_settings(TRACING={"EXPORTER": "otlp"}), \
+                mock.patch.object(tracing, "_otlp_worker", return_value=full):
+            with tracing.span("pr.create"):
+                pass
+        self.assertEqual(full.qsize(), 1)
+        self.assertIn("tracing_exports_dropped_total 1", metrics.render_text())
+
+    def test_show_trace_prints_waterfall(self):
+        with tracing.span("aoq.award") as root:
+            with tracing.span("po.create"):
+                pass
+        out = StringIO()
+        call_command("show_trace", root.trace_id, stdout=out)
+        self.assertIn("aoq.award", out.getvalue())
+        self.assertIn("  po.create", out.getvalue())
+
+    def test_disabled_tracing_is_a_noop(self):
+        with override_settings(TRACING={"EXPORTER": ""}):
+            with tracing.span("anything") as s:
+                s.set("key", "value")
+        self.assertIs(s, tracing.NOOP_SPAN)
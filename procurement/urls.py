@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
 from .views import (
     EVSULoginView,
     DashboardView,
@@ -46,6 +46,13 @@ urlpatterns = [
     path("update_mode_ajax/<int:pk>/", views.update_mode_ajax, name="update_mode_ajax"),
     path("dashboard/requisitioner/", views.requisitioner_dashboard, name="dashboard_requisitioner"),
     path('update_status_ajax/<int:pk>/', views.update_status_ajax, name='update_pr_status'),
+    path("prs/stage-analytics/", views.stage_analytics, name="stage_analytics"),
+    path("profiling/", views.profiling_report, name="profiling_report"),
+    path("profiling/<str:view_name>/download/", views.profiling_download, name="profiling_download"),
+    path("events/", views.live_events, name="live_events"),
+    path("print-jobs/", views.print_jobs, name="print_jobs"),
+    path("print-jobs/<str:kind>/new/", views.print_job_create, name="print_job_create"),
+    path("print-jobs/<int:pk>/download/", views.print_job_download, name="print_job_download"),
     path("signatories/", views.SignatoryListView.as_view(), name="signatory_list"),
     path("signatories/add/", views.SignatoryCreateView.as_view(), name="signatory_create"),
     path("signatories/add/ajax/", views.signatory_add_ajax, name="signatory_add_ajax"),
@@ -82,8 +89,11 @@ urlpatterns = [
     # ----------------------------
     path("aoqs/", AOQListView.as_view(), name="aoq_list"),
     path("rfqs/<int:rfq_id>/create_aoq/", create_aoq, name="create_aoq"),
+    path("rfqs/<int:rfq_id>/generate_aoq/", views.generate_aoq, name="generate_aoq"),
     path("aoqs/<int:pk>/", AOQDetailView.as_view(), name="aoq_detail"),
     path("aoqs/<int:pk>/generate_po/", generate_po_from_aoq, name="aoq_generate_po"),
+    path("aoqs/<int:pk>/simulator/", views.aoq_simulator, name="aoq_simulator"),
+    path("aoqs/<int:pk>/simulate/", views.aoq_simulate, name="aoq_simulate"),
     path("aoqs/", views.AOQListView.as_view(), name="aoq_list"),
     path("aoqs/<int:pk>/preview/", views.aoq_preview, name="aoq_preview"),
 
@@ -99,6 +109,16 @@ urlpatterns = [
     path("suppliers/", SupplierListView.as_view(), name="supplier_list"),
     path("suppliers/new/", SupplierCreateView.as_view(), name="supplier_create"),
 
+    # ----------------------------
+    # Read-only JSON API
+    # ----------------------------
+    path("api/prs/", api.PRListAPI.as_view(), name="api_pr_list"),
+    path("api/rfqs/", api.RFQListAPI.as_view(), name="api_rfq_list"),
+    path("api/bids/", api.BidListAPI.as_view(), name="api_bid_list"),
+    path("api/aoqs/", api.AOQListAPI.as_view(), name="api_aoq_list"),
+    path("api/pos/", api.POListAPI.as_view(), name="api_po_list"),
+    path("api/changes/", api.ChangeFeedAPI.as_view(), name="api_changes"),
+
     # ----------------------------
     # Login
     # ----------------------------
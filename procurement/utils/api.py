@@ -0,0 +1,229 @@
+"""
+Read-only JSON API: sparse fieldsets, includes, cursor pagination and
+streamed encoding.
+
+A Resource names the fields of a model the API exposes. ApiListMixin turns a
+list view into a JSON endpoint; it reuses the view's get_queryset, so the API
+has the same filters and visibility rules as the HTML page:
+
+    GET /api/prs/?assigned=assigned&fields=id,pr_number,status&include=items
+    GET /api/prs/?include=items&fields[items]=description,quantity&limit=200
+    GET /api/prs/?cursor=<"next" of the previous page>
+
+``fields`` trims the SELECT itself (QuerySet.only) and each ``include`` is one
+prefetch query per page. Pages are keyset-paginated on ``cursor_ordering``,
+so a deep page costs the same as the first. Rows are encoded one at a time
+(with orjson when it is installed) into a streaming response:
+
+    {"next": "<url of the next page or null>", "data": [{...}, ...]}
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models import Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder writes the same JSON, slower
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def api_settings():
+    config = {"PAGE_SIZE": 50, "MAX_PAGE_SIZE": 500}
+    config.update(getattr(settings, "API", {}))
+    return config
+
+
+class ApiError(ValueError):
+    """A bad query parameter; answered with 400 and the message."""
+
+
+# -----------------------
+# Encoding
+# -----------------------
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Compact JSON bytes; Decimals become strings, dates ISO 8601."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(dumps(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ApiError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != length:
+        raise ApiError("Invalid cursor.")
+    return values
+
+
+# -----------------------
+# Resources
+# -----------------------
+class Resource:
+    """The fields of ``model`` the API returns; attnames, so FKs are ``<name>_id``."""
+    model = None
+    fields = ()
+    ordering = ("pk",)  # of included lists
+
+    @classmethod
+    def columns(cls, fields):
+        """Model field names to load for ``fields`` (annotations are skipped)."""
+        concrete = {f.attname: f.name for f in cls.model._meta.concrete_fields}
+        return {concrete[name] for name in fields if name in concrete} | {cls.model._meta.pk.name}
+
+    @classmethod
+    def serialize(cls, obj, fields):
+        return {name: getattr(obj, name) for name in fields}
+
+
+def _pick(param, available, what):
+    if param is None:
+        return list(available)
+    names = [name for name in param.split(",") if name]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown {what}: {', '.join(unknown)}. Choose from: {', '.join(available)}.")
+    return names
+
+
+def _related_value(obj, relation, resource, fields):
+    field = obj._meta.get_field(relation)
+    if field.one_to_many or field.many_to_many:
+        return [resource.serialize(related, fields) for related in getattr(obj, relation).all()]
+    try:
+        related = getattr(obj, relation)
+    except ObjectDoesNotExist:  # reverse one-to-one with no row
+        return None
+    return None if related is None else resource.serialize(related, fields)
+
+
+# -----------------------
+# Views
+# -----------------------
+class ApiListMixin:
+    """
+    JSON for a list view. ``resource`` describes the rows, ``includes`` maps
+    an include name to (relation, Resource) and ``extra_fields`` names
+    annotations the view's queryset adds.
+    """
+    resource = None
+    includes = {}
+    extra_fields = ()
+    cursor_ordering = ("-created_at", "-pk")
+
+    def handle_no_permission(self):
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            rows, fields, includes, next_cursor = self.get_page()
+        except ApiError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+        next_url = None
+        if next_cursor:
+            query = request.GET.copy()
+            query["cursor"] = next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+        return StreamingHttpResponse(
+            self.stream(rows, fields, includes, next_url), content_type="application/json",
+        )
+
+    def get_page(self):
+        params = self.request.GET
+        fields = _pick(params.get("fields"), self.resource.fields + tuple(self.extra_fields), "field")
+        includes = []
+        for name in _pick(params.get("include", ""), self.includes, "include"):
+            relation, resource = self.includes[name]
+            includes.append((name, relation, resource, _pick(params.get(f"fields[{name}]"), resource.fields, "field")))
+
+        page_size = api_settings()["PAGE_SIZE"]
+        try:
+            limit = int(params.get("limit", page_size))
+        except ValueError:
+            raise ApiError("limit must be a number.")
+        if not 1 <= limit <= api_settings()["MAX_PAGE_SIZE"]:
+            raise ApiError(f"limit must be between 1 and {api_settings()['MAX_PAGE_SIZE']}.")
+
+        queryset = self.api_queryset(fields, includes)
+        if params.get("cursor"):
+            try:
+                queryset = queryset.filter(self.after(decode_cursor(params["cursor"], len(self.cursor_ordering))))
+            except (ValidationError, ValueError, TypeError):  # a cursor value of the wrong type
+                raise ApiError("Invalid cursor.")
+        rows = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([getattr(rows[-1], key.lstrip("-")) for key in self.cursor_ordering])
+        return rows, fields, includes, next_cursor
+
+    def api_queryset(self, fields, includes):
+        # the list view's joins are for its template; the API loads only what was asked for
+        model = self.resource.model
+        columns = self.resource.columns(fields)
+        columns |= {key.lstrip("-") for key in self.cursor_ordering} - {"pk"}
+        prefetches = []
+        for _name, relation, resource, include_fields in includes:
+            field = model._meta.get_field(relation)
+            related_columns = resource.columns(include_fields)
+            if field.concrete and not field.many_to_many:
+                columns.add(field.name)  # forward FK: the id to look the row up by
+            elif not field.many_to_many:
+                related_columns.add(field.field.name)  # reverse FK: the id to group rows by
+            prefetches.append(Prefetch(
+                relation, queryset=resource.model.objects.only(*related_columns).order_by(*resource.ordering),
+            ))
+        return (
+            self.get_queryset()
+            .select_related(None).prefetch_related(None)
+            .only(*columns)
+            .prefetch_related(*prefetches)
+            .order_by(*self.cursor_ordering)
+        )
+
+    def after(self, values):
+        """Rows after the cursor: (a, b) < (x, y) spelled out as a < x OR (a = x AND b < y)."""
+        condition = Q()
+        for i, key in enumerate(self.cursor_ordering):
+            equal = {k.lstrip("-"): v for k, v in zip(self.cursor_ordering[:i], values)}
+            beyond = f"{key.lstrip('-')}__{'lt' if key.startswith('-') else 'gt'}"
+            condition |= Q(**equal, **{beyond: values[i]})
+        return condition
+
+    def stream(self, rows, fields, includes, next_url):
+        # everything was fetched (and prefetched) in get(); this only encodes
+        buffer = bytearray(b'{"next":' + dumps(next_url) + b',"data":[')
+        for i, obj in enumerate(rows):
+            row = self.resource.serialize(obj, fields)
+            for name, relation, resource, include_fields in includes:
+                row[name] = _related_value(obj, relation, resource, include_fields)
+            if i:
+                buffer += b","
+            buffer += dumps(row)
+            if len(buffer) >= CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]}"
+        yield bytes(buffer)
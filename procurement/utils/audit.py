@@ -0,0 +1,158 @@
+"""
+Buffered ActionLog writer.
+
+log_action() never INSERTs on the caller's write path. Entries are kept in a
+per-thread buffer and written with one bulk_create when
+
+- the transaction they were logged in commits (entries logged inside a
+  transaction that rolls back are dropped with it),
+- the buffer reaches AUDIT_LOG_BUFFER_SIZE entries or is older than
+  AUDIT_LOG_FLUSH_INTERVAL seconds, or
+- the request ends (AuditLogMiddleware) or the process exits.
+
+Entries go to the AUDIT_LOG_DATABASE alias (default: "default"); pointing it
+at a separate database keeps audit writes off the main database's write lock.
+"""
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def audit_database():
+    return getattr(settings, "AUDIT_LOG_DATABASE", DEFAULT_DB_ALIAS)
+
+
+def _buffer():
+    if not hasattr(_local, "entries"):
+        _local.entries = []
+        _local.first_at = None
+    return _local.entries
+
+
+class _CommitBatch(list):
+    """Entries logged at one savepoint level; released and flushed on commit."""
+    released = False
+
+
+def _commit_batch(using):
+    # One batch and one commit hook per savepoint level, so a transaction
+    # logging ten actions still costs a single INSERT. The connection holds
+    # the batches weakly: only the hook keeps one alive, so a rollback that
+    # discards the hook drops its entries too.
+    connection = transaction.get_connection(using)
+    if not hasattr(connection, "audit_batches"):
+        connection.audit_batches = weakref.WeakValueDictionary()
+    level = tuple(connection.savepoint_ids)
+    batch = connection.audit_batches.get(level)
+    if batch is None or batch.released:
+        batch = connection.audit_batches[level] = _CommitBatch()
+
+        def release_batch():
+            batch.released = True
+            for entry in batch:
+                _enqueue(entry)
+            flush()
+
+        # robust: flush() already logs its own failures
+        transaction.on_commit(release_batch, using=using, robust=True)
+    return batch
+
+
+def _enqueue(entry):
+    entries = _buffer()
+    if not entries:
+        _local.first_at = time.monotonic()
+    entries.append(entry)
+
+
+def _flush_due():
+    entries = _buffer()
+    if not entries:
+        return False
+    max_size = getattr(settings, "AUDIT_LOG_BUFFER_SIZE", 50)
+    max_age = getattr(settings, "AUDIT_LOG_FLUSH_INTERVAL", 5.0)
+    return len(entries) >= max_size or time.monotonic() - _local.first_at >= max_age
+
+
+def log_action(actor, action, target=None, notes=None, using=DEFAULT_DB_ALIAS):
+    """
+    Queue an ActionLog entry.
+
+    ``target`` is any model instance (stored as model name + pk). ``using`` is
+    the database the surrounding workflow transaction runs on, so the entry
+    is only released when that transaction commits.
+    """
+    from procurement.models import ActionLog
+
+    entry = ActionLog(
+        actor_id=actor.pk if getattr(actor, "is_authenticated", False) else None,
+        action=action[:200],
+        target_type=target._meta.model_name if target is not None else None,
+        target_id=target.pk if target is not None else None,
+        notes=notes,
+        created_at=timezone.now(),
+    )
+    if transaction.get_connection(using).in_atomic_block:
+        _commit_batch(using).append(entry)
+        return
+    _enqueue(entry)
+    if _flush_due():
+        flush()
+
+
+def flush():
+    """Write this thread's buffered entries in one INSERT."""
+    from procurement.models import ActionLog
+
+    entries = _buffer()
+    if not entries:
+        return 0
+    _local.entries = []
+    _local.first_at = None
+    try:
+        ActionLog.objects.using(audit_database()).bulk_create(entries)
+    except Exception:
+        # auditing must never break the request that triggered it
+        logger.exception("Could not write %s audit log entries", len(entries))
+        return 0
+    return len(entries)
+
+
+class AuditLogMiddleware:
+    """Flush whatever the request buffered once the response is ready."""
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            flush()
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            # the request's sync code, log_action() included, runs on one
+            # thread per request under ASGI; that thread holds the buffer
+            await sync_to_async(flush)()
+
+
+atexit.register(flush)
@@ -0,0 +1,169 @@
+"""
+Award strategy simulator.
+
+Compares the ways an AOQ could be awarded - everything to one supplier, each
+item to its LCRB, or each lot (a PR's items) to the lowest complete bidder -
+side by side: total cost, savings against the approved budget (ABC), number
+of POs and how the award is spread over suppliers.
+
+The bid matrix is read with two queries and the strategies run over plain
+dicts, so the simulator endpoint can re-run everything on each responsiveness
+toggle. AbstractOfQuotation.item_awards()/lot_awards() use the same code, so
+an award matches what was simulated.
+
+Usage:
+    matrix = BidMatrix.for_aoq(aoq, overrides={(pr_item_id, supplier_id): False})
+    results = simulate(matrix)
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+ZERO = Decimal("0")
+
+
+class BidMatrix:
+    """
+    Items of an RFQ and the unit prices quoted on them.
+
+    items: {pr_item_id: (lot, quantity, abc)} in RFQ order; lot is the PR id
+    and abc the item's approved budget (quantity x PR unit cost).
+    quotes: {pr_item_id: {supplier_id: (unit_price, responsive)}}
+    """
+    __slots__ = ("items", "quotes")
+
+    def __init__(self, items, quotes):
+        self.items = items
+        self.quotes = quotes
+
+    @classmethod
+    def for_aoq(cls, aoq, overrides=None):
+        """
+        The AOQ's matrix; ``overrides`` maps (pr_item_id, supplier_id) to a
+        responsive flag to use instead of the saved one.
+        """
+        overrides = overrides or {}
+        items = {
+            pr_item_id: (lot, quantity, quantity * unit_cost)
+            for pr_item_id, lot, quantity, unit_cost in aoq.rfq.items.values_list(
+                "pr_item_id", "purchase_request_id", "quantity", "unit_cost",
+            )
+            if pr_item_id
+        }
+        quotes = defaultdict(dict)
+        for pr_item_id, supplier_id, unit_price, responsive in aoq.lines.order_by("pk").values_list(
+            "pr_item_id", "supplier_id", "unit_price", "responsive",
+        ):
+            if pr_item_id in items:
+                current = quotes[pr_item_id].get(supplier_id)
+                # duplicate lines: keep the cheaper quote
+                if current is None or unit_price < current[0]:
+                    quotes[pr_item_id][supplier_id] = (unit_price, overrides.get((pr_item_id, supplier_id), responsive))
+        return cls(items, dict(quotes))
+
+    def responsive_prices(self):
+        """{pr_item_id: {supplier_id: unit_price}} of responsive quotes only."""
+        return {
+            pr_item_id: {supplier_id: price for supplier_id, (price, responsive) in quotes.items() if responsive}
+            for pr_item_id, quotes in self.quotes.items()
+        }
+
+    def lots(self):
+        lots = defaultdict(list)
+        for pr_item_id, (lot, _, _) in self.items.items():
+            lots[lot].append(pr_item_id)
+        return lots
+
+
+# -----------------------
+# Strategies
+# -----------------------
+# Each takes the matrix's responsive prices and returns {pr_item_id: supplier_id}.
+def lowest_bidder(totals):
+    """Supplier with the lowest total in {supplier_id: total}; ties go to the lower id."""
+    return min(totals, key=lambda supplier_id: (totals[supplier_id], supplier_id)) if totals else None
+
+
+def single_supplier_awards(matrix, prices):
+    """Every item to the one supplier with the lowest total among those who quoted on all of them."""
+    return lot_awards(matrix, prices, {None: list(matrix.items)})
+
+
+def item_awards(matrix, prices):
+    """Each item to its lowest responsive quote (LCRB)."""
+    awards = {}
+    for pr_item_id in matrix.items:
+        supplier_id = lowest_bidder(prices.get(pr_item_id, {}))
+        if supplier_id is not None:
+            awards[pr_item_id] = supplier_id
+    return awards
+
+
+def lot_awards(matrix, prices, lots=None):
+    """Each lot whole to the supplier with the lowest total for all its items."""
+    awards = {}
+    for lot_items in (lots or matrix.lots()).values():
+        totals = None
+        for pr_item_id in lot_items:
+            quantity = matrix.items[pr_item_id][1]
+            quoted = prices.get(pr_item_id, {})
+            if totals is None:
+                totals = {supplier_id: price * quantity for supplier_id, price in quoted.items()}
+            else:
+                totals = {
+                    supplier_id: total + quoted[supplier_id] * quantity
+                    for supplier_id, total in totals.items() if supplier_id in quoted
+                }
+            if not totals:
+                break
+        supplier_id = lowest_bidder(totals or {})
+        if supplier_id is not None:
+            awards.update(dict.fromkeys(lot_items, supplier_id))
+    return awards
+
+
+STRATEGIES = [
+    ("single", "Single supplier", single_supplier_awards),
+    ("item", "Per item", item_awards),
+    ("lot", "Per lot (PR)", lot_awards),
+]
+
+
+# -----------------------
+# Comparison
+# -----------------------
+def summarize(matrix, prices, awards):
+    per_supplier = defaultdict(lambda: {"items": 0, "total": ZERO})
+    abc = ZERO
+    for pr_item_id, supplier_id in awards.items():
+        _, quantity, item_abc = matrix.items[pr_item_id]
+        share = per_supplier[supplier_id]
+        share["items"] += 1
+        share["total"] += prices[pr_item_id][supplier_id] * quantity
+        abc += item_abc
+    total = sum((share["total"] for share in per_supplier.values()), ZERO)
+    savings = abc - total
+    return {
+        "total": total,
+        "abc": abc,
+        "savings": savings,
+        "savings_pct": round(savings / abc * 100, 2) if abc else ZERO,
+        "po_count": len(per_supplier),
+        "awarded_items": len(awards),
+        "unawarded_items": len(matrix.items) - len(awards),
+        # largest supplier's share of the awarded amount: 100 = everything to one supplier
+        "top_share_pct": round(max(share["total"] for share in per_supplier.values()) / total * 100, 2) if total else ZERO,
+        "suppliers": [
+            {"supplier_id": supplier_id, **share}
+            for supplier_id, share in sorted(per_supplier.items(), key=lambda entry: -entry[1]["total"])
+        ],
+    }
+
+
+def simulate(matrix, strategies=STRATEGIES):
+    """[{key, label, awards, total, abc, savings, ...}] for each strategy, in order."""
+    prices = matrix.responsive_prices()
+    results = []
+    for key, label, strategy in strategies:
+        awards = strategy(matrix, prices)
+        results.append({"key": key, "label": label, "awards": awards, **summarize(matrix, prices, awards)})
+    return results
@@ -0,0 +1,158 @@
+"""
+Batch printing: many PRs, RFQs or POs in one PDF.
+
+A PrintJob lists the documents to print. run_print_job() renders each
+document's print template here (templates need the ORM), converts the HTML to
+PDF in a process pool - WeasyPrint layout is pure-Python CPU work, so threads
+would just queue on the GIL - and merges the parts, in the order chosen, into
+one PDF with a bookmark per document.
+
+Views start a job on a background thread once its row is committed;
+``manage.py run_print_jobs`` runs anything still pending (for example after a
+restart).
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from procurement.models import PrintJob, PurchaseOrder, PurchaseRequest, RequestForQuotation
+from procurement.utils import pdf
+from procurement.utils.print_layout import pr_print_layout, rfq_print_layout
+from procurement.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+PRINT_BASE = "procurement/print_base.html"
+
+
+def batch_print_settings():
+    config = {"WORKERS": 0, "MAX_DOCUMENTS": 200}
+    config.update(getattr(settings, "BATCH_PRINT", {}))
+    return config
+
+
+def worker_count(documents):
+    workers = batch_print_settings()["WORKERS"] or os.cpu_count() or 1
+    return max(1, min(workers, documents))
+
+
+# -----------------------
+# Documents
+# -----------------------
+def pr_document(pr):
+    return f"PR {pr.pr_number or pr.pk}", "procurement/pr_preview.html", {
+        "pr": pr,
+        "layout": pr_print_layout(pr),
+    }
+
+
+def rfq_document(rfq):
+    return f"RFQ {rfq.rfq_number or rfq.pk}", "procurement/rfq_preview.html", {
+        "rfq": rfq,
+        "layout": rfq_print_layout(rfq),
+        "base_template": PRINT_BASE,
+    }
+
+
+def po_document(po):
+    lines = list(po.lines.all())
+    return f"PO {po.po_number or po.pk}", "procurement/po_print.html", {
+        "po": po,
+        "lines": lines,
+        "total": sum((line.line_total for line in lines), 0),
+    }
+
+
+# kind -> (queryset, document(obj) -> (bookmark title, template, context))
+DOCUMENTS = {
+    "pr": (lambda: PurchaseRequest.objects.all(), pr_document),
+    "rfq": (lambda: RequestForQuotation.objects.prefetch_related("consolidated_prs"), rfq_document),
+    "po": (lambda: PurchaseOrder.objects.select_related("supplier", "aoq"), po_document),
+}
+
+
+def render_documents(kind, ids):
+    """[(title, html)] for the ``ids`` that still exist, in ``ids`` order."""
+    queryset, document = DOCUMENTS[kind]
+    objects = queryset().in_bulk(ids)
+    rendered = []
+    for pk in ids:
+        if pk in objects:
+            title, template, context = document(objects[pk])
+            rendered.append((title, render_to_string(template, context)))
+    return rendered
+
+
+def html_to_pdfs(htmls, base_url):
+    """PDF bytes for each HTML string, converted in parallel across CPU cores."""
+    workers = worker_count(len(htmls))
+    if workers == 1:
+        return [pdf.html_to_pdf(html, base_url) for html in htmls]
+    # spawn: forking a threaded web worker can copy held locks into the child
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(pdf.html_to_pdf, htmls, repeat(base_url)))
+
+
+# -----------------------
+# Jobs
+# -----------------------
+def create_print_job(kind, ids, user, base_url=""):
+    if kind not in DOCUMENTS:
+        raise ValueError(f"Unknown document kind {kind!r}")
+    limit = batch_print_settings()["MAX_DOCUMENTS"]
+    if len(ids) > limit:
+        raise ValueError(f"At most {limit} documents can be printed in one job.")
+    job = PrintJob.objects.create(kind=kind, document_ids=list(ids), created_by=user, base_url=base_url)
+    transaction.on_commit(lambda: start_print_job(job.pk))
+    return job
+
+
+def start_print_job(job_id):
+    threading.Thread(target=_run_in_thread, args=(job_id,), name=f"print-job-{job_id}", daemon=True).start()
+
+
+def _run_in_thread(job_id):
+    try:
+        run_print_job(job_id)
+    finally:
+        connection.close()
+
+
+def run_print_job(job_id):
+    """Render, convert and merge one pending job. Returns False if another runner has it."""
+    claimed = PrintJob.objects.filter(pk=job_id, status="pending").update(
+        status="running", started_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+    job = PrintJob.objects.get(pk=job_id)
+    with span("print_job.run", job_id=job.pk, kind=job.kind, documents=len(job.document_ids)) as job_span:
+        try:
+            with span("print_job.render_html"):
+                rendered = render_documents(job.kind, job.document_ids)
+            if not rendered:
+                raise ValueError("None of the selected documents exist any more.")
+            with span("print_job.html_to_pdf", workers=worker_count(len(rendered))):
+                parts = html_to_pdfs([html for _, html in rendered], job.base_url)
+            with span("print_job.merge"):
+                data, job.page_count = pdf.merge_pdfs(zip([title for title, _ in rendered], parts))
+            job.file.save(f"{job.kind}-batch-{job.pk}.pdf", ContentFile(data), save=False)
+            job.status = "done"
+        except Exception as exc:
+            logger.exception("Print job %s failed", job.pk)
+            job.status = "failed"
+            job.error = f"{type(exc).__name__}: {exc}"
+        job.finished_at = timezone.now()
+        job.save()
+        job_span.set("status", job.status)
+    return True
@@ -0,0 +1,192 @@
+"""
+Change log behind the changefeed endpoint (GET /api/changes/).
+
+Database triggers append one ChangeLog row for every INSERT, UPDATE and
+DELETE on the tracked tables, so bulk_create, QuerySet.update(), cascades and
+raw SQL are recorded as well as save(). The row id is the client's cursor:
+
+    GET /api/changes/                    -> {"cursor": 1042, "more": false, "changes": []}
+    GET /api/changes/?cursor=1042        -> what changed since, oldest first
+    GET /api/changes/?cursor=1042&models=pr,po
+
+A client downloads the full lists once (the list APIs), then only asks for
+changes: the cost is the number of changes, not the size of the tables.
+
+The triggers are (re)installed after every migrate: SQLite drops a table's
+triggers when a migration rebuilds it.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, router
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+from django.utils import timezone
+
+# changefeed name -> model; the names are part of the API
+TRACKED = {
+    "pr": "procurement.PurchaseRequest",
+    "pr_item": "procurement.PRItem",
+    "rfq": "procurement.RequestForQuotation",
+    "bid": "procurement.Bid",
+    "aoq": "procurement.AbstractOfQuotation",
+    "po": "procurement.PurchaseOrder",
+}
+
+
+def changefeed_settings():
+    config = {"PAGE_SIZE": 500, "MAX_PAGE_SIZE": 5000, "SETTLE_SECONDS": 0}
+    config.update(getattr(settings, "CHANGEFEED", {}))
+    return config
+
+
+# -----------------------
+# Triggers
+# -----------------------
+def _tables():
+    return {name: apps.get_model(label)._meta.db_table for name, label in TRACKED.items()}
+
+
+def _sqlite_statements(log_table):
+    statements = []
+    for name, table in _tables().items():
+        for event, action, row in (("INSERT", "i", "NEW"), ("UPDATE", "u", "NEW"), ("DELETE", "d", "OLD")):
+            trigger = f"changelog_{table}_{event.lower()}"
+            statements.append(
+                f'CREATE TRIGGER IF NOT EXISTS "{trigger}" AFTER {event} ON "{table}" FOR EACH ROW BEGIN '
+                f'INSERT INTO "{log_table}" (model, object_id, action, changed_at) '
+                f"VALUES ('{name}', {row}.id, '{action}', strftime('%Y-%m-%d %H:%M:%f', 'now')); END"
+            )
+    return statements
+
+
+def _postgresql_statements(log_table):
+    statements = [
+        f"""
+        CREATE OR REPLACE FUNCTION changelog_record() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO "{log_table}" (model, object_id, action, changed_at)
+                VALUES (TG_ARGV[0], OLD.id, 'd', clock_timestamp());
+            ELSE
+                INSERT INTO "{log_table}" (model, object_id, action, changed_at)
+                VALUES (TG_ARGV[0], NEW.id, CASE TG_OP WHEN 'INSERT' THEN 'i' ELSE 'u' END, clock_timestamp());
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    ]
+    for name, table in _tables().items():
+        trigger = f"changelog_{table}"
+        statements += [
+            f'DROP TRIGGER IF EXISTS "{trigger}" ON "{table}"',
+            f'CREATE TRIGGER "{trigger}" AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+            f"FOR EACH ROW EXECUTE FUNCTION changelog_record('{name}')",
+        ]
+    return statements
+
+
+def install_triggers(using="default"):
+    from procurement.models import ChangeLog
+
+    connection = connections[using]
+    log_table = ChangeLog._meta.db_table
+    if connection.vendor == "sqlite":
+        statements = _sqlite_statements(log_table)
+    elif connection.vendor == "postgresql":
+        statements = _postgresql_statements(log_table)
+    else:
+        raise NotImplementedError(f"No change log triggers for {connection.vendor}")
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_triggers(using="default"):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for table in _tables().values():
+            if connection.vendor == "sqlite":
+                for event in ("insert", "update", "delete"):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS "changelog_{table}_{event}"')
+            else:
+                cursor.execute(f'DROP TRIGGER IF EXISTS "changelog_{table}" ON "{table}"')
+        if connection.vendor == "postgresql":
+            cursor.execute("DROP FUNCTION IF EXISTS changelog_record()")
+
+
+@receiver(post_migrate)
+def reinstall_triggers(sender, using="default", **kwargs):
+    from procurement.models import ChangeLog
+
+    if sender.name != "procurement" or not router.allow_migrate_model(using, ChangeLog):
+        return
+    # not there when migrating back past the migration that creates it
+    if ChangeLog._meta.db_table in connections[using].introspection.table_names():
+        install_triggers(using)
+
+
+# -----------------------
+# Reading
+# -----------------------
+def _settle_horizon():
+    """Rows changed after this may still have uncommitted predecessors; None when not settling."""
+    settle = changefeed_settings()["SETTLE_SECONDS"]
+    return timezone.now() - timedelta(seconds=settle) if settle else None
+
+
+def head():
+    """
+    The cursor of the newest settled change: a client starting here must not
+    skip a lower id that is still to commit (see read()).
+    """
+    from procurement.models import ChangeLog
+
+    rows = ChangeLog.objects.all()
+    horizon = _settle_horizon()
+    if horizon is not None:
+        rows = rows.filter(changed_at__lte=horizon)
+    last = rows.order_by("-pk").values_list("pk", flat=True).first()
+    return last or 0
+
+
+def read(cursor, limit, models=None):
+    """
+    Changes after ``cursor``, at most ``limit`` log rows' worth, coalesced so
+    each object appears once with its last action. Returns (changes, cursor,
+    more) where changes is a list of (name, object_id, action), oldest first.
+
+    Rows younger than SETTLE_SECONDS are left for the next call: on PostgreSQL
+    ids are taken before commit, so a lower id can still become visible after
+    a higher one has been read.
+    """
+    from procurement.models import ChangeLog
+
+    rows = ChangeLog.objects.filter(pk__gt=cursor).order_by("pk")
+    if models is not None:
+        rows = rows.filter(model__in=models)
+    rows = list(rows.values_list("pk", "model", "object_id", "action", "changed_at")[:limit])
+    more = len(rows) == limit
+
+    horizon = _settle_horizon()
+    if horizon is not None:
+        for i, row in enumerate(rows):
+            if row[4] > horizon:
+                rows, more = rows[:i], False  # the rest is not ready; ask again later
+                break
+
+    latest = {}
+    for pk, name, object_id, action, _changed_at in rows:
+        latest.pop((name, object_id), None)  # re-insert so the order is that of the last change
+        latest[name, object_id] = action
+    changes = [(name, object_id, action) for (name, object_id), action in latest.items()]
+    return changes, rows[-1][0] if rows else cursor, more
+
+
+def oldest():
+    """The id of the oldest change still in the log, or None."""
+    from procurement.models import ChangeLog
+
+    return ChangeLog.objects.order_by("pk").values_list("pk", flat=True).first()
@@ -0,0 +1,136 @@
+"""
+Conditional GET (ETag / Last-Modified) for the PR, RFQ and AOQ pages.
+
+The validator for a page is derived from the newest ``updated_at`` and the
+row counts of every table the page renders (PR + items + attachments,
+RFQ + PRs + items + bids + bid lines, ...). All of it is read with a single
+query of correlated subqueries, so an unchanged page costs one cheap SELECT
+and is answered with 304 before the view runs.
+
+Usage:
+    @conditional_page("pr")
+    def pr_preview(request, pk): ...
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.db.models import F, Func, OuterRef, Q, Subquery
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def _aggregate(queryset, function, field):
+    # MAX()/COUNT() as a plain Func keeps Django from adding a GROUP BY, so
+    # the subquery aggregates over every row matched by the OuterRef filter.
+    return Subquery(
+        queryset.order_by().annotate(value=Func(F(field), function=function)).values("value")[:1]
+    )
+
+
+def _newest_and_count(queryset, field="updated_at"):
+    return _aggregate(queryset, "MAX", field), _aggregate(queryset, "COUNT", "pk")
+
+
+def _pr_graph():
+    from procurement.models import PurchaseRequest, PRItem, PRAttachment
+
+    items_at, items_n = _newest_and_count(PRItem.objects.filter(purchase_request=OuterRef("pk")))
+    files_at, files_n = _newest_and_count(
+        PRAttachment.objects.filter(pr=OuterRef("pk")), field="uploaded_at"
+    )
+    return PurchaseRequest.objects.annotate(
+        items_at=items_at, items_n=items_n,
+        files_at=files_at, files_n=files_n,
+        rfq_at=F("consolidated_in__updated_at"),
+    ), ("updated_at", "last_update", "items_at", "items_n", "files_at", "files_n", "rfq_at")
+
+
+def _rfq_relations(rfq_ref):
+    from procurement.models import PurchaseRequest, RFQItem, Bid, BidLine
+
+    linked_prs = Q(rfq=rfq_ref) | Q(rfqs=rfq_ref)
+    prs_at, prs_n = _newest_and_count(PurchaseRequest.objects.filter(linked_prs))
+    # RFQ items are frozen when the RFQ is issued, so only their count can change
+    items_n = _aggregate(RFQItem.objects.filter(rfq=rfq_ref), "COUNT", "pk")
+    bids_at, bids_n = _newest_and_count(Bid.objects.filter(rfq=rfq_ref))
+    lines_at, lines_n = _newest_and_count(BidLine.objects.filter(bid__rfq=rfq_ref))
+    return {
+        "prs_at": prs_at, "prs_n": prs_n,
+        "items_n": items_n,
+        "bids_at": bids_at, "bids_n": bids_n,
+        "lines_at": lines_at, "lines_n": lines_n,
+    }
+
+
+def _rfq_graph():
+    from procurement.models import RequestForQuotation
+
+    relations = _rfq_relations(OuterRef("pk"))
+    return RequestForQuotation.objects.annotate(**relations), ("updated_at", *relations)
+
+
+def _aoq_graph():
+    from procurement.models import AbstractOfQuotation, AOQLine
+
+    relations = _rfq_relations(OuterRef("rfq_id"))
+    aoq_lines_at, aoq_lines_n = _newest_and_count(AOQLine.objects.filter(aoq=OuterRef("pk")))
+    return AbstractOfQuotation.objects.annotate(
+        rfq_at=F("rfq__updated_at"),
+        aoq_lines_at=aoq_lines_at, aoq_lines_n=aoq_lines_n,
+        **relations,
+    ), ("updated_at", "rfq_at", "aoq_lines_at", "aoq_lines_n", *relations)
+
+
+GRAPHS = {
+    "pr": _pr_graph,
+    "rfq": _rfq_graph,
+    "aoq": _aoq_graph,
+}
+
+
+def page_validator(request, graph, pk):
+    """
+    Return ``(etag, last_modified)`` for the page of object ``pk``, or
+    ``(None, None)`` when conditional handling must be skipped. Memoized on
+    the request so ETag and Last-Modified share one query.
+    """
+    cache = request.__dict__.setdefault("_page_validators", {})
+    key = (graph, pk)
+    if key in cache:
+        return cache[key]
+
+    result = (None, None)
+    # a 304 would leave flash messages unrendered until the next page
+    if not len(get_messages(request)):
+        queryset, fields = GRAPHS[graph]()
+        row = queryset.filter(pk=pk).values_list(*fields).first()
+        if row is not None:
+            stamps = [v for v in row if isinstance(v, datetime)]
+            # the page differs per user (role buttons) and per query string
+            raw = "|".join([str(request.user.pk), request.get_full_path(), *map(str, row)])
+            result = (hashlib.md5(raw.encode()).hexdigest(), max(stamps) if stamps else None)
+    cache[key] = result
+    return result
+
+
+def conditional_page(graph, pk_kwarg="pk"):
+    """Answer unchanged GETs of a ``graph`` page with 304 Not Modified."""
+    def etag_func(request, *args, **kwargs):
+        return page_validator(request, graph, kwargs[pk_kwarg])[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        return page_validator(request, graph, kwargs[pk_kwarg])[1]
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # always revalidate, never store in shared caches
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Database helpers shared by the workflow views.
+
+- SQLite connections are tuned (WAL, busy timeout, cache) as soon as Django
+  opens them, using the PRAGMAs in settings.SQLITE_PRAGMAS.
+- retry_on_locked() re-runs a write transaction a few times when SQLite
+  answers "database is locked" instead of failing the request.
+- query_hook() wraps every query of the current request context, on
+  whichever thread runs it.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Run ``PRAGMA name=value`` for every entry of ``pragmas`` on ``cursor``."""
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, pragmas)
+
+
+# -----------------------
+# Per-context query hooks
+# -----------------------
+_query_hooks = ContextVar("query_hooks", default=())
+
+
+@contextmanager
+def query_hook(hook):
+    """
+    Run ``hook`` (an execute_wrapper) around every query made in the current
+    context. Unlike connection.execute_wrapper() this also sees the queries
+    that, under ASGI, the async ORM and adapted sync views run on other
+    threads' connections: sync_to_async() carries the context over.
+    """
+    token = _query_hooks.set(_query_hooks.get() + (hook,))
+    try:
+        yield hook
+    finally:
+        _query_hooks.reset(token)
+
+
+def _run_query_hooks(execute, sql, params, many, context):
+    for hook in reversed(_query_hooks.get()):
+        execute = partial(hook, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_hooks(sender, connection, **kwargs):
+    if _run_query_hooks not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_run_query_hooks)
+
+
+def is_locked_error(exc):
+    message = str(exc).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_on_locked(func=None, *, attempts=None, delay=None, using=DEFAULT_DB_ALIAS):
+    """
+    Retry ``func`` when the database reports a lock conflict.
+
+    ``func`` should open its own ``transaction.atomic()`` block so that each
+    attempt starts from a clean transaction. When called from inside an outer
+    atomic block the retry is skipped: only the outermost transaction can be
+    safely replayed.
+
+    Usage:
+        @retry_on_locked
+        @transaction.atomic
+        def save_something(...): ...
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            max_attempts = attempts or getattr(settings, "DB_WRITE_RETRY_ATTEMPTS", 3)
+            base_delay = delay if delay is not None else getattr(settings, "DB_WRITE_RETRY_DELAY", 0.05)
+
+            if transaction.get_connection(using).in_atomic_block:
+                return fn(*args, **kwargs)
+
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return fn(*args, **kwargs)
+                except OperationalError as exc:
+                    if not is_locked_error(exc) or attempt == max_attempts:
+                        raise
+                    wait = base_delay * (2 ** (attempt - 1)) * (1 + random.random())
+                    logger.warning(
+                        "%s hit a locked database (attempt %s/%s), retrying in %.3fs",
+                        fn.__qualname__, attempt, max_attempts, wait,
+                    )
+                    time.sleep(wait)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -1,70 +1,95 @@
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from google.oauth2 import service_account
+"""
+Google Drive uploads.
+
+The Google API client is heavy to import (googleapiclient.discovery alone
+pulls in httplib2, google.auth and the crypto backends), so nothing from it
+is imported at module level. DriveService imports and builds the client the
+first time a Drive call is made; worker boot, management commands and tests
+that never touch Drive don't pay for it.
+
+get_drive_service() keeps one DriveService per process, but the client under
+it is per thread: it talks through an httplib2.Http, which is not
+thread-safe, and request threads and the batch-print pool upload at the same
+time. Only the credentials are shared; build() reads the Drive discovery
+document from the copy bundled with the library, so a thread's first call
+makes no extra request.
+"""
 import io
+import threading
+from functools import lru_cache
+
 from django.conf import settings
 
-def upload_file_to_drive(file, filename):
-    SCOPES = ['https://www.googleapis.com/auth/drive.file']
-    
-    creds = service_account.Credentials.from_service_account_file(
-        settings.GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES
-    )
+from procurement.utils.metrics import timed
 
-    service = build('drive', 'v3', credentials=creds)
+SCOPES = ['https://www.googleapis.com/auth/drive.file']
 
-    file_metadata = {
-        'name': filename,
-        'parents': [settings.GOOGLE_DRIVE_FOLDER_ID]
-    }
 
-    media = MediaIoBaseUpload(file, mimetype=file.content_type, resumable=True)
+class DriveService:
+    """Drive v3 operations used by the app, on a lazily built client."""
 
-    uploaded_file = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id, webViewLink'
-    ).execute()
+    def __init__(self, credentials_file, scopes=SCOPES):
+        self.credentials_file = credentials_file
+        self.scopes = scopes
+        self._credentials = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
 
-    return uploaded_file.get("webViewLink")
+    @property
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                from google.oauth2.service_account import Credentials
 
-def create_folder_in_drive(folder_name, parent_folder_id=None):
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
-    from google.oauth2.service_account import Credentials
+                self._credentials = Credentials.from_service_account_file(self.credentials_file, scopes=self.scopes)
+        return self._credentials
+
+    @property
+    def client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from googleapiclient.discovery import build
+
+            client = self._local.client = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+        return client
+
+    def create_folder(self, folder_name, parent_folder_id=None):
+        metadata = {
+            'name': folder_name,
+            'mimeType': 'application/vnd.google-apps.folder'
+        }
+        if parent_folder_id:
+            metadata['parents'] = [parent_folder_id]
+
+        folder = self.client.files().create(body=metadata, fields='id').execute()
+        return folder.get('id')
 
-    creds = Credentials.from_service_account_file(settings.GOOGLE_DRIVE_CREDENTIALS)
-    service = build('drive', 'v3', credentials=creds)
+    def upload(self, file, folder_id=None):
+        from googleapiclient.http import MediaIoBaseUpload
 
-    metadata = {
-        'name': folder_name,
-        'mimeType': 'application/vnd.google-apps.folder'
-    }
-    if parent_folder_id:
-        metadata['parents'] = [parent_folder_id]
+        file_metadata = {'name': file.name}
+        if folder_id:
+            file_metadata['parents'] = [folder_id]
 
-    folder = service.files().create(body=metadata, fields='id').execute()
-    return folder.get('id')
+        media = MediaIoBaseUpload(io.BytesIO(file.read()), mimetype=file.content_type)
+        with timed("drive_upload_seconds"):
+            uploaded = self.client.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            ).execute()
+
+        return uploaded.get("id")
+
+
+@lru_cache(maxsize=1)
+def get_drive_service():
+    return DriveService(settings.GOOGLE_SERVICE_ACCOUNT_FILE)
+
+
+def create_folder_in_drive(folder_name, parent_folder_id=None):
+    return get_drive_service().create_folder(folder_name, parent_folder_id)
 
 
 def upload_file_to_drive(file, folder_id=None):
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseUpload
-    from google.oauth2.service_account import Credentials
-    import io
-
-    creds = Credentials.from_service_account_file(settings.GOOGLE_DRIVE_CREDENTIALS)
-    service = build('drive', 'v3', credentials=creds)
-
-    file_metadata = {'name': file.name}
-    if folder_id:
-        file_metadata['parents'] = [folder_id]
-
-    media = MediaIoBaseUpload(io.BytesIO(file.read()), mimetype=file.content_type)
-    uploaded = service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id'
-    ).execute()
-
-    return uploaded.get("id")
+    return get_drive_service().upload(file, folder_id)
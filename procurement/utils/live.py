@@ -0,0 +1,203 @@
+"""
+Live updates for the PR list and dashboards, pushed over Server-Sent Events.
+
+Workflow code records what happened as outbox events on the "live.*" topics,
+in the transaction that did it:
+
+    live.pr_status_changed(pr)
+
+The outbox rows are the broadcast log. Each web process runs one Broadcaster
+while it has subscribers: a single task reads new live events from the
+outbox - after POLL_INTERVAL seconds, or as soon as this process commits
+some - and hands them to every connected /events/ stream, which drops the
+ones its user may not see. Clients share that one query, so the database
+load does not grow with the number of open pages.
+
+On PostgreSQL outbox ids are taken before commit, so an event can become
+visible after one with a higher id has been read; events younger than
+SETTLE_SECONDS are left for a later poll (and replay) so none is skipped.
+
+Streams are async views and need an ASGI server (see bench_ajax); under WSGI
+the endpoint answers 204 and pages fall back to reloading.
+"""
+import asyncio
+import contextvars
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.timezone import localtime
+
+from procurement.utils import outbox
+from procurement.utils.api import dumps
+
+logger = logging.getLogger(__name__)
+
+LIVE_TOPICS = ("live.pr_created", "live.pr_status", "live.rfq_issued", "live.po_issued")
+
+
+def live_settings():
+    config = {"POLL_INTERVAL": 2.0, "HEARTBEAT": 15, "REPLAY_LIMIT": 200, "QUEUE_SIZE": 1000, "SETTLE_SECONDS": 0}
+    config.update(getattr(settings, "LIVE_EVENTS", {}))
+    return config
+
+
+def settle_horizon():
+    """Events created after this may still have uncommitted predecessors; None when not settling."""
+    settle = live_settings()["SETTLE_SECONDS"]
+    return timezone.now() - timedelta(seconds=settle) if settle else None
+
+
+# -----------------------
+# Publishing
+# -----------------------
+def _pr_fields(pr):
+    return {
+        "pr": pr.pk,
+        "owners": [pr.created_by_id] if pr.created_by_id else [],
+        "pr_number": pr.pr_number or "",
+        "status": pr.status,
+        "status_display": pr.get_status_display(),
+        "last_update": date_format(localtime(pr.last_update), "M d, Y h:i A"),
+    }
+
+
+def pr_created(pr, using=None):
+    counter = "unassigned_pr" if (pr.pr_number or "").lower() in ("", "unassigned") else "pr"
+    outbox.publish("live.pr_created", [pr.pk], {**_pr_fields(pr), "counts": {counter: 1}}, using=using)
+
+
+def pr_status_changed(pr, using=None):
+    outbox.publish("live.pr_status", [pr.pk], _pr_fields(pr), using=using)
+
+
+def rfq_issued(rfq, prs):
+    prs = list(prs)
+    outbox.publish("live.rfq_issued", [rfq.pk], {
+        "rfq": rfq.pk,
+        "rfq_number": rfq.rfq_number or "",
+        "prs": [pr.pk for pr in prs],
+        "owners": sorted({pr.created_by_id for pr in prs if pr.created_by_id}),
+        "counts": {"rfq": 1},
+    })
+
+
+def pos_issued(aoq, pos):
+    from procurement.models import PurchaseRequest
+
+    prs = PurchaseRequest.objects.filter(pk__in=aoq.rfq.pr_ids())
+    outbox.publish("live.po_issued", [aoq.pk], {
+        "aoq": aoq.pk,
+        "pos": [{"id": po.pk, "po_number": po.po_number or "", "supplier": po.supplier_id} for po in pos],
+        "prs": sorted(pr.pk for pr in prs),
+        "owners": sorted({pr.created_by_id for pr in prs if pr.created_by_id}),
+        "counts": {"po": len(pos)},
+    })
+
+
+def can_see(event, user_id, see_all):
+    """Procurement and Admin see every event; anyone else only those of their own PRs."""
+    return see_all or user_id in event.payload.get("owners", ())
+
+
+# -----------------------
+# Broadcasting
+# -----------------------
+class Subscription:
+    def __init__(self, size):
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False  # too slow to keep up; the stream ends and the client resumes from its last id
+
+
+class Broadcaster:
+    def __init__(self):
+        self.subscriptions = set()
+        self.last_id = None
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:  # first use, or a new loop (tests, reloader)
+            self.loop, self.wakeup, self.task = loop, asyncio.Event(), None
+            self.subscriptions.clear()
+        subscription = Subscription(live_settings()["QUEUE_SIZE"])
+        self.subscriptions.add(subscription)
+        if self.task is None or self.task.done():
+            self.last_id = None
+            self._start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+        if not self.subscriptions and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def _start(self):
+        # a fresh context: the task outlives the request that started it, and
+        # its queries must not be counted or traced as that request's
+        self.task = self.loop.create_task(self.run(), context=contextvars.Context())
+
+    def wake(self):
+        """Poll now; safe to call from any thread."""
+        loop, wakeup = self.loop, self.wakeup
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def run(self):
+        interval = live_settings()["POLL_INTERVAL"]
+        while self.subscriptions:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("Could not read live events")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def poll(self):
+        from procurement.models import OutboxEvent
+
+        live = OutboxEvent.objects.filter(topic__in=LIVE_TOPICS)
+        horizon = settle_horizon()
+        if self.last_id is None:
+            # subscribers get what happens from now on (plus their own replay)
+            settled = live if horizon is None else live.filter(created_at__lte=horizon)
+            self.last_id = (await settled.aaggregate(last=Max("pk")))["last"] or 0
+            return
+        async for event in live.filter(pk__gt=self.last_id).order_by("pk")[:500]:
+            if horizon is not None and event.created_at > horizon:
+                break  # not settled; the next poll starts here
+            self.last_id = event.pk
+            for subscription in list(self.subscriptions):
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    self.subscriptions.discard(subscription)
+
+
+broadcaster = Broadcaster()
+
+
+def _wake_broadcaster(events):
+    # the events are committed; let this process's streams have them right away
+    broadcaster.wake()
+
+
+for _topic in LIVE_TOPICS:
+    outbox.handler(_topic)(_wake_broadcaster)
+
+
+def sse_message(event):
+    """One Server-Sent Events message for an OutboxEvent."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (
+        event.pk, event.topic.removeprefix("live.").encode(), dumps(event.payload),
+    )
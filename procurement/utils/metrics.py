@@ -0,0 +1,333 @@
+"""
+Prometheus-format metrics.
+
+A small in-process registry (counters and histograms with labels) rendered
+in the Prometheus text exposition format by the /metrics view.
+
+- MetricsMiddleware records latency, DB query count/time and response size
+  per resolved URL name.
+- InstrumentedDjangoTemplates (the TEMPLATES backend) adds template render
+  time to the same per-request figures.
+- Domain events (PRs created, status transitions, awards, POs issued, Drive
+  uploads) are counted on commit, by the receivers at the bottom of this
+  module or at the call site.
+
+Multiple worker processes: with settings.METRICS["DIR"] set, every process
+periodically writes its totals to ``<DIR>/<pid>.json`` and /metrics sums all
+files, so counters keep their totals no matter which worker is scraped.
+Clear the directory when deploying, like prometheus_client's multiprocess
+mode.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+from procurement.utils.db import query_hook
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1_000, 5_000, 25_000, 100_000, 500_000, 2_000_000)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Request latency by URL name.", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "Response body size by URL name.", SIZE_BUCKETS),
+    "db_queries_total": ("counter", "SQL statements executed, by URL name.", None),
+    "db_query_seconds_total": ("counter", "Time spent in SQL, by URL name.", None),
+    "template_render_seconds_total": ("counter", "Time spent rendering templates, by URL name.", None),
+    "procurement_prs_created_total": ("counter", "Purchase requests created.", None),
+    "procurement_pr_status_transitions_total": ("counter", "PR status transitions.", None),
+    "procurement_awards_total": ("counter", "AOQs awarded.", None),
+    "procurement_pos_issued_total": ("counter", "Purchase orders issued.", None),
+    "drive_upload_seconds": ("histogram", "Google Drive upload latency, by outcome.", LATENCY_BUCKETS),
+    "tracing_exports_dropped_total": ("counter", "Traces dropped because the OTLP export queue was full.", None),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> float
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_last_dump = 0.0
+_timer = ContextVar("request_timer", default=None)  # the running request's _RequestTimer
+
+
+def metrics_settings():
+    config = {"ENABLED": True, "DIR": None, "DUMP_INTERVAL": 1.0, "TOKEN": None}
+    config.update(getattr(settings, "METRICS", {}))
+    return config
+
+
+def _key(name, labels):
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric {name!r}")
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    buckets = METRICS[name][2]
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        series[bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+
+def inc_on_commit(name, amount=1, using=None, **labels):
+    """Count an event only once the transaction recording it commits."""
+    transaction.on_commit(lambda: inc(name, amount, **labels), using=using)
+
+
+@contextmanager
+def timed(name, **labels):
+    """Observe the block's duration; adds outcome="ok"/"error" to the labels."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# -----------------------
+# Multi-process aggregation
+# -----------------------
+def _snapshot():
+    with _lock:
+        return {
+            "counters": [[name, list(labels), value] for (name, labels), value in _counters.items()],
+            "histograms": [[name, list(labels), list(series)] for (name, labels), series in _histograms.items()],
+        }
+
+
+def dump(force=False):
+    """Write this process's totals to METRICS["DIR"] (throttled unless forced)."""
+    global _last_dump
+    config = metrics_settings()
+    if not config["DIR"]:
+        return
+    now = time.monotonic()
+    if not force and now - _last_dump < config["DUMP_INTERVAL"]:
+        return
+    _last_dump = now
+    directory = Path(config["DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".{os.getpid()}.json.tmp"
+    tmp.write_text(json.dumps(_snapshot()))
+    os.replace(tmp, directory / f"{os.getpid()}.json")
+
+
+def _merged():
+    counters, histograms = {}, {}
+    snapshots = [_snapshot()]
+    directory = metrics_settings()["DIR"]
+    if directory and Path(directory).exists():
+        own = f"{os.getpid()}.json"
+        for path in Path(directory).glob("*.json"):
+            if path.name == own:
+                continue  # the live registry is fresher than our last dump
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], series)]
+            else:
+                histograms[key] = list(series)
+    return counters, histograms
+
+
+# -----------------------
+# Exposition
+# -----------------------
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_text():
+    """All metrics, summed across processes, in Prometheus text format 0.0.4."""
+    counters, histograms = _merged()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            continue
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{name}_bucket{_labels(labels, [('le', str(le))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {series[-1]!r}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Request / template instrumentation
+# -----------------------
+class _RequestTimer:
+    """Per-request DB and template time; also the request's query hook."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+@contextmanager
+def _request_timer():
+    timer = _RequestTimer()
+    token = _timer.set(timer)
+    try:
+        with query_hook(timer):
+            yield timer
+    finally:
+        _timer.reset(token)
+
+
+class MetricsMiddleware:
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_settings()["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with _request_timer() as timer:
+            response = self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        return self.record(request, response, timer, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with _request_timer() as timer:
+            response = await self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                await sync_to_async(response.render)()
+        return self.record(request, response, timer, time.perf_counter() - started)
+
+    def record(self, request, response, timer, elapsed):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+        if view == "metrics":
+            return response
+        observe("http_request_duration_seconds", elapsed, view=view, method=request.method,
+                status=str(response.status_code)[0] + "xx")
+        if not response.streaming:
+            observe("http_response_size_bytes", len(response.content), view=view)
+        inc("db_queries_total", timer.count, view=view)
+        inc("db_query_seconds_total", timer.seconds, view=view)
+        inc("template_render_seconds_total", timer.template_seconds, view=view)
+        dump()
+        return response
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timer = _timer.get()
+        if timer is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timer.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The stock Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+atexit.register(dump, force=True)
+
+
+# -----------------------
+# Domain events
+# -----------------------
+@receiver(post_save, sender="procurement.PurchaseRequest", dispatch_uid="metrics_pr_created")
+def count_pr_created(sender, instance, created, using, **kwargs):
+    if created:
+        inc_on_commit("procurement_prs_created_total", using=using)
+
+
+@receiver(post_save, sender="procurement.PurchaseOrder", dispatch_uid="metrics_po_issued")
+def count_po_issued(sender, instance, created, using, **kwargs):
+    if created:
+        inc_on_commit("procurement_pos_issued_total", using=using)
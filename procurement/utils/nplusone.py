@@ -0,0 +1,180 @@
+"""
+Runtime N+1 query detector.
+
+QueryShapeMiddleware fingerprints every SQL statement a request runs (literal
+values and IN-lists collapsed), so ``SELECT ... WHERE "bid"."rfq_id" = 7`` and
+``... = 8`` count as the same shape. A shape repeated THRESHOLD times or more
+in one request is logged with the template line or project frame that issued
+it, and folded into a per-view report of the worst offenders
+(``worst_offenders()``, shown on the admin Profiling page).
+
+Enabled by settings.N_PLUS_ONE["ENABLED"] (on with DEBUG by default); the
+middleware drops out entirely when disabled.
+"""
+import logging
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from procurement.utils.db import query_hook
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+# execute_wrappers and middleware that sit between the caller and the query
+INSTRUMENTATION_MODULES = {
+    "procurement.utils.db",
+    "procurement.utils.nplusone",
+    "procurement.utils.metrics",
+    "procurement.utils.profiling",
+}
+
+_report = {}  # view name -> {fingerprint: stats}
+_report_lock = threading.Lock()
+
+
+def n_plus_one_settings():
+    config = {
+        "ENABLED": settings.DEBUG,
+        "THRESHOLD": 5,
+        "REPORT_SIZE": 20,
+    }
+    config.update(getattr(settings, "N_PLUS_ONE", {}))
+    return config
+
+
+def fingerprint(sql):
+    """Collapse literals and IN-lists so same-shape statements compare equal."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql)
+    sql = sql.replace("%s", "?")
+    return _IN_LIST.sub("IN (...)", sql).strip()
+
+
+def _origin(frame):
+    """The template line rendering this query, else the innermost project frame."""
+    project_root = str(Path(settings.BASE_DIR))
+    first_project_frame = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "render_annotated" and code.co_filename.endswith(("django/template/base.py", "django\\template\\base.py")):
+            node = frame.f_locals.get("self")
+            token = getattr(node, "token", None)
+            origin = getattr(node, "origin", None)
+            if token is not None and origin is not None:
+                return f"{origin.template_name or origin.name}:{token.lineno}"
+        filename = code.co_filename
+        if (first_project_frame is None and filename.startswith(project_root)
+                and "site-packages" not in filename
+                and frame.f_globals.get("__name__") not in INSTRUMENTATION_MODULES):
+            first_project_frame = f"{Path(filename).relative_to(project_root)}:{frame.f_lineno} in {code.co_name}"
+        frame = frame.f_back
+    return first_project_frame or "unknown"
+
+
+class QueryShapeRecorder:
+    """Query hook that counts statement shapes for one request."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] == self.threshold:
+            # only pay for a stack walk once a shape is actually suspicious
+            self.origins[shape] = _origin(sys._getframe(1))
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        return [
+            (shape, count, self.origins.get(shape, "unknown"))
+            for shape, count in self.counts.most_common()
+            if count >= self.threshold
+        ]
+
+
+def record(view_name, repeated, report_size):
+    now = timezone.now()
+    with _report_lock:
+        offenders = _report.setdefault(view_name, {})
+        for shape, count, origin in repeated:
+            stats = offenders.setdefault(shape, {"requests": 0, "max_repeats": 0, "total_repeats": 0})
+            stats["requests"] += 1
+            stats["max_repeats"] = max(stats["max_repeats"], count)
+            stats["total_repeats"] += count
+            stats["origin"] = origin
+            stats["last_seen"] = now
+        if len(offenders) > report_size:
+            keep = sorted(offenders, key=lambda s: offenders[s]["total_repeats"], reverse=True)[:report_size]
+            _report[view_name] = {shape: offenders[shape] for shape in keep}
+
+
+def worst_offenders():
+    """Per-view rows for this process, worst (most repeated queries) first."""
+    with _report_lock:
+        rows = [
+            {"view_name": view_name, "sql": shape, **stats}
+            for view_name, offenders in _report.items()
+            for shape, stats in offenders.items()
+        ]
+    rows.sort(key=lambda row: row["total_repeats"], reverse=True)
+    return rows
+
+
+def reset_report():
+    with _report_lock:
+        _report.clear()
+
+
+class QueryShapeMiddleware:
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.config = n_plus_one_settings()
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with query_hook(QueryShapeRecorder(self.config["THRESHOLD"])) as recorder:
+            response = self.get_response(request)
+            # TemplateResponses query while rendering
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        with query_hook(QueryShapeRecorder(self.config["THRESHOLD"])) as recorder:
+            response = await self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                await sync_to_async(response.render)()
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        repeated = recorder.repeated()
+        if repeated:
+            match = getattr(request, "resolver_match", None)
+            view_name = match.view_name if match else request.path
+            for shape, count, origin in repeated:
+                logger.warning("Possible N+1 in %s: %d x %s (from %s)", view_name, count, shape, origin)
+            record(view_name, repeated, self.config["REPORT_SIZE"])
+        return response
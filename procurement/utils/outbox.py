@@ -0,0 +1,141 @@
+"""
+Transactional outbox for workflow side effects.
+
+Code whose changes have knock-on effects on other documents (an award moving
+its PRs to "PO Issued") publishes an event instead of writing those rows
+itself:
+
+    outbox.publish("pr.status", rfq.pr_ids(), {"status": "po_issued", "actor_id": user.pk})
+
+The OutboxEvent rows are INSERTed in the caller's transaction, so they exist
+exactly when it commits. After commit the dispatcher applies them. Events
+with the same topic and key coalesce - only the last one is applied - so a
+transaction that moves a PR twice updates it once. Events whose handler
+fails stay pending and are retried by ``manage.py dispatch_outbox``.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from procurement.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# topic -> handler(events), called with the last pending event of each key
+HANDLERS = {}
+
+
+def handler(topic):
+    def register(func):
+        HANDLERS[topic] = func
+        return func
+    return register
+
+
+def _dispatch_on_commit(using, ids):
+    """
+    Dispatch ``ids`` once the current transaction commits. The ids wait on the
+    connection; the first commit hook takes all of them, so a transaction that
+    publishes several times still gets one dispatch (ids of events rolled back
+    with a savepoint or transaction match nothing and are dropped there).
+    """
+    connection = transaction.get_connection(using)
+    if not hasattr(connection, "outbox_published"):
+        connection.outbox_published = []
+    connection.outbox_published.extend(ids)
+
+    def dispatch_published():
+        published, connection.outbox_published = connection.outbox_published, []
+        if published:
+            dispatch(ids=published, using=using)
+
+    # robust: the data is committed whatever happens here; a dispatch that
+    # fails (locked database, ...) is logged and left to dispatch_outbox
+    transaction.on_commit(dispatch_published, using=using, robust=True)
+
+
+def publish(topic, keys, payload=None, using=None):
+    """Record one ``topic`` event per key in the current transaction."""
+    from procurement.models import OutboxEvent
+
+    if topic not in HANDLERS:
+        raise ValueError(f"No outbox handler for {topic!r}")
+    events = OutboxEvent.objects.using(using).bulk_create([
+        OutboxEvent(topic=topic, key=str(key), payload=payload or {}) for key in keys
+    ])
+    if events:
+        _dispatch_on_commit(using, [event.pk for event in events])
+    return events
+
+
+def dispatch(ids=None, using=None, limit=None):
+    """
+    Apply pending events - those in ``ids``, or all of them oldest first -
+    and mark them processed, together with any older pending events of the
+    same topic and key: a retried, stale event must not undo a newer one
+    (e.g. move a PR from "PO Issued" back to "For Award"). A topic whose
+    handler fails is left pending with the error recorded. Returns the number
+    of events processed.
+    """
+    from procurement.models import OutboxEvent
+
+    pending = OutboxEvent.objects.using(using).filter(processed_at=None).order_by("pk")
+    if ids is not None:
+        pending = pending.filter(pk__in=ids)
+    with span("outbox.dispatch") as dispatch_span, transaction.atomic(using=using):
+        # events another dispatcher holds are skipped, not waited for
+        events = list(pending.select_for_update(skip_locked=True)[:limit])
+        latest = {}  # topic -> {key: last event}
+        for event in events:
+            latest.setdefault(event.topic, {})[event.key] = event
+        done = []
+        for topic, by_key in latest.items():
+            topic_ids = [event.pk for event in events if event.topic == topic]
+            try:
+                with transaction.atomic(using=using):
+                    HANDLERS[topic](list(by_key.values()))
+            except Exception as exc:
+                # side effects must never break the request that committed them
+                logger.exception("Could not apply %s %r outbox event(s)", len(topic_ids), topic)
+                OutboxEvent.objects.using(using).filter(pk__in=topic_ids).update(
+                    attempts=F("attempts") + 1, error=f"{type(exc).__name__}: {exc}",
+                )
+            else:
+                done += topic_ids
+                done += _superseded(topic, by_key, using)
+        if done:
+            OutboxEvent.objects.using(using).filter(pk__in=done).update(processed_at=timezone.now())
+        dispatch_span.set("events", len(events))
+        dispatch_span.set("processed", len(done))
+    return len(done)
+
+
+def _superseded(topic, by_key, using):
+    """Ids of pending ``topic`` events older than the applied last event of their key."""
+    from procurement.models import OutboxEvent
+
+    older = OutboxEvent.objects.using(using).filter(
+        processed_at=None, topic=topic, key__in=list(by_key), pk__lt=max(event.pk for event in by_key.values()),
+    )
+    return [pk for pk, key in older.values_list("pk", "key") if pk < by_key[key].pk]
+
+
+# -----------------------
+# Handlers
+# -----------------------
+@handler("pr.status")
+def apply_pr_status(events):
+    """Move each PR (the event key) to the ``status`` of its last event."""
+    from procurement.models import PurchaseRequest
+
+    prs = PurchaseRequest.objects.in_bulk([int(event.key) for event in events])
+    actors = get_user_model().objects.in_bulk(
+        {event.payload["actor_id"] for event in events if event.payload.get("actor_id")}
+    )
+    for event in events:
+        pr = prs.get(int(event.key))
+        if pr is not None:
+            pr.set_status(event.payload["status"], actor=actors.get(event.payload.get("actor_id")))
@@ -0,0 +1,31 @@
+"""
+HTML to PDF conversion and PDF merging.
+
+Nothing here touches Django, so these functions can run in process pool
+workers started with the "spawn" method without django.setup(). WeasyPrint
+and pypdf are imported inside the functions: like the Google client they are
+heavy, and only printing needs them.
+"""
+import io
+
+
+def html_to_pdf(html, base_url=None):
+    """PDF bytes for an HTML string; ``base_url`` resolves static/media links."""
+    from weasyprint import HTML
+
+    return HTML(string=html, base_url=base_url or None).write_pdf()
+
+
+def merge_pdfs(documents):
+    """
+    Merge [(title, pdf bytes), ...] in order into one PDF with a top-level
+    bookmark per document. Returns (pdf bytes, page count).
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for title, data in documents:
+        writer.append(io.BytesIO(data), outline_item=title)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue(), len(writer.pages)
@@ -0,0 +1,169 @@
+"""
+Print pagination for the PR, RFQ and AOQ printouts.
+
+Items are loaded with one query and split into pages once, in Python. Each
+row is charged the number of text lines its description wraps to (at the
+layout's characters per line), a PR group header costs one line, and a page
+holds the layout's lines per page. Page subtotals and running totals are Decimal
+sums computed here, so the templates only iterate ``layout.pages`` and
+``page.rows`` and never re-query or add up anything.
+"""
+import math
+from decimal import Decimal
+
+from procurement.models import BidLine
+
+ZERO = Decimal("0")
+
+# (lines per page, characters per description line) for each printout
+PR_LAYOUT = (20, 45)
+RFQ_LAYOUT = (30, 60)
+AOQ_LAYOUT = (24, 40)
+
+
+def measure_lines(text, chars_per_line):
+    """Printed height of ``text`` in lines when wrapped at ``chars_per_line``."""
+    paragraphs = (text or "").splitlines() or [""]
+    return sum(max(1, math.ceil(len(p) / chars_per_line)) for p in paragraphs)
+
+
+class PrintRow:
+    __slots__ = ("number", "item", "lines", "amount", "group", "cells")
+
+    def __init__(self, number, item, lines, amount=None, group=None, cells=None):
+        self.number = number
+        self.item = item
+        self.lines = lines
+        self.amount = amount
+        # the PR whose header is printed above this row, if any
+        self.group = group
+        self.cells = cells
+
+
+class PrintPage:
+    __slots__ = ("number", "rows", "subtotal", "running_total", "is_last")
+
+    def __init__(self, number):
+        self.number = number
+        self.rows = []
+        self.subtotal = ZERO
+        self.running_total = ZERO
+        self.is_last = False
+
+
+class PrintLayout:
+    def __init__(self, pages):
+        self.pages = pages
+        self.total = pages[-1].running_total if pages else ZERO
+        self.item_count = sum(len(page.rows) for page in pages)
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+def paginate(items, lines_per_page, chars_per_line, amount=None, group_by=None,
+             cells=None, number_within_group=False):
+    """
+    Split ``items`` into PrintPages.
+
+    amount(item) -> Decimal feeds the subtotals; group_by(item) -> group
+    starts a header row whenever it changes (repeated, as a continuation, at
+    the top of a page); cells(item) is stored on the row for the template.
+    """
+    pages = [PrintPage(1)]
+    used = 0
+    running_total = ZERO
+    current_group = None
+    number = 0
+
+    for item in items:
+        group = group_by(item) if group_by else None
+        new_group = group_by is not None and group != current_group
+        if new_group and number_within_group:
+            number = 0
+        number += 1
+        lines = measure_lines(item.description, chars_per_line)
+        header_lines = 1 if group_by is not None and (new_group or used == 0) else 0
+
+        if used and used + header_lines + lines > lines_per_page:
+            pages.append(PrintPage(len(pages) + 1))
+            used = 0
+            header_lines = 1 if group_by is not None else 0
+
+        value = amount(item) if amount else None
+        row = PrintRow(
+            number, item, lines, value,
+            group=group if header_lines else None,
+            cells=cells(item) if cells else None,
+        )
+        page = pages[-1]
+        page.rows.append(row)
+        if value is not None:
+            page.subtotal += value
+        used += header_lines + lines
+        current_group = group
+
+    if not pages[0].rows:
+        return PrintLayout([])
+    for page in pages:
+        running_total += page.subtotal
+        page.running_total = running_total
+    pages[-1].is_last = True
+    return PrintLayout(pages)
+
+
+# -----------------------
+# Printouts
+# -----------------------
+def rfq_items(rfq):
+    """
+    (items, group_by) for ``rfq``: its RFQItems in quoted order, and for a
+    consolidated RFQ a key function mapping an item to its PR (loaded once,
+    or taken from a consolidated_prs prefetch, rather than joined onto every
+    item row).
+    """
+    items = rfq.items.all()
+    if rfq.purchase_request_id:
+        return items, None
+    prs = {pr.pk: pr for pr in rfq.consolidated_prs.all()}
+    return items, lambda item: prs.get(item.purchase_request_id)
+
+
+def pr_print_layout(pr):
+    lines_per_page, chars_per_line = PR_LAYOUT
+    return paginate(
+        pr.items.order_by("pk"), lines_per_page, chars_per_line,
+        amount=lambda item: item.total_cost,
+    )
+
+
+def rfq_print_layout(rfq):
+    lines_per_page, chars_per_line = RFQ_LAYOUT
+    items, group_by = rfq_items(rfq)
+    return paginate(
+        items, lines_per_page, chars_per_line,
+        group_by=group_by, number_within_group=group_by is not None,
+    )
+
+
+def aoq_print_layout(rfq, suppliers):
+    """
+    AOQ rows carry one {"offer", "unit_price"} dict (or None) per supplier, in
+    ``suppliers`` order.
+    """
+    lines_per_page, chars_per_line = AOQ_LAYOUT
+    items, group_by = rfq_items(rfq)
+    bid_lines = {
+        (supplier_id, pr_item_id): {"offer": offer, "unit_price": unit_price}
+        for supplier_id, pr_item_id, offer, unit_price in BidLine.objects.filter(bid__rfq=rfq).values_list(
+            "bid__supplier_id", "pr_item_id", "offer", "unit_price",
+        )
+    }
+    supplier_ids = [supplier.pk for supplier in suppliers]
+    return paginate(
+        items, lines_per_page, chars_per_line, group_by=group_by,
+        cells=lambda item: [bid_lines.get((supplier_id, item.pr_item_id)) for supplier_id in supplier_ids],
+    )
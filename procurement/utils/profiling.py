@@ -0,0 +1,189 @@
+"""
+Opt-in sampling profiler.
+
+SamplingProfilerMiddleware picks requests by URL name, by username or at
+random (settings.PROFILING). While a picked request runs, one shared
+background thread samples its Python stack every INTERVAL seconds, so an
+unprofiled request pays nothing and a profiled one only pays the
+sampling cost.
+
+Stacks are aggregated per resolved view ("procurement:aoq_detail") and
+appended to ``<DIR>/<view>.collapsed`` in the collapsed-stack format read
+by flamegraph.pl, speedscope and inferno. Appends are single writes, so
+several worker processes can share the directory.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+MAX_DEPTH = 128
+
+
+def profiling_settings():
+    config = {
+        "ENABLED": False,
+        "URL_NAMES": [],
+        "USERS": [],
+        "SAMPLE_RATE": 0.0,
+        "INTERVAL": 0.005,
+        "DIR": Path(settings.BASE_DIR) / "profiles",
+    }
+    config.update(getattr(settings, "PROFILING", {}))
+    return config
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+
+def collapse(frame):
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """One daemon thread sampling every registered thread's current stack."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}  # thread id -> Counter of collapsed stacks
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self, thread_id):
+        counter = Counter()
+        with self.lock:
+            self.active[thread_id] = counter
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+                self.thread.start()
+        return counter
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    continue
+                targets = list(self.active.items())
+            frames = sys._current_frames()
+            for thread_id, counter in targets:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    counter[collapse(frame)] += 1
+
+
+def _file_stem(view_name):
+    return view_name.replace(":", "__").replace("/", "_")
+
+
+def view_name_from_stem(stem):
+    return stem.replace("__", ":")
+
+
+def write_profile(directory, view_name, stacks, duration):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = _file_stem(view_name)
+    if stacks:
+        data = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+        with open(directory / f"{stem}.collapsed", "a") as fh:
+            fh.write(data)
+    with open(directory / f"{stem}.meta", "a") as fh:
+        fh.write(f"{duration:.6f}\n")
+
+
+def read_collapsed(directory, view_name):
+    """Merged collapsed stacks recorded for one view (Counter of stack -> samples)."""
+    path = Path(directory) / f"{_file_stem(view_name)}.collapsed"
+    stacks = Counter()
+    if path.exists():
+        with open(path) as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
+
+
+def endpoint_summary(directory):
+    """Per-view request count, total samples and mean duration, hottest first."""
+    directory = Path(directory)
+    if not directory.exists():
+        return []
+    summary = []
+    for meta in directory.glob("*.meta"):
+        view_name = view_name_from_stem(meta.stem)
+        durations = [float(line) for line in meta.read_text().split()]
+        samples = sum(read_collapsed(directory, view_name).values())
+        summary.append({
+            "view_name": view_name,
+            "requests": len(durations),
+            "samples": samples,
+            "mean_ms": (sum(durations) / len(durations) * 1000) if durations else 0,
+        })
+    summary.sort(key=lambda row: row["samples"], reverse=True)
+    return summary
+
+
+class SamplingProfilerMiddleware:
+    # under ASGI, process_view() runs on the request's sync thread: the one
+    # sync views run on, so that is the thread sampled
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.config = profiling_settings()
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.url_names = set(self.config["URL_NAMES"])
+        self.users = set(self.config["USERS"])
+        self.sampler = Sampler(self.config["INTERVAL"])
+
+    def _wanted(self, request, view_name):
+        if view_name in self.url_names:
+            return True
+        user = getattr(request, "user", None)
+        if self.users and user is not None and user.is_authenticated and user.get_username() in self.users:
+            return True
+        return random.random() < self.config["SAMPLE_RATE"]
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        if view_name and self._wanted(request, view_name):
+            request._profiling = (view_name, time.perf_counter(), threading.get_ident())
+            self.sampler.start(threading.get_ident())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.finish(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.finish(request, await self.get_response(request))
+
+    def finish(self, request, response):
+        profiling = getattr(request, "_profiling", None)
+        if profiling is not None:
+            view_name, started, thread_id = profiling
+            stacks = self.sampler.stop(thread_id)
+            write_profile(self.config["DIR"], view_name, stacks, time.perf_counter() - started)
+        return response
@@ -0,0 +1,126 @@
+"""
+Stage cycle-time analytics built on PRStatusHistory.
+
+Each history row carries the time a PR spent in ``from_status``; the dwell
+is attributed to the month the PR left that stage. Closed months are
+precomputed into StageDwellRollup (``manage.py rollup_stage_dwell``); only
+months without a rollup - normally just the current one - are computed live
+with one range scan on the ``changed_at`` index.
+"""
+import math
+from collections import defaultdict
+from datetime import date, datetime, time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from procurement.models import PRStatusHistory, StageDwellRollup
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def month_range(first, last):
+    month = month_start(first)
+    while month <= last:
+        yield month
+        month = next_month(month)
+
+
+def _bounds(month):
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(month, time.min), tz),
+        timezone.make_aware(datetime.combine(next_month(month), time.min), tz),
+    )
+
+
+def compute_months(months, office=None, mode=None):
+    """
+    Return rollup-shaped dicts for ``months`` straight from the history table,
+    in one query over their ``changed_at`` ranges.
+    """
+    if not months:
+        return []
+    ranges = Q()
+    for month in months:
+        start, end = _bounds(month)
+        ranges |= Q(changed_at__gte=start, changed_at__lt=end)
+    rows = PRStatusHistory.objects.filter(ranges, duration__isnull=False).exclude(from_status="")
+    if office is not None:
+        rows = rows.filter(office_section=office)
+    if mode is not None:
+        rows = rows.filter(mode_of_procurement=mode)
+
+    groups = defaultdict(list)
+    values = rows.values_list("changed_at", "from_status", "office_section", "mode_of_procurement", "duration")
+    for changed_at, *key, duration in values.iterator():
+        groups[(month_start(timezone.localtime(changed_at)), *key)].append(duration.total_seconds())
+
+    stats = []
+    for (month, stage, office_section, mode_of_procurement), seconds in groups.items():
+        seconds.sort()
+        stats.append({
+            "month": month,
+            "stage": stage,
+            "office_section": office_section,
+            "mode_of_procurement": mode_of_procurement,
+            "samples": len(seconds),
+            "p50_seconds": percentile(seconds, 50),
+            "p90_seconds": percentile(seconds, 90),
+        })
+    return stats
+
+
+def compute_month(month):
+    """Return rollup-shaped dicts for ``month`` straight from the history table."""
+    return compute_months([month_start(month)])
+
+
+@transaction.atomic
+def rollup_month(month):
+    """(Re)build the StageDwellRollup rows of ``month``. Returns the row count."""
+    month = month_start(month)
+    stats = compute_month(month)
+    StageDwellRollup.objects.filter(month=month).delete()
+    StageDwellRollup.objects.bulk_create([StageDwellRollup(**row) for row in stats])
+    return len(stats)
+
+
+def dwell_report(first_month, last_month, office=None, mode=None):
+    """
+    Per-stage p50/p90 dwell times for every month in [first_month, last_month],
+    optionally narrowed to one office and/or mode of procurement. Months that
+    have been rolled up are read from StageDwellRollup, the rest are computed.
+    """
+    first_month, last_month = month_start(first_month), month_start(last_month)
+    rolled = StageDwellRollup.objects.filter(month__gte=first_month, month__lte=last_month)
+    rolled_months = set(rolled.values_list("month", flat=True).distinct())
+
+    if office is not None:
+        rolled = rolled.filter(office_section=office)
+    if mode is not None:
+        rolled = rolled.filter(mode_of_procurement=mode)
+    rows = list(rolled.values(
+        "month", "stage", "office_section", "mode_of_procurement",
+        "samples", "p50_seconds", "p90_seconds",
+    ))
+    missing = [month for month in month_range(first_month, last_month) if month not in rolled_months]
+    rows.extend(compute_months(missing, office=office, mode=mode))
+
+    rows.sort(key=lambda r: (r["month"], r["stage"], r["office_section"], r["mode_of_procurement"]))
+    return rows
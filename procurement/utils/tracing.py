@@ -0,0 +1,288 @@
+"""
+Lightweight tracing.
+
+    with span("aoq.award", aoq_id=aoq.pk) as s:
+        ...
+        s.set("po_id", po.pk)
+
+Spans nest through a context variable. Every span started while another one
+is open becomes its child, in the same trace. TracingMiddleware opens a root
+span per request and returns its id in the X-Trace-Id header. When a trace's
+root span ends, the whole trace is handed to the configured exporter
+(settings.TRACING["EXPORTER"]):
+
+- "jsonl": one JSON object per span appended to TRACING["FILE"]; read it with
+  ``manage.py show_trace <trace id>``.
+- "otlp": OTLP/JSON POSTed to TRACING["OTLP_ENDPOINT"] from a background
+  thread; ``manage.py trace_collector`` is a local stand-in collector.
+- "" (default): tracing is off and span() costs one settings lookup.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from procurement.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("current_span", default=None)
+
+
+def tracing_settings():
+    config = {
+        "EXPORTER": "",
+        "FILE": Path(settings.BASE_DIR) / "traces.jsonl",
+        "OTLP_ENDPOINT": "http://localhost:4318/v1/traces",
+        "SERVICE_NAME": "evsu-procurement",
+    }
+    config.update(getattr(settings, "TRACING", {}))
+    return config
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes",
+                 "start_ns", "end_ns", "error", "_trace")
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        # finished spans of the whole trace, exported when the root ends
+        self._trace = parent._trace if parent else []
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    trace_id = span_id = parent_id = None
+
+    def set(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the block as a child of the current span (or as a new trace)."""
+    config = tracing_settings()
+    if not config["EXPORTER"]:
+        yield NOOP_SPAN
+        return
+    parent = _current.get()
+    current = Span(name, parent, attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current.reset(token)
+        current._trace.append(current)
+        if parent is None:
+            export(config, current._trace)
+
+
+def traced(name):
+    """Decorator form of span(); the span is named ``name``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# -----------------------
+# Exporters
+# -----------------------
+_file_lock = threading.Lock()
+_otlp_lock = threading.Lock()
+_otlp_queue = None
+
+
+def export(config, spans):
+    try:
+        if config["EXPORTER"] == "jsonl":
+            _export_jsonl(config["FILE"], spans)
+        elif config["EXPORTER"] == "otlp":
+            _enqueue_otlp(config["OTLP_ENDPOINT"], to_otlp(spans, config["SERVICE_NAME"]))
+        else:
+            logger.warning("Unknown TRACING exporter %r", config["EXPORTER"])
+    except Exception:
+        # tracing must never break the operation being traced
+        logger.exception("Could not export trace")
+
+
+def _export_jsonl(path, spans):
+    data = "".join(json.dumps(s.as_dict(), default=str) + "\n" for s in spans)
+    with _file_lock, open(path, "a") as fh:
+        fh.write(data)
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans, service_name):
+    """Encode finished spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{
+            "scope": {"name": "procurement"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+def from_otlp(payload):
+    """Flatten an OTLP/JSON request back into the JSONL span records."""
+    records = []
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for s in scope_spans.get("spans", []):
+                status = s.get("status", {})
+                records.append({
+                    "trace_id": s["traceId"],
+                    "span_id": s["spanId"],
+                    "parent_id": s.get("parentSpanId") or None,
+                    "name": s["name"],
+                    "start_ns": int(s["startTimeUnixNano"]),
+                    "end_ns": int(s["endTimeUnixNano"]),
+                    "attributes": {a["key"]: next(iter(a["value"].values())) for a in s.get("attributes", [])},
+                    "status": "error" if status.get("code") == 2 else "ok",
+                    "error": status.get("message"),
+                })
+    return records
+
+
+def _otlp_worker():
+    global _otlp_queue
+    with _otlp_lock:
+        if _otlp_queue is None:
+            _otlp_queue = queue.Queue(maxsize=1000)
+            threading.Thread(target=_post_forever, args=(_otlp_queue,), name="otlp-exporter", daemon=True).start()
+    return _otlp_queue
+
+
+def _enqueue_otlp(endpoint, payload):
+    # never wait: with the collector slow or down, drop the trace rather than the request
+    try:
+        _otlp_worker().put_nowait((endpoint, payload))
+    except queue.Full:
+        metrics.inc("tracing_exports_dropped_total")
+
+
+def _post_forever(pending):
+    while True:
+        endpoint, payload = pending.get()
+        request = urllib.request.Request(
+            endpoint, data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as exc:
+            logger.warning("OTLP export to %s failed: %s", endpoint, exc)
+
+
+def load_trace(path, trace_id):
+    """Spans of ``trace_id`` from a JSONL trace file, in start order."""
+    spans = []
+    with open(path) as fh:
+        for line in fh:
+            if trace_id in line:
+                record = json.loads(line)
+                if record["trace_id"] == trace_id:
+                    spans.append(record)
+    spans.sort(key=lambda s: s["start_ns"])
+    return spans
+
+
+class TracingMiddleware:
+    """Root span per request; its trace id is returned in X-Trace-Id."""
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        if not tracing_settings()["EXPORTER"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with span(f"HTTP {request.method}", path=request.path) as root:
+            response = self.get_response(request)
+            self.finish(request, response, root)
+        response["X-Trace-Id"] = root.trace_id
+        return response
+
+    async def __acall__(self, request):
+        with span(f"HTTP {request.method}", path=request.path) as root:
+            response = await self.get_response(request)
+            self.finish(request, response, root)
+        response["X-Trace-Id"] = root.trace_id
+        return response
+
+    def finish(self, request, response, root):
+        match = getattr(request, "resolver_match", None)
+        if match:
+            root.name = f"{request.method} {match.view_name}"
+        root.set("status_code", response.status_code)
@@ -1,14 +1,23 @@
+import asyncio
+import hmac
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from decimal import Decimal
+from datetime import timedelta
+from collections import defaultdict
 from django.views import generic, View
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.views import LoginView
 from django.views.generic import DetailView
-from django.db.models import Q, Exists, OuterRef
+from django.db.models import Q, Exists, OuterRef, Count, Prefetch
+from django.utils.dateparse import parse_date
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
@@ -17,16 +26,30 @@ from django.http import JsonResponse, HttpResponseForbidden
 from django.views.decorators.http import require_POST
 from .models import Signatory
 import csv
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, Http404, StreamingHttpResponse
 from procurement.helpers import award_aoq_and_create_po
+from procurement.utils.db import retry_on_locked
+from procurement.utils.conditional import conditional_page
+from procurement.utils.stage_analytics import dwell_report
+from procurement.utils import award_simulator, live, metrics, nplusone, pdf, profiling
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
+from django.template.loader import render_to_string
 import json
-from procurement.utils.google_drive import upload_file_to_drive
+from procurement.utils.google_drive import upload_file_to_drive, create_folder_in_drive
+from procurement.utils.audit import log_action
+from procurement.utils.tracing import span
+from procurement.utils.print_layout import aoq_print_layout, pr_print_layout, rfq_print_layout
+from procurement.utils.batch_print import create_print_job
+from procurement.routers import replica_reads
+from procurement.templatetags.group_tags import has_group
 
 from .models import (
     PurchaseRequest, PRItem, Supplier,
     RequestForQuotation, AgencyProcurementRequest, RFQConsolidationLog,
-    AbstractOfQuotation, AOQLine, PurchaseOrder, Bid, BidLine,
+    AbstractOfQuotation, AOQLine, PurchaseOrder, Bid, BidLine, PRStatusHistory,
+    PRAttachment, PrintJob, OutboxEvent,
 )
 from .forms import (
     RequisitionerPRForm, ProcurementStaffPRForm,
@@ -35,16 +58,11 @@ from .forms import (
     AssignPRNumberForm, BidForm, BidLineForm, BidLineFormSet, RFQConsolidationLog
 )
 
-def rfq_pr_items(rfq):
-    """Return all PRItems linked to this RFQ, whether single or consolidated."""
-    if hasattr(rfq, "consolidated_prs") and rfq.consolidated_prs.exists():
-        # ✅ Consolidated RFQ: many-to-many relationship used
-        return PRItem.objects.filter(purchase_request__in=rfq.consolidated_prs.all())
-    elif hasattr(rfq, "purchase_request") and rfq.purchase_request:
-        # ✅ Regular RFQ: one-to-one (or foreign key) used
-        return PRItem.objects.filter(purchase_request=rfq.purchase_request)
-    else:
-        return PRItem.objects.none()
+def bid_line_rows(formset, rfq_items):
+    """(form, RFQItem) for each bid line form, in RFQ item order."""
+    by_pr_item = {item.pr_item_id: item for item in rfq_items}
+    rows = [(form, by_pr_item.get(form.instance.pr_item_id)) for form in formset.forms]
+    return sorted(rows, key=lambda row: row[1].position if row[1] else float("inf"))
 
 
 
@@ -57,19 +75,84 @@ def in_procurement_group(user):
 def in_requisitioner_group(user):
     return user.is_authenticated and user.groups.filter(name="Requisitioner").exists()
 
+def is_system_admin(user):
+    return user.is_authenticated and (user.is_superuser or user.groups.filter(name="Admin").exists())
+
+# async views: request.auser() gives the user; these query through the async ORM
+async def ain_groups(user, *names):
+    return user.is_authenticated and await user.groups.filter(name__in=names).aexists()
+
+async def ain_procurement_group(user):
+    return await ain_groups(user, "Procurement")
+
+
+# -----------------------
+# LIST FILTERS
+# -----------------------
+class ListFilterMixin:
+    """
+    Date range (?date_from / ?date_to), supplier (?supplier) and status
+    (?status) filters for the document list views. ``status_filters`` maps
+    a status value to (label, Q).
+    """
+    date_field = "created_at"
+    supplier_filter = None
+    status_filters = {}
+
+    def filter_supplier(self, queryset, supplier_id):
+        return queryset.filter(**{self.supplier_filter: supplier_id})
+
+    def _date_param(self, name):
+        try:
+            return parse_date(self.request.GET.get(name, ""))
+        except ValueError:  # well-formed but impossible, e.g. 2025-02-30
+            return None
+
+    def get_filters(self):
+        supplier = self.request.GET.get("supplier", "")
+        status = self.request.GET.get("status", "")
+        return {
+            "date_from": self._date_param("date_from"),
+            "date_to": self._date_param("date_to"),
+            "supplier": supplier if supplier.isdigit() else "",
+            "status": status if status in self.status_filters else "",
+        }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        filters = self.filters = self.get_filters()
+        if filters["date_from"]:
+            queryset = queryset.filter(**{f"{self.date_field}__gte": filters["date_from"]})
+        if filters["date_to"]:
+            queryset = queryset.filter(**{f"{self.date_field}__lte": filters["date_to"]})
+        if filters["supplier"]:
+            queryset = self.filter_supplier(queryset, int(filters["supplier"]))
+        if filters["status"]:
+            queryset = queryset.filter(self.status_filters[filters["status"]][1])
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filters"] = self.filters
+        context["suppliers"] = Supplier.objects.order_by("name").values_list("pk", "name")
+        context["status_choices"] = [(value, label) for value, (label, _q) in self.status_filters.items()]
+        return context
+
 # -----------------------
 # DASHBOARD
 # -----------------------
+@method_decorator(replica_reads, name="dispatch")
 class DashboardView(LoginRequiredMixin, generic.TemplateView):
     template_name = "procurement/dashboard.html"
 
     def get_template_names(self):
+        # has_group loads the user's group names once for the whole request
         user = self.request.user
-        if user.groups.filter(name="Admin").exists():
+        if has_group(user, "Admin"):
             return ["procurement/dashboard_admin.html"]
-        elif user.groups.filter(name="Procurement").exists():
+        elif has_group(user, "Procurement"):
             return ["procurement/dashboard_procurement.html"]
-        elif user.groups.filter(name="Requisitioner").exists():
+        elif has_group(user, "Requisitioner"):
             return ["procurement/dashboard_requisitioner.html"]
         return [self.template_name]
 
@@ -85,7 +168,7 @@ class DashboardView(LoginRequiredMixin, generic.TemplateView):
         assigned_filter = ~unassigned_filter
 
         # --- Requisitioner-specific filtering ---
-        if user.groups.filter(name="Requisitioner").exists():
+        if has_group(user, "Requisitioner"):
             # Only their own PRs
             user_prs = pr_qs.filter(created_by=user)
             # Unassigned PRs (no PR number)
@@ -103,11 +186,11 @@ class DashboardView(LoginRequiredMixin, generic.TemplateView):
         context["po_count"] = PurchaseOrder.objects.count()
 
         # Dashboard label
-        if user.groups.filter(name="Procurement").exists():
+        if has_group(user, "Procurement"):
             context["welcome_text"] = "Procurement Officer Dashboard"
-        elif user.groups.filter(name="Requisitioner").exists():
+        elif has_group(user, "Requisitioner"):
             context["welcome_text"] = "Requisitioner Dashboard"
-        elif user.groups.filter(name="Admin").exists():
+        elif has_group(user, "Admin"):
             context["welcome_text"] = "Admin Dashboard"
         else:
             context["welcome_text"] = "User Dashboard"
@@ -116,6 +199,7 @@ class DashboardView(LoginRequiredMixin, generic.TemplateView):
 
 
 @login_required
+@replica_reads
 def requisitioner_dashboard(request):
     # Get PRs created by the logged-in user
     user_prs = PurchaseRequest.objects.filter(created_by=request.user)
@@ -137,6 +221,7 @@ def requisitioner_dashboard(request):
 # -----------------------
 # PURCHASE REQUEST VIEWS
 # -----------------------
+@method_decorator(replica_reads, name="dispatch")
 class PRListView(LoginRequiredMixin, generic.ListView):
     model = PurchaseRequest
     template_name = "procurement/pr_list.html"
@@ -177,13 +262,18 @@ class PRListView(LoginRequiredMixin, generic.ListView):
         if pr_number_search:
             queryset = queryset.filter(pr_number__icontains=pr_number_search)
 
-        return queryset.order_by("-created_at")
+        # rows only need to know whether an RFQ exists
+        return queryset.select_related("rfq").order_by("-created_at")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         is_procurement = user.groups.filter(name__in=["Procurement", "Admin"]).exists()
 
+        # Option lists for the per-row selects, sent once (see shared_options.js)
+        context["mode_choices"] = [("", "— Select Mode —")] + PurchaseRequest.MODE_OF_PROCUREMENT_CHOICES
+        context["negotiated_choices"] = [("", "— Select Sub-Type —")] + PurchaseRequest.NEGOTIATED_SUB_CHOICES
+
         # Preserve filter values
         context["assigned_filter"] = self.request.GET.get("assigned", "")
         context["office_filter"] = self.request.GET.get("office", "")
@@ -224,28 +314,35 @@ class PRCreateView(LoginRequiredMixin, generic.CreateView):
         formset = PRItemFormSet(request.POST, prefix="form")
 
         if form.is_valid() and formset.is_valid(): 
-            pr = form.save(commit=False)
-            pr.created_by = request.user
-            pr.save()
-
-            formset.instance = pr
-            formset.save()
-
-        # Create PR folder in Drive
-        folder_name = f"PR-{pr.pk}-{pr.pr_number or 'UNASSIGNED'}"
-        drive_folder_id = create_folder_in_drive(folder_name)
-
-        # Upload multiple files
-        attachments = request.FILES.getlist("attachments")
-        for file in attachments:
-            drive_file_id = upload_file_to_drive(file, folder_id=drive_folder_id)
-
-            PRAttachment.objects.create(
-                pr=pr,
-                filename=file.name,
-                drive_file_id=drive_file_id
-            )
-
+            attachments = request.FILES.getlist("attachments")
+            with span("pr.create", attachment_count=len(attachments)) as create_span:
+                with span("pr.save"):
+                    pr = form.save(commit=False)
+                    pr.created_by = request.user
+                    pr.save()
+                create_span.set("pr_id", pr.pk)
+
+                with span("pr.items.save") as items_span:
+                    formset.instance = pr
+                    items = formset.save()
+                    items_span.set("item_count", len(items))
+
+                # Upload multiple files into a per-PR Drive folder
+                if attachments:
+                    folder_name = f"PR-{pr.pk}-{pr.pr_number or 'UNASSIGNED'}"
+                    with span("drive.create_folder"):
+                        drive_folder_id = create_folder_in_drive(folder_name)
+                    for file in attachments:
+                        with span("drive.upload", filename=file.name, size=file.size):
+                            drive_file_id = upload_file_to_drive(file, folder_id=drive_folder_id)
+
+                        PRAttachment.objects.create(
+                            pr=pr,
+                            filename=file.name,
+                            drive_file_id=drive_file_id
+                        )
+
+            log_action(request.user, "pr.created", pr, notes=f"{len(attachments)} attachment(s)")
             messages.success(request, "Purchase Request created successfully.")
             return redirect("procurement:pr_detail", pk=pr.pk)
 
@@ -288,8 +385,12 @@ class PRWorkflowView(LoginRequiredMixin, View):
         formset = PRItemFormSet(request.POST, instance=pr, prefix="form")
 
         if form.is_valid() and formset.is_valid():
+            previous_status = form.initial.get("status")
             form.save()
             formset.save()
+            if "status" in form.changed_data:
+                PRStatusHistory.record(pr, previous_status, pr.status, actor=request.user)
+            log_action(request.user, "pr.workflow_updated", pr, notes=", ".join(form.changed_data))
             messages.success(request, "Purchase Request updated successfully.")
             return redirect("procurement:pr_detail", pk=pr.pk)
 
@@ -313,7 +414,9 @@ def assign_pr_number(request, pk):
     if request.method == "POST":
         form = AssignPRNumberForm(request.POST, instance=pr)
         if form.is_valid():
-            form.save()
+            # left blank: the next number of the fiscal year
+            form.instance.assign_pr_number()
+            log_action(request.user, "pr.number_assigned", pr, notes=pr.pr_number)
             messages.success(request, f"PR {pr.pr_number} assigned successfully.")
             return redirect("procurement:pr_detail", pk=pr.pk)
     else:
@@ -337,6 +440,7 @@ def assign_pr_number(request, pk):
 # -----------------------
 # SUPPLIERS
 # -----------------------
+@method_decorator(replica_reads, name="dispatch")
 class SupplierListView(LoginRequiredMixin, generic.ListView):
     model = Supplier
     template_name = "procurement/supplier_list.html"
@@ -364,8 +468,11 @@ def create_rfq(request, pr_id):
             rfq.created_by = request.user
             rfq.save()
             rfq.consolidated_prs.add(pr)
+            rfq.snapshot_items()
             pr.consolidated_in = rfq
             pr.save(update_fields=["consolidated_in"])
+            live.rfq_issued(rfq, [pr])
+            log_action(request.user, "rfq.created", rfq, notes=f"PR {pr.pk}")
             messages.success(request, "RFQ created successfully.")
             return redirect("procurement:rfq_preview", pk=rfq.pk)
     else:
@@ -407,16 +514,27 @@ def create_aoq(request, rfq_id):
     return render(request, "procurement/create_aoq.html", {"formset": formset, "rfq": rfq, "aoq": aoq})
 
 
+@method_decorator(conditional_page("aoq"), name="get")
 class AOQDetailView(LoginRequiredMixin, generic.DetailView):
     model = AbstractOfQuotation
     template_name = "procurement/aoq_detail.html"
     context_object_name = "aoq"
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("purchase_orders__supplier")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         aoq = self.object  # ✅ FIX — get the AOQ instance
         pr = aoq.rfq.purchase_request
 
+        # Lines per RFQ item, cheapest first, with the LCRB line marked
+        lines_by_item = defaultdict(list)
+        for line in aoq.lines.select_related("supplier").order_by("unit_price", "pk"):
+            lines_by_item[line.pr_item_id].append(line)
+        context["item_lines"] = [(item, lines_by_item[item.pr_item_id]) for item in aoq.rfq.items.all()]
+        context["lcrb_line_ids"] = {line.pk for line in aoq.compute_lcrb().values()}
+
         # Supplier summaries
         context["supplier_summary"] = aoq.supplier_summary()
 
@@ -431,14 +549,15 @@ class AOQDetailView(LoginRequiredMixin, generic.DetailView):
         })
 
         # PR breakdown by category
-        context["pr_breakdown"] = pr.breakdown_by_budget()
+        context["pr_breakdown"] = pr.breakdown_by_budget() if pr else {}
 
-        # AOQ breakdown by category (safe)
+        # AOQ breakdown by category (safe), at the quantities quoted on the RFQ
         def category_breakdown(aoq_obj):
             breakdown = {}
+            quantities = aoq_obj.rfq.item_quantities()
             for line in aoq_obj.lines.select_related("pr_item"):
                 category = line.pr_item.budget_category
-                total = (line.unit_price or 0) * (line.pr_item.quantity or 0)
+                total = (line.unit_price or 0) * quantities.get(line.pr_item_id, 0)
                 breakdown[category] = breakdown.get(category, 0) + total
             return breakdown
 
@@ -446,75 +565,144 @@ class AOQDetailView(LoginRequiredMixin, generic.DetailView):
 
         return context
 
-class AOQListView(LoginRequiredMixin, generic.ListView):
+@method_decorator(replica_reads, name="dispatch")
+class AOQListView(LoginRequiredMixin, ListFilterMixin, generic.ListView):
     model = AbstractOfQuotation
     template_name = "procurement/aoq_list.html"
     context_object_name = "aoqs"
     ordering = ["-created_at"]
+    paginate_by = 25
+    date_field = "created_at__date"
+    supplier_filter = "awarded_to_id"
+    status_filters = {
+        "pending": ("Pending", Q(verified=False)),
+        "verified": ("Verified", Q(verified=True)),
+        "awarded": ("Awarded", Q(awarded_to__isnull=False) | Q(awarded_at__isnull=False)),
+    }
 
+    def get_queryset(self):
+        return super().get_queryset().select_related("rfq__purchase_request")
 
-def find_lcrb_for_item(aoq, pr_item):
-    lines = aoq.lines.filter(pr_item=pr_item, responsive=True).order_by("unit_price")
-    return lines.first()
 
 @login_required
+@conditional_page("rfq")
 def aoq_preview(request, pk):
-    rfq = get_object_or_404(RequestForQuotation, pk=pk)
+    rfq = get_object_or_404(RequestForQuotation.objects.prefetch_related("consolidated_prs"), pk=pk)
 
     # Get suppliers for this RFQ
     supplier_ids = rfq.bids.values_list("supplier_id", flat=True)
-    suppliers = Supplier.objects.filter(id__in=supplier_ids)
-
-    # Get items for this RFQ
-    if rfq.consolidated_prs.exists():
-        items = PRItem.objects.filter(purchase_request__in=rfq.consolidated_prs.all())
-    else:
-        # Ensure purchase_request has related_name="items" on PRItem
-        items = rfq.purchase_request.items.all()
-
-    # Get bid lines for each supplier + item
-    supplier_data = {}
-    for supplier in suppliers:
-        supplier_lines = BidLine.objects.filter(
-            bid__rfq=rfq,
-            bid__supplier=supplier
-        )
-        supplier_data[supplier.id] = {line.pr_item.id: line for line in supplier_lines}
+    suppliers = list(Supplier.objects.filter(id__in=supplier_ids))
 
     context = {
         "rfq": rfq,
         "suppliers": suppliers,
-        "items": items,
-        "supplier_data": supplier_data,
+        # rows carry each supplier's bid line, in suppliers order
+        "layout": aoq_print_layout(rfq, suppliers),
     }
     return render(request, "procurement/aoq_preview.html", context)
 
 
+AWARD_STRATEGIES = {"item": "item", "lot": "lot (PR)"}
+
+
 @login_required
+@user_passes_test(in_procurement_group)
+@require_POST
 def generate_po_from_aoq(request, pk):
+    """Award each item, or each PR as a lot, to its LCRB and issue one PO per winning supplier."""
     aoq = get_object_or_404(AbstractOfQuotation, pk=pk)
-    supplier_wins = {}
-    for line in aoq.lines.filter(responsive=True):
-        winner_line = find_lcrb_for_item(aoq, line.pr_item)
-        if winner_line:
-            supplier_wins.setdefault(winner_line.supplier.id, 0)
-            supplier_wins[winner_line.supplier.id] += 1
-    if not supplier_wins:
+    strategy = request.POST.get("strategy", "item")
+    if strategy not in AWARD_STRATEGIES:
+        messages.error(request, "Unknown award strategy.")
+        return redirect("procurement:aoq_detail", pk=aoq.pk)
+
+    awards = aoq.lot_awards() if strategy == "lot" else aoq.item_awards()
+    if not awards:
         messages.error(request, "No responsive bids found.")
         return redirect("procurement:aoq_detail", pk=aoq.pk)
+    # the AOQ is closed by the award, so items left out here could never get a PO
+    unawarded = set(aoq.rfq.items.values_list("pr_item_id", flat=True)) - set(awards)
+    if unawarded:
+        messages.error(
+            request,
+            f"Cannot award per {AWARD_STRATEGIES[strategy]}: {len(unawarded)} item(s) have no responsive quotation to award.",
+        )
+        return redirect("procurement:aoq_detail", pk=aoq.pk)
+    try:
+        pos = aoq.award_items(awards, awarded_by=request.user)
+    except ValidationError as e:
+        messages.error(request, f"Award failed: {' '.join(e.messages)}")
+        return redirect("procurement:aoq_detail", pk=aoq.pk)
 
-    best_supplier_id = max(supplier_wins, key=supplier_wins.get)
-    supplier = Supplier.objects.get(id=best_supplier_id)
-    po = PurchaseOrder.objects.create(
-        aoq=aoq, supplier=supplier,
-        created_by=request.user,
-        submission_date=timezone.now().date(),
-        receiving_office="To be set"
-    )
-    po.po_number = f"PO-{timezone.now().strftime('%Y%m%d')}-{po.id}"
-    po.save()
-    messages.success(request, f"Purchase Order {po.po_number} created for {supplier.name}")
-    return redirect("procurement:po_detail", pk=po.pk)
+    numbers = ", ".join(po.po_number for po in pos)
+    log_action(request.user, "aoq.awarded", aoq, notes=f"per {strategy}: {numbers}")
+    messages.success(request, f"Awarded per {AWARD_STRATEGIES[strategy]}: PO {numbers} created.")
+    if len(pos) == 1:
+        return redirect("procurement:po_detail", pk=pos[0].pk)
+    return redirect("procurement:aoq_detail", pk=aoq.pk)
+
+
+def parse_responsive_overrides(params):
+    """
+    {(pr_item_id, supplier_id): responsive} from ``off``/``on`` query values
+    of the form "<pr_item_id>:<supplier_id>". Malformed values are ignored.
+    """
+    overrides = {}
+    for name, responsive in (("off", False), ("on", True)):
+        for value in params.getlist(name):
+            pr_item_id, _, supplier_id = value.partition(":")
+            if pr_item_id.isdigit() and supplier_id.isdigit():
+                overrides[(int(pr_item_id), int(supplier_id))] = responsive
+    return overrides
+
+
+def simulation_results(matrix):
+    """award_simulator.simulate() with each supplier share's name filled in."""
+    results = award_simulator.simulate(matrix)
+    supplier_ids = {share["supplier_id"] for result in results for share in result["suppliers"]}
+    names = dict(Supplier.objects.filter(pk__in=supplier_ids).values_list("pk", "name"))
+    for result in results:
+        for share in result["suppliers"]:
+            share["name"] = names.get(share["supplier_id"], "")
+    return results
+
+
+@login_required
+@user_passes_test(in_procurement_group)
+def aoq_simulator(request, pk):
+    """Compare award strategies for an AOQ; responsiveness can be toggled as a what-if."""
+    aoq = get_object_or_404(AbstractOfQuotation.objects.select_related("rfq"), pk=pk)
+    matrix = award_simulator.BidMatrix.for_aoq(aoq)
+    supplier_ids = {supplier_id for quotes in matrix.quotes.values() for supplier_id in quotes}
+    suppliers = list(Supplier.objects.filter(pk__in=supplier_ids).order_by("name"))
+    # (item, [(supplier_id, "1,234.50", responsive) or None, ...]) per RFQ item,
+    # for the quote_cells tag
+    rows = []
+    for item in aoq.rfq.items.all():
+        quotes = matrix.quotes.get(item.pr_item_id, {})
+        cells = []
+        for supplier in suppliers:
+            quote = quotes.get(supplier.pk)
+            cells.append(quote and (supplier.pk, f"{quote[0]:,.2f}", quote[1]))
+        rows.append((item, cells))
+    return render(request, "procurement/aoq_simulator.html", {
+        "aoq": aoq,
+        "suppliers": suppliers,
+        "rows": rows,
+        "results": simulation_results(matrix),
+    })
+
+
+@login_required
+@user_passes_test(in_procurement_group)
+def aoq_simulate(request, pk):
+    """JSON: the simulator's strategy comparison with ?off=/&on= responsiveness overrides."""
+    aoq = get_object_or_404(AbstractOfQuotation.objects.select_related("rfq"), pk=pk)
+    with span("aoq.simulate", aoq_id=aoq.pk) as simulate_span:
+        overrides = parse_responsive_overrides(request.GET)
+        simulate_span.set("overrides", len(overrides))
+        results = simulation_results(award_simulator.BidMatrix.for_aoq(aoq, overrides))
+    return JsonResponse({"results": results})
 
 
 class PODetailView(LoginRequiredMixin, generic.DetailView):
@@ -522,11 +710,28 @@ class PODetailView(LoginRequiredMixin, generic.DetailView):
     template_name = "procurement/po_detail.html"
     context_object_name = "po"
 
-class POListView(LoginRequiredMixin, generic.ListView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["lines"] = list(self.object.lines.all())
+        context["total"] = sum((line.line_total for line in context["lines"]), Decimal("0"))
+        return context
+
+@method_decorator(replica_reads, name="dispatch")
+class POListView(LoginRequiredMixin, ListFilterMixin, generic.ListView):
     model = PurchaseOrder
     template_name = "procurement/po_list.html"
     context_object_name = "pos"
     ordering = ["-created_at"]
+    paginate_by = 25
+    date_field = "created_at__date"
+    supplier_filter = "supplier_id"
+    status_filters = {
+        "pending": ("Pending", Q(date_of_delivery__isnull=True)),
+        "delivered": ("Delivered", Q(date_of_delivery__isnull=False)),
+    }
+
+    def get_queryset(self):
+        return super().get_queryset().select_related("supplier", "aoq")
 
 # -----------------------
 # LOGIN VIEW
@@ -542,17 +747,47 @@ class EVSULoginView(LoginView):
 # -----------------------
 # RFQ LIST & PREVIEW
 # -----------------------
-class RFQListView(LoginRequiredMixin, generic.ListView):
+@method_decorator(replica_reads, name="dispatch")
+class RFQListView(LoginRequiredMixin, ListFilterMixin, generic.ListView):
     model = RequestForQuotation
     template_name = "procurement/rfq_list.html"
     context_object_name = "rfqs"
     ordering = ["-id"]
+    paginate_by = 25
+    date_field = "date"
+    status_filters = {
+        "open": ("Open (no AOQ yet)", Q(aoq__isnull=True)),
+        "aoq": ("AOQ prepared", Q(aoq__isnull=False, aoq__awarded_to__isnull=True, aoq__awarded_at__isnull=True)),
+        "awarded": ("Awarded", Q(aoq__awarded_to__isnull=False) | Q(aoq__awarded_at__isnull=False)),
+    }
+
+    def filter_supplier(self, queryset, supplier_id):
+        # RFQs the supplier bid on; Exists keeps one row per RFQ
+        return queryset.filter(Exists(Bid.objects.filter(rfq=OuterRef("pk"), supplier_id=supplier_id)))
+
+    def get_queryset(self):
+        return (
+            super().get_queryset()
+            .select_related("purchase_request")
+            .prefetch_related(Prefetch("consolidated_prs", queryset=PurchaseRequest.objects.order_by("pk")))
+            .annotate(bid_count=Count("bids"))
+        )
 
+@method_decorator(conditional_page("rfq"), name="get")
 class RFQPreviewView(LoginRequiredMixin, generic.DetailView):
     model = RequestForQuotation
     template_name = "procurement/rfq_preview.html"
     context_object_name = "rfq"
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("consolidated_prs")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["layout"] = rfq_print_layout(self.object)
+        return context
+
+@method_decorator(conditional_page("pr"), name="get")
 class PRDetailView(LoginRequiredMixin, generic.DetailView):
     model = PurchaseRequest
     template_name = "procurement/pr_detail.html"
@@ -616,6 +851,7 @@ class PRUpdateView(LoginRequiredMixin, generic.UpdateView):
             pr.save()
             formset.instance = pr
             formset.save()
+            log_action(request.user, "pr.updated", pr)
 
             messages.success(request, f"Purchase Request {pr.pr_number or pr.id} updated successfully.")
             return redirect("procurement:pr_detail", pk=pr.pk)
@@ -638,18 +874,6 @@ class PRUpdateView(LoginRequiredMixin, generic.UpdateView):
     
 
 
-@login_required
-def pr_preview(request, pk):
-    pr = get_object_or_404(PurchaseRequest, pk=pk)
-    auto_print = request.GET.get("auto_print") == "true"
-    total_amount = sum(item.quantity * item.unit_cost for item in pr.items.all())
-    return render(request, "procurement/pr_preview.html", {
-        "pr": pr,
-        "total_amount": total_amount,
-        "auto_print": auto_print,
-    })
-
-
 @login_required
 def submit_pr_for_verification(request, pk):
     pr = get_object_or_404(PurchaseRequest, pk=pk)
@@ -670,20 +894,26 @@ def submit_pr_for_verification(request, pk):
         return redirect("procurement:dashboard")
 
     # Update status
-    pr.status = "submitted"
-    pr.save()
+    pr.set_status("submitted", actor=request.user)
+    log_action(request.user, "pr.submitted", pr)
     messages.success(request, f"Purchase Request {pr.pr_number or pr.id} has been submitted for verification.")
     return redirect("procurement:pr_detail", pk=pk)
 
 
 
 @login_required
+@conditional_page("pr")
 def pr_preview(request, pk):
     """Print-friendly view of the Purchase Request."""
     pr = get_object_or_404(PurchaseRequest, pk=pk)
-    return render(request, "procurement/pr_preview.html", {"pr": pr, "auto_print": True})
+    return render(request, "procurement/pr_preview.html", {
+        "pr": pr,
+        "layout": pr_print_layout(pr),
+        "auto_print": True,
+    })
 
 
+@method_decorator(replica_reads, name="dispatch")
 class UnassignedPRListView(LoginRequiredMixin, ListView):
     model = PurchaseRequest
     template_name = 'procurement/unassigned_pr_list.html'
@@ -716,12 +946,12 @@ class UnassignedPRListView(LoginRequiredMixin, ListView):
 
 
 @login_required
-@user_passes_test(in_procurement_group)
+@user_passes_test(ain_procurement_group)
 @csrf_exempt
-def update_mode_ajax(request, pk):
+async def update_mode_ajax(request, pk):
     """AJAX endpoint to update Mode of Procurement dynamically."""
     try:
-        pr = PurchaseRequest.objects.get(pk=pk)
+        pr = await PurchaseRequest.objects.aget(pk=pk)
     except PurchaseRequest.DoesNotExist:
         return JsonResponse({"success": False, "error": "PR not found"}, status=404)
 
@@ -733,7 +963,8 @@ def update_mode_ajax(request, pk):
 
             pr.mode_of_procurement = mode or None
             pr.negotiated_type = subtype or None
-            pr.save(update_fields=["mode_of_procurement", "negotiated_type"])
+            await pr.asave(update_fields=["mode_of_procurement", "negotiated_type"])
+            await sync_to_async(log_action)(await request.auser(), "pr.mode_changed", pr, notes=mode)
 
             return JsonResponse({"success": True})
         except Exception as e:
@@ -764,7 +995,7 @@ def _allowed_statuses_for_mode(mode):
 
 @login_required
 @csrf_exempt  # we rely on X-CSRFToken header; you may remove csrf_exempt if you use standard CSRF middleware and cookie header
-def update_status_ajax(request, pk):
+async def update_status_ajax(request, pk):
     """
     JSON POST: { "status": "<new_status>" }
     Permissions:
@@ -773,12 +1004,13 @@ def update_status_ajax(request, pk):
     Server-side validates allowed statuses for the PR's mode before saving.
     """
     try:
-        pr = PurchaseRequest.objects.get(pk=pk)
+        pr = await PurchaseRequest.objects.aget(pk=pk)
     except PurchaseRequest.DoesNotExist:
         return JsonResponse({"success": False, "error": "PR not found"}, status=404)
 
     # RBAC: only procurement/admin can change status
-    if not (request.user.groups.filter(name='Procurement').exists() or request.user.is_superuser or request.user.groups.filter(name='Admin').exists()):
+    user = await request.auser()
+    if not (user.is_superuser or await ain_groups(user, "Procurement", "Admin")):
         return JsonResponse({"success": False, "error": "Permission denied"}, status=403)
 
     if request.method != 'POST':
@@ -798,10 +1030,8 @@ def update_status_ajax(request, pk):
     if new_status not in allowed:
         return JsonResponse({"success": False, "error": "Status not allowed for the current Mode of Procurement"}, status=400)
 
-    # Optionally map status codes to readable labels or set pr.status to new_status directly
-    pr.status = new_status
-    pr.last_update = timezone.now()
-    pr.save(update_fields=['status','last_update'])
+    # the status change is a transaction, which the async ORM can't open
+    await sync_to_async(_change_pr_status)(pr, new_status, user)
 
     # Return success and formatted last_update
     return JsonResponse({
@@ -809,6 +1039,11 @@ def update_status_ajax(request, pk):
         "last_update": pr.last_update.strftime("%b %d, %Y %H:%M"),
     })
 
+def _change_pr_status(pr, new_status, user):
+    previous_status = pr.status
+    pr.set_status(new_status, actor=user)
+    log_action(user, "pr.status_changed", pr, notes=f"{previous_status} → {new_status}")
+
 # Reusable permission mixin
 class ProcurementOrAdminMixin(UserPassesTestMixin):
     def test_func(self):
@@ -845,52 +1080,44 @@ class SignatoryDeleteView(ProcurementOrAdminMixin, DeleteView):
     success_url = reverse_lazy("procurement:signatory_list")
 
 # ---------- AJAX Handlers ----------
+def _signatory_fields(request):
+    # Accept form-encoded (POST) or JSON
+    if request.content_type == "application/json":
+        data = json.loads(request.body.decode())
+        return data.get("name", "").strip(), data.get("designation", "").strip()
+    return request.POST.get("name", "").strip(), request.POST.get("designation", "").strip()
+
 @login_required
 @require_POST
-def signatory_add_ajax(request):
-    # Accept form-encoded (POST) or JSON
+async def signatory_add_ajax(request):
     try:
-        if request.content_type == "application/json":
-            data = json.loads(request.body.decode())
-            name = data.get("name", "").strip()
-            designation = data.get("designation", "").strip()
-        else:
-            name = request.POST.get("name", "").strip()
-            designation = request.POST.get("designation", "").strip()
-
+        name, designation = _signatory_fields(request)
         if not name or not designation:
             return JsonResponse({"success": False, "error": "Missing required fields"}, status=400)
 
-        if not request.user.groups.filter(name__in=["Procurement", "Admin"]).exists():
+        if not await ain_groups(await request.auser(), "Procurement", "Admin"):
             return HttpResponseForbidden("Insufficient permissions")
 
-        s = Signatory.objects.create(name=name, designation=designation)
+        s = await Signatory.objects.acreate(name=name, designation=designation)
         return JsonResponse({"success": True, "id": s.pk, "name": s.name, "designation": s.designation})
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
 
 @login_required
 @require_POST
-def signatory_edit_ajax(request, pk):
+async def signatory_edit_ajax(request, pk):
     try:
-        if request.content_type == "application/json":
-            data = json.loads(request.body.decode())
-            name = data.get("name", "").strip()
-            designation = data.get("designation", "").strip()
-        else:
-            name = request.POST.get("name", "").strip()
-            designation = request.POST.get("designation", "").strip()
-
+        name, designation = _signatory_fields(request)
         if not name or not designation:
             return JsonResponse({"success": False, "error": "Missing required fields"}, status=400)
 
-        if not request.user.groups.filter(name__in=["Procurement", "Admin"]).exists():
+        if not await ain_groups(await request.auser(), "Procurement", "Admin"):
             return HttpResponseForbidden("Insufficient permissions")
 
-        signatory = get_object_or_404(Signatory, pk=pk)
+        signatory = await Signatory.objects.aget(pk=pk)
         signatory.name = name
         signatory.designation = designation
-        signatory.save()
+        await signatory.asave()
         return JsonResponse({"success": True})
     except Signatory.DoesNotExist:
         return JsonResponse({"success": False, "error": "Not found"}, status=404)
@@ -899,19 +1126,80 @@ def signatory_edit_ajax(request, pk):
 
 @login_required
 @require_POST
-def signatory_delete_ajax(request, pk):
+async def signatory_delete_ajax(request, pk):
     try:
-        if not request.user.groups.filter(name__in=["Procurement", "Admin"]).exists():
+        if not await ain_groups(await request.auser(), "Procurement", "Admin"):
             return HttpResponseForbidden("Insufficient permissions")
 
-        signatory = get_object_or_404(Signatory, pk=pk)
-        signatory.delete()
+        deleted, _ = await Signatory.objects.filter(pk=pk).adelete()
+        if not deleted:
+            return JsonResponse({"success": False, "error": "Not found"}, status=404)
         return JsonResponse({"success": True})
-    except Signatory.DoesNotExist:
-        return JsonResponse({"success": False, "error": "Not found"}, status=404)
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=500)
-    
+
+
+# -----------------------
+# LIVE UPDATES (Server-Sent Events)
+# -----------------------
+@login_required
+async def live_events(request):
+    """
+    text/event-stream of the PR, RFQ and PO events the user may see (see
+    procurement.utils.live). On reconnect EventSource sends Last-Event-ID and
+    gets the events it missed first.
+    """
+    if not isinstance(request, ASGIRequest):
+        # a sync worker would be tied up for as long as the page stays open
+        return HttpResponse(status=204)
+    user = await request.auser()
+    see_all = user.is_superuser or await ain_groups(user, "Procurement", "Admin")
+    last_id = request.headers.get("Last-Event-ID", "")
+    response = StreamingHttpResponse(
+        _live_stream(user.pk, see_all, int(last_id) if last_id.isdigit() else None),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
+
+
+async def _live_stream(user_id, see_all, last_id):
+    config = live.live_settings()
+    # subscribe before the replay so nothing published meanwhile is missed
+    subscription = live.broadcaster.subscribe()
+    try:
+        yield b"retry: 5000\n\n"
+        if last_id is not None:
+            # replay page by page until caught up: the broadcaster only has
+            # what follows its own position, so stopping early loses events
+            live_events = OutboxEvent.objects.filter(topic__in=live.LIVE_TOPICS).order_by("pk")
+            horizon = live.settle_horizon()
+            caught_up = False
+            while not caught_up:
+                read = 0
+                async for event in live_events.filter(pk__gt=last_id)[:config["REPLAY_LIMIT"]]:
+                    if horizon is not None and event.created_at > horizon:
+                        break  # the broadcaster delivers it once settled
+                    read += 1
+                    last_id = event.pk
+                    if live.can_see(event, user_id, see_all):
+                        yield live.sse_message(event)
+                caught_up = read < config["REPLAY_LIMIT"]
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), config["HEARTBEAT"])
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if last_id is not None and event.pk <= last_id:
+                continue  # already replayed
+            if live.can_see(event, user_id, see_all):
+                yield live.sse_message(event)
+    finally:
+        live.broadcaster.unsubscribe(subscription)
+
+
 @login_required
 @user_passes_test(in_procurement_group)
 def rfq_process(request, pk):
@@ -972,13 +1260,12 @@ def remove_bid(request, bid_id):
 @user_passes_test(in_procurement_group)
 def enter_bid_lines(request, bid_id):
     """
-    Enter per-item prices for a Bid. Enforces that all PRItems in the RFQ's PR
-    have a corresponding BidLine (i.e., completeness) before final save.
+    Enter per-item prices for a Bid. Enforces that every item on the RFQ
+    has a corresponding BidLine (i.e., completeness) before final save.
     """
-    bid = get_object_or_404(Bid, pk=bid_id)
+    bid = get_object_or_404(Bid.objects.select_related("rfq"), pk=bid_id)
     rfq = bid.rfq
-    pr = rfq.purchase_request
-    pr_items = list(rfq_pr_items(rfq))
+    rfq_items = list(rfq.items.select_related("purchase_request"))
 
     if request.method == "POST":
         formset = BidLineFormSet(request.POST, instance=bid)
@@ -1002,35 +1289,24 @@ def enter_bid_lines(request, bid_id):
                 # We will rely on provided_pr_item_ids + final save to reflect final state.
                 provided_pr_item_ids.add(existing.pr_item_id)
 
-            # Determine which PRItems are missing
-            missing = [itm for itm in pr_items if itm.pk not in provided_pr_item_ids]
+            # Determine which RFQ items are missing
+            missing = [itm for itm in rfq_items if itm.pr_item_id and itm.pr_item_id not in provided_pr_item_ids]
 
             if missing:
                 # Formset is valid but incomplete: refuse to accept and display message
                 names = ", ".join([str(m.description) for m in missing])
                 messages.error(request,
-                    "Bid lines are incomplete. Please provide prices for all PR items: "
+                    "Bid lines are incomplete. Please provide prices for all RFQ items: "
                     f"{names}"
                 )
                 # Re-render formset (without saving any changes)
                 return render(request, "procurement/enter_bid_lines.html", {
-                    "bid": bid, "formset": formset, "rfq": rfq, "pr_items": pr_items
+                    "bid": bid, "formset": formset, "rfq": rfq, "rows": bid_line_rows(formset, rfq_items)
                 })
 
-            # Everything is present — save changes
-            # Delete objects marked for deletion
-            for obj in formset.deleted_objects:
-                obj.delete()
-
-            # Save/attach new or changed lines
-            for line in lines:
-                line.bid = bid
-                line.save()
-
-            # Optionally update bid status to 'submitted' (if you use that)
-            if bid.status != "submitted":
-                bid.status = "submitted"
-                bid.save(update_fields=['status'])
+            # Everything is present — save changes in one transaction
+            _save_bid_lines(bid, lines, formset.deleted_objects)
+            log_action(request.user, "bid.lines_saved", bid, notes=f"{len(lines)} changed line(s)")
 
             messages.success(request, "Bid lines saved successfully and are complete.")
             return redirect("procurement:rfq_process", pk=rfq.pk)
@@ -1038,23 +1314,12 @@ def enter_bid_lines(request, bid_id):
         # invalid formset
         messages.error(request, "Please correct the errors in the form.")
         return render(request, "procurement/enter_bid_lines.html", {
-            "bid": bid, "formset": formset, "rfq": rfq, "pr_items": pr_items
+            "bid": bid, "formset": formset, "rfq": rfq, "rows": bid_line_rows(formset, rfq_items)
         })
 
     else:
-
-        formset = BidLineFormSet(instance=bid)
-
-        # Ensure all PR items have a BidLine entry (auto-create missing ones)
-        existing_pr_item_ids = set(bid.lines.values_list("pr_item_id", flat=True))
-        for pr_item in pr_items:
-            if pr_item.id not in existing_pr_item_ids:
-                BidLine.objects.create(
-                    bid=bid,
-                    pr_item=pr_item,
-                    unit_price=0,
-                    compliant=True,
-                )
+        # Ensure all RFQ items have a BidLine entry (auto-create missing ones)
+        _create_missing_bid_lines(bid, rfq_items)
 
         # Reload the formset after ensuring all lines exist
         formset = BidLineFormSet(instance=bid)
@@ -1063,10 +1328,43 @@ def enter_bid_lines(request, bid_id):
             "bid": bid,
             "formset": formset,
             "rfq": rfq,
-            "pr_items": pr_items,
+            "rows": bid_line_rows(formset, rfq_items),
         })
 
 
+@retry_on_locked
+@transaction.atomic
+def _save_bid_lines(bid, lines, deleted_lines):
+    with span("bid.lines.save", bid_id=bid.pk, rfq_id=bid.rfq_id, supplier_id=bid.supplier_id,
+              line_count=len(lines), deleted_count=len(deleted_lines)):
+        # Delete objects marked for deletion
+        for obj in deleted_lines:
+            obj.delete()
+
+        # Save/attach new or changed lines
+        for line in lines:
+            line.bid = bid
+            line.save()
+
+        # Optionally update bid status to 'submitted' (if you use that)
+        if bid.status != "submitted":
+            bid.status = "submitted"
+            bid.save(update_fields=['status'])
+
+
+@retry_on_locked
+@transaction.atomic
+def _create_missing_bid_lines(bid, rfq_items):
+    with span("bid.lines.create_missing", bid_id=bid.pk, rfq_id=bid.rfq_id, item_count=len(rfq_items)) as s:
+        existing_pr_item_ids = set(bid.lines.values_list("pr_item_id", flat=True))
+        created = BidLine.objects.bulk_create([
+            BidLine(bid=bid, pr_item_id=item.pr_item_id, unit_price=0, compliant=True)
+            for item in rfq_items
+            if item.pr_item_id and item.pr_item_id not in existing_pr_item_ids
+        ])
+        s.set("created_count", len(created))
+
+
 @login_required
 @user_passes_test(in_procurement_group)
 def create_aoq_from_rfq(request, rfq_id):
@@ -1079,10 +1377,29 @@ def create_aoq_from_rfq(request, rfq_id):
     return redirect("procurement:aoq_detail", pk=aoq.pk)
 
 
+@login_required
+@user_passes_test(in_procurement_group)
+@require_POST
+def generate_aoq(request, rfq_id):
+    """Build (or refresh) the RFQ's AOQ lines from its submitted bids."""
+    rfq = get_object_or_404(RequestForQuotation, pk=rfq_id)
+    try:
+        aoq, counts = AbstractOfQuotation.generate_from_bids(rfq)
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
+        return redirect("procurement:aoq_detail", pk=rfq.aoq.pk)
+    notes = ", ".join(f"{n} {name}" for name, n in counts.items())
+    log_action(request.user, "aoq.generated", aoq, notes=notes)
+    if any(counts.values()):
+        messages.success(request, f"AOQ generated from bids: {notes}.")
+    else:
+        messages.info(request, "AOQ is already up to date with the bids.")
+    return redirect("procurement:aoq_detail", pk=aoq.pk)
+
+
 def abstract_of_quotation(request, rfq_id):
     rfq = get_object_or_404(RequestForQuotation, pk=rfq_id)
-    pr = rfq.purchase_request
-    items = rfq_pr_items(rfq)
+    items = rfq.items.select_related("purchase_request")
     bids = rfq.bids.select_related("supplier").prefetch_related("lines__pr_item")
 
     # Prepare a mapping of supplier → {pr_item_id → BidLine}
@@ -1113,6 +1430,7 @@ def award_aoq(request, aoq_id):
 
     try:
         po = aoq.award(supplier_id, awarded_by=request.user)
+        log_action(request.user, "aoq.awarded", aoq, notes=f"PO {po.po_number}")
         messages.success(request, f"Awarded and PO {po.po_number} created.")
         return redirect("procurement:po_detail", pk=po.pk)
     except Exception as e:
@@ -1143,9 +1461,9 @@ def advance_pr_stage(request, pr_id):
         messages.error(request, f"Cannot transition: {err}")
         return redirect("procurement:pr_detail", pk=pr.pk)
 
-    pr.status = new_status
-    pr.last_update = timezone.now()
-    pr.save(update_fields=["status", "last_update"])
+    previous_status = pr.status
+    pr.set_status(new_status, actor=request.user)
+    log_action(request.user, "pr.status_changed", pr, notes=f"{previous_status} → {new_status}")
     messages.success(request, f"PR moved to {pr.get_status_display()}.")
     return redirect("procurement:pr_detail", pk=pr.pk)
 
@@ -1192,6 +1510,7 @@ def award_aoq_view(request, aoq_id):
     supplier_id = request.POST.get("supplier_id")
     try:
         po = award_aoq_and_create_po(aoq, supplier_id, awarded_by=request.user)
+        log_action(request.user, "aoq.awarded", aoq, notes=f"PO {po.po_number}")
         messages.success(request, f"Awarded. PO {po.po_number} created.")
         return redirect("procurement:po_detail", pk=po.pk)
     except Exception as e:
@@ -1209,11 +1528,13 @@ def save_resolution(request, rfq_id):
     rfq.resolution_by = request.user
     rfq.resolution_at = timezone.now()
     rfq.save(update_fields=["resolution","resolution_by","resolution_at"])
+    log_action(request.user, "rfq.resolution_saved", rfq)
     messages.success(request, "Resolution saved.")
     return redirect("procurement:rfq_process", pk=rfq.pk)
 
 @login_required
 @user_passes_test(in_procurement_group)
+@replica_reads
 def aoq_export_csv(request, aoq_id):
     aoq = get_object_or_404(AbstractOfQuotation, pk=aoq_id)
     response = HttpResponse(content_type='text/csv')
@@ -1230,7 +1551,8 @@ def aoq_export_csv(request, aoq_id):
 def consolidate_to_rfq(request):
     """
     Create a consolidated RFQ from multiple PRs (selected_prs comes as CSV of ids).
-    - RFQ number is based on the first selected PR number.
+    - RFQ number is the next one of the fiscal year.
+    - PRs already on an RFQ are refused (the page disables them, but it may be stale).
     - Selected PRs are linked to the created RFQ.
     - Each PR.consolidated_in is updated.
     - Consolidation is logged.
@@ -1249,44 +1571,63 @@ def consolidate_to_rfq(request):
         messages.error(request, "No valid Purchase Requests found.")
         return redirect("procurement:pr_list")
 
-    # ✅ Use the first PR as the reference for RFQ number
-    first_pr = prs.first()
-    rfq_number = f"RFQ-{first_pr.pr_number}"
-
-    # ✅ Prevent duplicate RFQ numbers
-    if RequestForQuotation.objects.filter(rfq_number=rfq_number).exists():
-        messages.error(request, f"RFQ for {first_pr.pr_number} already exists.")
+    try:
+        rfq = _create_consolidated_rfq(prs, request.user, remarks)
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
         return redirect("procurement:pr_list")
+    log_action(request.user, "rfq.consolidated", rfq, notes=", ".join(str(pk) for pk in ids))
 
-    # ✅ Create the RFQ
-    rfq = RequestForQuotation.objects.create(
-        rfq_number=rfq_number,
-        created_by=request.user,
-        remarks=remarks,
-    )
+    messages.success(request, f"RFQ {rfq.rfq_number} created from {prs.count()} PR(s).")
+    return redirect("procurement:rfq_process", pk=rfq.pk)
 
-    # ✅ Link PRs to the RFQ
-    rfq.consolidated_prs.set(prs)
-    rfq.save()
 
-    for pr in prs:
-        pr.consolidated_in = rfq
-        pr.save(update_fields=["consolidated_in"])
+@retry_on_locked
+@transaction.atomic
+def _create_consolidated_rfq(prs, user, remarks):
+    with span("rfq.consolidate") as consolidate_span:
+        prs = list(prs)
+        consolidate_span.set("pr_count", len(prs))
 
-    # ✅ Optional: Log the consolidation if the model exists
-    try:
-        log = RFQConsolidationLog.objects.create(
-            rfq=rfq,
-            consolidated_by=request.user,
-            remarks=remarks,
+        # checked under the write lock, so two submits can't both link a PR
+        linked = list(
+            PurchaseRequest.objects.select_for_update(of=("self",))
+            .filter(pk__in=[pr.pk for pr in prs])
+            .filter(Q(consolidated_in__isnull=False) | Q(rfq__isnull=False))
+            .order_by("pk")
         )
-        log.consolidated_prs.set(prs)
-    except NameError:
-        # Skip logging if model not defined
-        pass
+        if linked:
+            raise ValidationError(
+                "Already on an RFQ: %s." % ", ".join(pr.pr_number or f"PR #{pr.pk}" for pr in linked)
+            )
 
-    messages.success(request, f"RFQ {rfq.rfq_number} created from {prs.count()} PR(s).")
-    return redirect("procurement:rfq_process", pk=rfq.pk)
+        # ✅ Create the RFQ
+        with span("rfq.create"):
+            rfq = RequestForQuotation.objects.create(
+                created_by=user,
+                remarks=remarks,
+            )
+        consolidate_span.set("rfq_id", rfq.pk)
+        consolidate_span.set("rfq_number", rfq.rfq_number)
+
+        # ✅ Link PRs to the RFQ
+        with span("rfq.link_prs", pr_count=len(prs)):
+            rfq.consolidated_prs.set(prs)
+            PurchaseRequest.objects.filter(pk__in=[pr.pk for pr in prs]).update(consolidated_in=rfq)
+
+        with span("rfq.snapshot_items") as snapshot_span:
+            snapshot_span.set("item_count", len(rfq.snapshot_items()))
+
+        # ✅ Log the consolidation
+        with span("rfq.consolidation_log"):
+            log = RFQConsolidationLog.objects.create(
+                rfq=rfq,
+                consolidated_by=user,
+                remarks=remarks,
+            )
+            log.consolidated_prs.set(prs)
+        live.rfq_issued(rfq, prs)
+    return rfq
 
 
 @login_required
@@ -1295,6 +1636,124 @@ def rfq_detail(request, pk):
     return render(request, "procurement/rfq_detail.html", {"rfq": rfq})
 
 @login_required
+@user_passes_test(in_procurement_group)
+@replica_reads
+def stage_analytics(request):
+    """Per-stage p50/p90 dwell time by office, mode of procurement and month."""
+    try:
+        months = min(max(int(request.GET.get("months", 6)), 1), 36)
+    except ValueError:
+        months = 6
+    office = request.GET.get("office") or None
+    mode = request.GET.get("mode") or None
+
+    last_month = timezone.localdate().replace(day=1)
+    first_month = last_month
+    for _ in range(months - 1):
+        first_month = (first_month - timedelta(days=1)).replace(day=1)
+
+    stage_labels = dict(PurchaseRequest.STATUS_CHOICES)
+    rows = dwell_report(first_month, last_month, office=office, mode=mode)
+    for row in rows:
+        row["stage_label"] = stage_labels.get(row["stage"], row["stage"])
+        row["p50_days"] = row["p50_seconds"] / 86400
+        row["p90_days"] = row["p90_seconds"] / 86400
+
+    return render(request, "procurement/stage_analytics.html", {
+        "rows": rows,
+        "months": months,
+        "office_filter": office or "",
+        "mode_filter": mode or "",
+        "offices": (
+            PurchaseRequest.objects.exclude(office_section__isnull=True)
+            .values_list("office_section", flat=True).distinct().order_by("office_section")
+        ),
+        "modes": PurchaseRequest.MODE_OF_PROCUREMENT_CHOICES,
+    })
+
+
+# -----------------------
+# PROFILING
+# -----------------------
+@login_required
+@user_passes_test(is_system_admin)
+def profiling_report(request):
+    """Endpoints with recorded profiles, hottest (most samples) first, plus repeated-query offenders."""
+    config = profiling.profiling_settings()
+    return render(request, "procurement/profiling_report.html", {
+        "endpoints": profiling.endpoint_summary(config["DIR"]),
+        "config": config,
+        "offenders": nplusone.worst_offenders(),
+        "n_plus_one": nplusone.n_plus_one_settings(),
+    })
+
+
+@login_required
+@user_passes_test(is_system_admin)
+def profiling_download(request, view_name):
+    """Merged collapsed stacks for one endpoint, ready for flamegraph.pl or speedscope."""
+    stacks = profiling.read_collapsed(profiling.profiling_settings()["DIR"], view_name)
+    if not stacks:
+        return HttpResponse("No samples recorded for this endpoint.", status=404, content_type="text/plain")
+    body = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    response = HttpResponse(body, content_type="text/plain; charset=utf-8")
+    filename = view_name.replace(":", "_")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.collapsed"'
+    return response
+
+
+# -----------------------
+# BATCH PRINTING
+# -----------------------
+PRINT_LIST_VIEWS = {"pr": "procurement:pr_list", "rfq": "procurement:rfq_list", "po": "procurement:po_list"}
+
+
+@login_required
+@user_passes_test(in_procurement_group)
+@require_POST
+def print_job_create(request, kind):
+    """Queue the documents ticked on a list view for printing into one PDF."""
+    if kind not in PRINT_LIST_VIEWS:
+        raise Http404("Unknown document type")
+    ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()]
+    if not ids:
+        messages.error(request, "Select at least one document to print.")
+        return redirect(PRINT_LIST_VIEWS[kind])
+    try:
+        job = create_print_job(kind, ids, request.user, base_url=request.build_absolute_uri("/"))
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect(PRINT_LIST_VIEWS[kind])
+    log_action(request.user, "print_job.created", job, notes=f"{kind}: {len(ids)} document(s)")
+    messages.success(request, f"Printing {len(ids)} document(s). The PDF will be ready to download below.")
+    return redirect("procurement:print_jobs")
+
+
+@login_required
+@user_passes_test(in_procurement_group)
+def print_jobs(request):
+    """Recent print jobs (everyone's for admins); refreshes while any is still running."""
+    jobs = PrintJob.objects.select_related("created_by")
+    if not is_system_admin(request.user):
+        jobs = jobs.filter(created_by=request.user)
+    jobs = list(jobs[:25])
+    return render(request, "procurement/print_jobs.html", {
+        "jobs": jobs,
+        "active": any(job.status in ("pending", "running") for job in jobs),
+    })
+
+
+@login_required
+@user_passes_test(in_procurement_group)
+def print_job_download(request, pk):
+    job = get_object_or_404(PrintJob, pk=pk, status="done")
+    if job.created_by_id != request.user.pk and not is_system_admin(request.user):
+        return HttpResponseForbidden("Not your print job.")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=f"{job.kind}-batch-{job.pk}.pdf")
+
+
+@login_required
+@replica_reads
 def pr_list(request):
     pr_queryset = PurchaseRequest.objects.all()
 
@@ -1326,8 +1785,28 @@ def print_pr(request, pk):
 
     html_string = render_to_string("procurement/pr_preview.html", {
         "pr": pr,
+        "layout": pr_print_layout(pr),
         "officer_name": officer_name,
         "officer_title": officer_title,
     })
-    pdf = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-    return HttpResponse(pdf, content_type="application/pdf")
+    data = pdf.html_to_pdf(html_string, base_url=request.build_absolute_uri())
+    return HttpResponse(data, content_type="application/pdf")
+
+
+# -----------------------
+# METRICS
+# -----------------------
+def metrics_endpoint(request):
+    """
+    Prometheus scrape target. With METRICS["TOKEN"] set it takes that bearer
+    token; without one it is open only under DEBUG, and to staff otherwise.
+    """
+    token = metrics.metrics_settings()["TOKEN"]
+    if token:
+        # bytes: compare_digest rejects non-ASCII str with TypeError
+        allowed = hmac.compare_digest(request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode())
+    else:
+        allowed = settings.DEBUG or (request.user.is_authenticated and request.user.is_staff)
+    if not allowed:
+        return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+    return HttpResponse(metrics.render_text(), content_type="text/plain; version=0.0.4; charset=utf-8")